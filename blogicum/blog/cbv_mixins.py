@@ -2,6 +2,7 @@
 from django.urls import reverse
 
 from blog.models import Post, Comment
+from blog.pagination import attach_comment_counts
 
 COUNT_PAGINATE = 10
 
@@ -26,3 +27,11 @@ class PostListMixin:
 
     model = Post
     paginate_by = COUNT_PAGINATE
+
+    def paginate_queryset(self, queryset, page_size):
+        """Досчитывает комментарии, если они в отдельной БД."""
+        paginator, page, object_list, is_paginated = (
+            super().paginate_queryset(queryset, page_size)
+        )
+        page.object_list = object_list = attach_comment_counts(object_list)
+        return paginator, page, object_list, is_paginated
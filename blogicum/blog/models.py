@@ -122,6 +122,13 @@ class Post(PublishedTimeModel):
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('category', 'pub_date'),
+                         name='post_category_pub_date_idx'),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=('title', 'text'),
@@ -137,19 +144,26 @@ class Post(PublishedTimeModel):
 
 
 class Comment(TimeModel, models.Model):
-    """Класс коммент."""
+    """Класс коммент.
+
+    Комментарии могут храниться в отдельной БД (COMMENTS_DATABASE),
+    поэтому внешние ключи без ограничений в БД, а каскадное удаление
+    выполняет blog.signals.
+    """
 
     text = models.TextField(
         'Комментарий'
     )
     post = models.ForeignKey(
         Post,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='comments',
         verbose_name='Пост'
     )
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE,
+        User, on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='comments',
         verbose_name='Автор публикации'
     )
@@ -160,6 +174,10 @@ class Comment(TimeModel, models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_at_idx'),
+        )
 
     def __str__(self) -> str:
         """Переопределяем метод str."""
@@ -1,14 +1,41 @@
 """Модуль для фильтрации и аннотации запросов к моделям Django."""
-from django.db.models import Count
+from django.db import router
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from blog.models import Comment, Post
+from core.routers import get_comments_db
+
+
+def comments_in_post_db():
+    """Лежат ли комментарии в одной БД с постами и пользователями."""
+    return (not get_comments_db()
+            or router.db_for_read(Comment) == router.db_for_read(Post))
+
+
+def comment_count_subquery():
+    """Число комментариев поста без группировки всей выборки."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
 
 def filter_annotate(posts, filter=False, annotate=True):
     """Выбор актуальных публичных постов."""
+    posts = posts.select_related('author', 'location', 'category')
     if annotate:
-        posts = posts.annotate(
-            comment_count=Count('comments')
-        ).order_by('-pub_date')
+        if comments_in_post_db():
+            posts = posts.annotate(comment_count=comment_count_subquery())
+        posts = posts.order_by('-pub_date')
     if filter:
         posts = posts.filter(
             is_published=True,
@@ -16,3 +43,26 @@ def filter_annotate(posts, filter=False, annotate=True):
             category__is_published=True
         )
     return posts
+
+
+def attach_comment_counts(posts):
+    """Подсчитать комментарии постов из другой БД одним запросом."""
+    posts = list(posts)
+    if posts and not hasattr(posts[0], 'comment_count'):
+        counts = dict(
+            Comment.objects.filter(post_id__in=[post.pk for post in posts])
+            .order_by()
+            .values('post')
+            .annotate(count=Count('pk'))
+            .values_list('post', 'count')
+        )
+        for post in posts:
+            post.comment_count = counts.get(post.pk, 0)
+    return posts
+
+
+def comments_with_authors(comments):
+    """Комментарии с авторами: соединением или вторым запросом."""
+    if comments_in_post_db():
+        return comments.select_related('author')
+    return comments.prefetch_related('author')
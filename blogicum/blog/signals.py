@@ -0,0 +1,62 @@
+"""Модуль для каскадного удаления комментариев и сброса кэша страниц.
+
+Комментарии могут лежать в другой БД, поэтому каскад на уровне БД и
+``on_delete=CASCADE`` не работают. Если комментарии в той же БД, они
+удаляются в транзакции удаления поста или пользователя; если в другой —
+после её фиксации, чтобы при откате не потерять комментарии.
+
+Страницы блога в кэше ``core.page_cache`` удаляются по тегу после
+фиксации любого изменения их данных.
+"""
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blog.models import Category, Comment, Location, Post
+from core import page_cache
+
+PAGE_CACHE_TAG = 'blog'
+
+User = get_user_model()
+
+
+def delete_comments(using, **lookup):
+    comments = Comment.objects.filter(**lookup)
+    if router.db_for_write(Comment) == using:
+        comments.delete()
+    else:
+        transaction.on_commit(comments.delete, using=using)
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_comments(sender, instance, using, **kwargs):
+    """Удалить комментарии удалённого поста."""
+    delete_comments(using, post_id=instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def delete_user_comments(sender, instance, using, **kwargs):
+    """Удалить комментарии удалённого пользователя."""
+    delete_comments(using, author_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=User)
+def invalidate_pages(sender, using, update_fields=None, **kwargs):
+    """Сбросить кэш страниц блога после изменения их данных."""
+    if update_fields == {'last_login'}:
+        # Вход пользователя страницы не меняет.
+        return
+    if page_cache.is_enabled():
+        transaction.on_commit(
+            lambda: page_cache.invalidate(PAGE_CACHE_TAG), using=using
+        )
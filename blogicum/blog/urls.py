@@ -5,6 +5,21 @@ from . import views
 
 app_name = 'blog'
 
+# Максимальное число SQL-запросов при обращении к странице.
+QUERY_BUDGETS = {
+    'index': 4,
+    'category_posts': 5,
+    'profile': 5,
+    'edit_profile': 2,
+    'create_post': 4,
+    'post_detail': 5,
+    'edit_post': 7,
+    'delete_post': 7,
+    'add_comment': 8,
+    'edit_comment': 5,
+    'delete_comment': 5,
+}
+
 post_detail_patterns = [
     path('', views.PostDetailView.as_view(), name='post_detail'),
     path('edit/', views.PostUpdateView.as_view(), name='edit_post'),
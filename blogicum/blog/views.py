@@ -11,21 +11,23 @@ from django.views.generic import (
 
 from blog.forms import PostCreateForm, CommentForm, ProfileForm
 from blog.models import Post, Comment, Category
-from blog.pagination import filter_annotate
-from core.mixins import OnlyAuthorMixin
+from blog.pagination import comments_with_authors, filter_annotate
+from core.mixins import CachedPageMixin, OnlyAuthorMixin, WriteMixin
 from .cbv_mixins import CommentActionMixin, PostListMixin
 
 User = get_user_model()
 
 
-class Index(PostListMixin, ListView):
+class Index(CachedPageMixin, PostListMixin, ListView):
     """Вывод постов на главную страницу."""
 
     template_name = 'blog/index.html'
-    queryset = filter_annotate(Post.objects, filter=True)
+
+    def get_queryset(self):
+        return filter_annotate(Post.objects, filter=True)
 
 
-class CategoryList(PostListMixin, ListView):
+class CategoryList(CachedPageMixin, PostListMixin, ListView):
     """Вывод постов по категории."""
 
     CATEGORY_SLUG_PARAM = 'category_slug'
@@ -33,12 +35,12 @@ class CategoryList(PostListMixin, ListView):
 
     def get_category(self):
         if not hasattr(self, '_category'):
-            category = get_object_or_404(
+            self._category = get_object_or_404(
                 Category,
                 slug=self.kwargs[self.CATEGORY_SLUG_PARAM],
                 is_published=True
             )
-        return category
+        return self._category
 
     def get_queryset(self):
         return filter_annotate(self.get_category().posts, filter=True)
@@ -74,7 +76,7 @@ class ProfileDetailView(SingleObjectMixin, PostListMixin, ListView):
         return queryset
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, WriteMixin, CreateView):
     """Создание поста."""
 
     model = Post
@@ -92,7 +94,7 @@ class PostCreateView(LoginRequiredMixin, CreateView):
                        args=(self.request.user.username,))
 
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(LoginRequiredMixin, WriteMixin, CreateView):
     """Создание комментария."""
 
     model = Comment
@@ -118,7 +120,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
                        args=(self.kwargs.get(self.GET_SLUG_PARAM),))
 
 
-class PostUpdateView(OnlyAuthorMixin, UpdateView):
+class PostUpdateView(OnlyAuthorMixin, WriteMixin, UpdateView):
     """Редактирование поста."""
 
     model = Post
@@ -127,7 +129,8 @@ class PostUpdateView(OnlyAuthorMixin, UpdateView):
     pk_url_kwarg = 'post_id'
 
 
-class CommentUpdateView(OnlyAuthorMixin, CommentActionMixin, UpdateView):
+class CommentUpdateView(OnlyAuthorMixin, CommentActionMixin,
+                        WriteMixin, UpdateView):
     """Редактирование комментария."""
 
     form_class = CommentForm
@@ -141,25 +144,26 @@ class PostDetailView(DetailView):
     pk_url_kwarg = 'post_id'
 
     def get_object(self):
-        queryset = self.get_queryset()
-        post = super().get_object()
-        if self.request.user != post.author:
-            return super().get_object(filter_annotate(queryset,
-                                                      filter=True,
-                                                      annotate=False))
-        return post
+        queryset = filter_annotate(self.get_queryset(), annotate=False)
+        if self.request.user.is_authenticated:
+            post = super().get_object(queryset)
+            if self.request.user == post.author:
+                return post
+        return super().get_object(filter_annotate(queryset,
+                                                  filter=True,
+                                                  annotate=False))
 
     def get_context_data(self, **kwargs):
         """Добавляем форму и оптимизируем запрос."""
         context = super().get_context_data(
-            comments=self.object.comments.select_related('author'),
+            comments=comments_with_authors(self.object.comments.all()),
             **kwargs)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
-class ProfileUpdateView(LoginRequiredMixin, UpdateView):
+class ProfileUpdateView(LoginRequiredMixin, WriteMixin, UpdateView):
     """Редактирование профиля."""
 
     form_class = ProfileForm
@@ -176,7 +180,7 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         return self.request.user
 
 
-class PostDeleteView(OnlyAuthorMixin, DeleteView):
+class PostDeleteView(OnlyAuthorMixin, WriteMixin, DeleteView):
     """Удаление поста."""
 
     model = Post
@@ -198,7 +202,8 @@ class PostDeleteView(OnlyAuthorMixin, DeleteView):
         return context
 
 
-class CommentDeleteView(OnlyAuthorMixin, CommentActionMixin, DeleteView):
+class CommentDeleteView(OnlyAuthorMixin, CommentActionMixin,
+                        WriteMixin, DeleteView):
     """Удаление комментария."""
 
     def get_context_data(self, **kwargs):
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-o7we(p2@)!+v=snu+*s3yl#_2^e-4zwg$v2@oj08+3x+ktav!i'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# В рабочем режиме запускать с BLOGICUM_DEBUG=0.
+DEBUG = os.environ.get('BLOGICUM_DEBUG', '1') != '0'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -39,6 +41,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'pages.apps.PagesConfig',
     'blog.apps.BlogConfig',
+    'core.apps.CoreConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,20 +49,41 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django_bootstrap5',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.shedding.LoadSheddingMiddleware',
+    'core.maintenance.MaintenanceMiddleware',
+    'core.server_timing.ServerTimingMiddleware',
+    'core.memory.MemoryProfilingMiddleware',
+    'core.tracing.TracingMiddleware',
+    'core.slow_queries.SlowQueryLogMiddleware',
+    'core.template_profiler.TemplateProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.routers.ReplicaPinningMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.mirror.MirrorMiddleware',
+    'core.stale.StaleOnErrorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.nplusone.NPlusOneMiddleware',
+    # Интервал трассы для представления: должен быть последним.
+    'core.tracing.ViewSpanMiddleware',
 ]
 
+# Панель отладки нужна только при разработке: без DEBUG её модули даже
+# не импортируются, и процесс стартует быстрее.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(
+        -1, 'debug_toolbar.middleware.DebugToolbarMiddleware'
+    )
+
 ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -87,13 +111,135 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 # 1) За подключение и настройку БД в проекте отвечает константа DATABASES
 
+# 2) Бэкенд core.db.backends.sqlite3 включает WAL, busy_timeout и другие
+# PRAGMA для каждого соединения, а транзакции начинает с BEGIN IMMEDIATE.
+# Значения по умолчанию — DEFAULT_PRAGMAS в core/db/backends/sqlite3/base.py.
+# Путь к файлу БД можно заменить переменной окружения BLOGICUM_DB (так
+# замер запуска в тестах работает с временной БД).
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
+        'NAME': os.environ.get('BLOGICUM_DB', BASE_DIR / 'db.sqlite3'),
+        'OPTIONS': {
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'cache_size': -20000,
+                'mmap_size': 128 * 1024 * 1024,
+            },
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# 3) Реплики для чтения — копии основной БД, которые обновляет
+# python manage.py sync_replicas --interval 5. Число реплик задаёт
+# переменная окружения BLOGICUM_REPLICAS; после записи автор ещё
+# REPLICA_PIN_SECONDS секунд читает из основной БД.
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.environ.get('BLOGICUM_REPLICAS', 0)) + 1)
+]
+for replica in DATABASE_REPLICAS:
+    DATABASES[replica] = {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db.{replica}.sqlite3',
+        'OPTIONS': {'pragmas': {'query_only': 'ON'}},
+        'TEST': {'MIRROR': 'default'},
+    }
+# 4) Зеркало опубликованного контента в памяти каждого процесса
+# (core/mirror.py); включается настройкой MIRROR_ENABLED.
+DATABASES['mirror'] = {
+    'ENGINE': 'core.db.backends.sqlite3',
+    'NAME': 'file:blogicum_mirror?mode=memory&cache=shared',
+    'OPTIONS': {'pragmas': {'foreign_keys': 'OFF',
+                            'read_uncommitted': 'ON'}},
+}
+# 5) Отдельная БД для комментариев: запись комментариев не блокирует
+# запись постов. Включается переменной окружения BLOGICUM_COMMENTS_DB;
+# перенести уже накопленные комментарии — python manage.py move_comments.
+DATABASES['comments'] = {
+    'ENGINE': 'core.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db.comments.sqlite3',
+    'OPTIONS': DATABASES['default']['OPTIONS'],
+}
+COMMENTS_DATABASE = (
+    'comments' if os.environ.get('BLOGICUM_COMMENTS_DB') else None
+)
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Приложения, модели которых можно читать из реплик.
+REPLICA_APPS = ['blog']
+REPLICA_PIN_SECONDS = 10
+
+
+# Кэш: небольшой LRU в памяти процесса (core/cache/backends/tiered.py)
+# перед общим кэшем всех процессов узла в файле SQLite
+# (core/cache/backends/sqlite.py). Сравнить бэкенды —
+# python manage.py cache_benchmark.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.backends.tiered.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+            'GENERATION_CHECK_INTERVAL': 0.5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.cache.backends.sqlite.SQLiteCache',
+        'LOCATION': BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# Кэш страниц ленты и категорий для анонимных пользователей
+# (core/page_cache.py): пересчёт одним процессом, досрочное обновление
+# и отдача устаревшей страницы на время пересчёта.
+PAGE_CACHE_ENABLED = False
+PAGE_CACHE_TIMEOUT = 60
+PAGE_CACHE_STALE_TIMEOUT = 600
+PAGE_CACHE_LOCK_TIMEOUT = 10
+PAGE_CACHE_BETA = 1.0
+# Отдача последней удачной версии страницы, если БД заблокирована или
+# не ответила за STALE_DEADLINE секунд (core/stale.py).
+STALE_ON_ERROR_ENABLED = False
+STALE_VIEWS = ['blog:index', 'blog:category_posts', 'blog:post_detail']
+STALE_DEADLINE = 2
+STALE_STORE_INTERVAL = 30
+STALE_MAX_AGE = 24 * 60 * 60
+STALE_FAILURE_THRESHOLD = 5
+STALE_RESET_TIMEOUT = 30
+# Сброс нагрузки (core/shedding.py): пределы одновременных запросов
+# процесса и отдельных представлений, сверх них — ответ 503.
+LOAD_SHEDDING_ENABLED = False
+LOAD_SHEDDING_MAX_CONCURRENCY = 32
+LOAD_SHEDDING_MAX_QUEUE = 64
+LOAD_SHEDDING_QUEUE_TIMEOUT = 1
+LOAD_SHEDDING_RETRY_AFTER = 1
+LOAD_SHEDDING_VIEW_LIMITS = {
+    'blog:profile': 4,
+    'admin:*_changelist': 2,
+}
+# Режим обслуживания «только чтение» (core/maintenance.py):
+# python manage.py maintenance on|off, перезапуск не нужен.
+MAINTENANCE_FLAG_FILE = BASE_DIR / 'maintenance.flag'
+MAINTENANCE_CHECK_INTERVAL = 1
+MAINTENANCE_RETRY_AFTER = 60
+MAINTENANCE_BLOCKED_VIEWS = [
+    'blog:create_post', 'blog:edit_post', 'blog:delete_post',
+    'blog:add_comment', 'blog:edit_comment', 'blog:delete_comment',
+    'blog:edit_profile', 'registration',
+]
+# Адреса, которые запрашивает прогрев процесса перед приёмом запросов
+# (core/warmup.py, python manage.py runworkers).
+WARMUP_URLS = ['/']
+# Прогревать процесс при загрузке blogicum/wsgi.py, до первого запроса.
+WARMUP_ON_START = not DEBUG
+# Бюджет времени запуска процесса в секундах для
+# python manage.py startup_profile --budget и теста времени запуска.
+STARTUP_TIME_BUDGET = 3
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -165,3 +311,85 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Метрики в формате Prometheus по адресу /metrics.
+# Каждый процесс сохраняет свои метрики в METRICS_DIR не чаще,
+# чем раз в METRICS_FLUSH_INTERVAL секунд.
+METRICS_ENABLED = True
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 5
+# Без токена метрики доступны только персоналу.
+METRICS_TOKEN = None
+
+# Журнал медленных SQL-запросов с планами EXPLAIN QUERY PLAN.
+# Сводка по отпечаткам: python manage.py slow_queries
+SLOW_QUERY_LOG_ENABLED = False
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.log'
+
+# Профилирование рендеринга шаблонов и тегов.
+# Сводка по представлениям: python manage.py template_profile
+TEMPLATE_PROFILING_ENABLED = False
+TEMPLATE_PROFILE_LOG = BASE_DIR / 'template_profile.log'
+
+# Профилирование запросов персонала через cProfile: по заголовку
+# X-Profile-Token (python manage.py profile_token <username>) или
+# для доли PROFILING_SAMPLE_RATE запросов. Профили: /admin/profiles/
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_MAX_FILES = 200
+PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Заголовок Server-Timing с временем БД, шаблонов и кэша.
+SERVER_TIMING_ENABLED = False
+
+# Обнаружение N+1 запросов: None, 'log' или 'raise'.
+# В тестах включён режим 'raise' (см. tests/conftest.py).
+NPLUSONE_MODE = 'log' if DEBUG else None
+# Связи вида 'blog.Post.author', загрузку которых не нужно проверять.
+NPLUSONE_IGNORE = []
+
+# Учёт памяти запросов через tracemalloc: пик и места выделений
+# пишутся в журнал blogicum.memory и в метрики /metrics.
+MEMORY_PROFILING_ENABLED = False
+MEMORY_PROFILING_SAMPLE_RATE = 1
+MEMORY_PROFILING_TOP = 10
+MEMORY_PROFILING_FRAMES = 1
+
+# Локальная трассировка запросов в формате OTLP JSON с ротацией файла.
+# Самые медленные трассы: python manage.py traces
+TRACING_ENABLED = False
+TRACING_SAMPLE_RATE = 1
+TRACING_FILE = BASE_DIR / 'traces' / 'traces.jsonl'
+TRACING_MAX_BYTES = 10 * 1024 * 1024
+TRACING_BACKUP_COUNT = 5
+
+# Повтор изменяющих запросов, которым помешала блокировка SQLite:
+# число попыток и начальная пауза в секундах (растёт экспоненциально).
+# Выигрыш от настроек БД: python manage.py sqlite_contention
+SQLITE_LOCK_RETRIES = 5
+SQLITE_LOCK_RETRY_DELAY = 0.05
+
+# Запись из представлений блога через одного писателя на процесс
+# с групповой фиксацией (core/write_queue.py). Писатели процессов узла
+# чередуются по блокировке файла WRITE_QUEUE_LOCK_FILE. Запись, которую
+# писатель не начал за WRITE_QUEUE_TIMEOUT секунд, отменяется с ответом
+# 503 и заголовком Retry-After: WRITE_QUEUE_RETRY_AFTER.
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_BATCH_SIZE = 32
+WRITE_QUEUE_BATCH_WINDOW = 0
+WRITE_QUEUE_TIMEOUT = 30
+WRITE_QUEUE_RETRY_AFTER = 5
+WRITE_QUEUE_LOCK_FILE = BASE_DIR / 'write_queue.lock'
+
+# Зеркало опубликованного контента в SQLite в памяти процесса: анонимные
+# запросы к MIRROR_VIEWS читают из него. Строится при запуске не дольше
+# MIRROR_BUILD_TIMEOUT секунд и догоняет основную БД по журналу изменений.
+MIRROR_ENABLED = False
+MIRROR_VIEWS = [
+    'blog:index', 'blog:category_posts', 'blog:post_detail', 'blog:profile',
+]
+MIRROR_BUILD_TIMEOUT = 30
+MIRROR_SYNC_INTERVAL = 1
+MIRROR_CHANGE_LOG_MAX_AGE = 24 * 60 * 60
@@ -21,10 +21,15 @@ from django.contrib import admin
 from django.urls import include, path, reverse_lazy
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
-import debug_toolbar
+
+from core import views as core_views
 
 urlpatterns = [
+    path('admin/profiles/', core_views.profile_list, name='profile_list'),
+    path('admin/profiles/<str:name>/', core_views.profile_download,
+         name='profile_download'),
     path('admin/', admin.site.urls),
+    path('metrics', core_views.metrics, name='metrics'),
     path('pages/', include('pages.urls')),
     path('', include('blog.urls')),
     path('auth/', include([
@@ -45,6 +50,8 @@ handler403 = 'pages.views.csrf_failure'
 handler500 = 'pages.views.server_error'
 
 if settings.DEBUG:
+    import debug_toolbar
+
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+# Прогрев до приёма запросов: URLconf, шаблоны и кэши (core/warmup.py).
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ON_START:
+    from core.warmup import warm_up
+
+    warm_up(application)
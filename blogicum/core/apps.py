@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.apps import apps
+
+        from core import mirror
+
+        for label in mirror.MIRRORED_MODELS:
+            model = apps.get_model(label)
+            post_save.connect(mirror.record_change, sender=model,
+                              dispatch_uid=f'mirror_save_{label}')
+            post_delete.connect(mirror.record_change, sender=model,
+                                dispatch_uid=f'mirror_delete_{label}')
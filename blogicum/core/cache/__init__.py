@@ -0,0 +1 @@
+"""Пакет для общего кэша процессов узла."""
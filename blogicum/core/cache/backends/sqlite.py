@@ -0,0 +1,281 @@
+"""Бэкенд кэша в файле SQLite, общем для всех процессов узла.
+
+Подключается через ``BACKEND = 'core.cache.backends.sqlite.SQLiteCache'``,
+``LOCATION`` — путь к файлу. В отличие от ``locmem`` запись и удаление
+видны всем воркерам сразу, а память не дублируется в каждом процессе.
+
+Каждая операция выполняется одним запросом или транзакцией
+``BEGIN IMMEDIATE``, поэтому ``add`` и ``incr`` атомарны между процессами.
+Просроченные записи не отдаются и удаляются при вытеснении. Если записей
+больше ``MAX_ENTRIES``, вытесняется ``1 / CULL_FREQUENCY`` давно не
+читавшихся (LRU); число записей ведут триггеры, так что проверка не
+обходит таблицу. Записи можно пометить тегами ``set(..., tags=[...])``
+и удалить разом ``invalidate_tags(...)``.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL, expires REAL, accessed REAL NOT NULL)'
+    ' WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_entry_accessed'
+    ' ON cache_entry (accessed)',
+    'CREATE TABLE IF NOT EXISTS cache_tag (tag TEXT, key TEXT,'
+    ' PRIMARY KEY (tag, key)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_tag_key ON cache_tag (key)',
+    # Число записей ведут триггеры: COUNT(*) обходил бы всю таблицу при
+    # каждой записи в кэш.
+    'CREATE TABLE IF NOT EXISTS cache_count (id INTEGER PRIMARY KEY'
+    ' CHECK (id = 0), entries INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_count SELECT 0, COUNT(*) FROM cache_entry',
+    'CREATE TRIGGER IF NOT EXISTS cache_entry_inserted'
+    ' AFTER INSERT ON cache_entry'
+    ' BEGIN UPDATE cache_count SET entries = entries + 1; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_entry_deleted'
+    ' AFTER DELETE ON cache_entry'
+    ' BEGIN UPDATE cache_count SET entries = entries - 1; END',
+)
+# Время чтения обновляется не чаще раза в секунду: иначе каждое
+# чтение горячего ключа было бы записью в файл.
+ACCESS_RESOLUTION = 1
+NOT_EXPIRED = '(expires IS NULL OR expires > ?)'
+
+
+def placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+class SQLiteCache(BaseCache):
+    """Кэш с TTL, вытеснением LRU и тегами в файле SQLite."""
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = str(location)
+        self._local = threading.local()
+
+    def _connection(self):
+        # Соединение своё у каждого потока и процесса: после fork
+        # унаследованное соединение использовать нельзя.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.location, isolation_level=None,
+                check_same_thread=False,
+            )
+            for name, value in PRAGMAS.items():
+                connection.execute(f'PRAGMA {name} = {value}')
+            with self._transaction(connection):
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self, connection=None):
+        connection = connection or self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _store(self, connection, key, value, timeout, tags, now):
+        connection.execute(
+            'INSERT INTO cache_entry (key, value, expires, accessed)'
+            ' VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET'
+            ' value = excluded.value, expires = excluded.expires,'
+            ' accessed = excluded.accessed',
+            (key, pickle.dumps(value, self.pickle_protocol),
+             self.get_backend_timeout(timeout), now),
+        )
+        connection.execute('DELETE FROM cache_tag WHERE key = ?', (key,))
+        connection.executemany(
+            'INSERT OR IGNORE INTO cache_tag (tag, key) VALUES (?, ?)',
+            [(tag, key) for tag in tags],
+        )
+
+    def _delete_keys(self, connection, keys):
+        deleted = 0
+        for key in keys:
+            deleted += connection.execute(
+                'DELETE FROM cache_entry WHERE key = ?', (key,)
+            ).rowcount
+            connection.execute('DELETE FROM cache_tag WHERE key = ?', (key,))
+        return deleted
+
+    def _cull(self, connection, now):
+        count, = connection.execute(
+            'SELECT entries FROM cache_count'
+        ).fetchone()
+        if count <= self._max_entries:
+            return
+        expired = [key for key, in connection.execute(
+            'SELECT key FROM cache_entry WHERE expires <= ?', (now,)
+        )]
+        count -= self._delete_keys(connection, expired)
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            limit = count
+        else:
+            limit = count // self._cull_frequency
+        oldest = [key for key, in connection.execute(
+            'SELECT key FROM cache_entry ORDER BY accessed LIMIT ?',
+            (limit,),
+        )]
+        self._delete_keys(connection, oldest)
+
+    def _touch_accessed(self, connection, keys, now):
+        connection.execute(
+            f'UPDATE cache_entry SET accessed = ? WHERE accessed < ?'
+            f' AND key IN ({placeholders(keys)})',
+            (now, now - ACCESS_RESOLUTION, *keys),
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            f'SELECT value, accessed FROM cache_entry'
+            f' WHERE key = ? AND {NOT_EXPIRED}',
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return default
+        if row[1] < now - ACCESS_RESOLUTION:
+            self._touch_accessed(connection, [key], now)
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        connection = self._connection()
+        rows = connection.execute(
+            f'SELECT key, value FROM cache_entry'
+            f' WHERE key IN ({placeholders(keys)}) AND {NOT_EXPIRED}',
+            (*keys, now),
+        ).fetchall()
+        if rows:
+            self._touch_accessed(connection, [key for key, _ in rows], now)
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            tags=()):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as connection:
+            self._store(connection, key, value, timeout, tags, now)
+            self._cull(connection, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None,
+                 tags=()):
+        now = time.time()
+        with self._transaction() as connection:
+            for key, value in data.items():
+                self._store(connection, self._key(key, version), value,
+                            timeout, tags, now)
+            self._cull(connection, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            tags=()):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction() as connection:
+            exists = connection.execute(
+                f'SELECT 1 FROM cache_entry WHERE key = ? AND {NOT_EXPIRED}',
+                (key, now),
+            ).fetchone()
+            if exists:
+                return False
+            self._store(connection, key, value, timeout, tags, now)
+            self._cull(connection, now)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._connection().execute(
+            f'UPDATE cache_entry SET expires = ?'
+            f' WHERE key = ? AND {NOT_EXPIRED}',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            row = connection.execute(
+                f'SELECT value FROM cache_entry'
+                f' WHERE key = ? AND {NOT_EXPIRED}',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entry SET value = ? WHERE key = ?',
+                (pickle.dumps(value, self.pickle_protocol), key),
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._connection().execute(
+            f'SELECT 1 FROM cache_entry WHERE key = ? AND {NOT_EXPIRED}',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            return bool(self._delete_keys(connection, [key]))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        with self._transaction() as connection:
+            self._delete_keys(connection, keys)
+
+    def invalidate_tags(self, *tags):
+        """Удалить все записи с любым из тегов; вернуть их число."""
+        if not tags:
+            return 0
+        with self._transaction() as connection:
+            keys = [key for key, in connection.execute(
+                f'SELECT DISTINCT key FROM cache_tag'
+                f' WHERE tag IN ({placeholders(tags)})',
+                tags,
+            )]
+            return self._delete_keys(connection, keys)
+
+    def clear(self):
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM cache_entry')
+            connection.execute('DELETE FROM cache_tag')
@@ -0,0 +1,168 @@
+"""Двухуровневый кэш: память процесса перед общим кэшем.
+
+Подключается через ``BACKEND = 'core.cache.backends.tiered.TieredCache'``.
+Первый уровень (L1) — небольшой LRU-кэш ``locmem`` в памяти процесса на
+``L1_MAX_ENTRIES`` записей, второй (L2) — общий кэш узла из ``CACHES``
+под именем ``OPTIONS['L2']``. Чтение идёт сначала в L1, при промахе —
+в L2, и найденное запоминается в L1 не дольше ``L1_TIMEOUT`` секунд.
+
+Согласованность L1 держится на номере поколения в L2: удаление,
+``incr``, ``invalidate_tags`` и ``clear`` увеличивают его, а каждый
+процесс не реже раза в ``GENERATION_CHECK_INTERVAL`` секунд сверяет номер
+и при расхождении очищает свой L1. Обычная запись поколение не меняет —
+это заполнение кэша, а не изменение данных; перезаписанное значение
+в чужих L1 живёт не дольше ``L1_TIMEOUT``.
+
+Попадания и промахи по уровням считает метрика
+``blogicum_cache_requests_total``.
+"""
+import itertools
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.metrics import registry
+
+GENERATION_KEY = 'tiered_cache_generation'
+_names = itertools.count()
+_missing = object()
+
+
+def count(level, hit, number=1):
+    registry.inc('blogicum_cache_requests_total',
+                 {'level': level, 'result': 'hit' if hit else 'miss'},
+                 number)
+
+
+class TieredCache(BaseCache):
+    """Кэш процесса (L1) перед общим кэшем узла (L2)."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.check_interval = options.get('GENERATION_CHECK_INTERVAL', 0.5)
+        self.l1 = LocMemCache(f'tiered-{next(_names)}', {
+            'TIMEOUT': self.l1_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('L1_MAX_ENTRIES', 1000)},
+        })
+        self._generation = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def _check_generation(self):
+        """Очистить L1, если в L2 сменилось поколение."""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        generation = self.l2.get(GENERATION_KEY, 0)
+        with self._lock:
+            self._checked = now
+            if generation != self._generation:
+                self.l1.clear()
+                self._generation = generation
+
+    def _bump_generation(self):
+        """Сообщить всем процессам, что их L1 устарел."""
+        try:
+            generation = self.l2.incr(GENERATION_KEY)
+        except ValueError:
+            # Поколение могло быть вытеснено из L2: начинаем с метки
+            # времени, чтобы номер не совпал с прежним.
+            self.l2.add(GENERATION_KEY, time.time_ns(), timeout=None)
+            generation = self.l2.incr(GENERATION_KEY)
+        with self._lock:
+            self.l1.clear()
+            self._generation = generation
+            self._checked = time.monotonic()
+
+    def get(self, key, default=None, version=None):
+        self._check_generation()
+        value = self.l1.get(key, _missing, version=version)
+        count('l1', value is not _missing)
+        if value is not _missing:
+            return value
+        value = self.l2.get(key, _missing, version=version)
+        count('l2', value is not _missing)
+        if value is _missing:
+            return default
+        self.l1.set(key, value, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._check_generation()
+        found = self.l1.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        count('l1', True, len(found))
+        count('l1', False, len(missing))
+        if missing:
+            fetched = self.l2.get_many(missing, version=version)
+            count('l2', True, len(fetched))
+            count('l2', False, len(missing) - len(fetched))
+            self.l1.set_many(fetched, version=version)
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        self._check_generation()
+        return (self.l1.has_key(key, version=version)
+                or self.l2.has_key(key, version=version))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            **kwargs):
+        self.l2.set(key, value, timeout, version=version, **kwargs)
+        self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None,
+                 **kwargs):
+        failed = self.l2.set_many(data, timeout, version=version, **kwargs)
+        self.l1.set_many(data, self._l1_timeout(timeout), version=version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            **kwargs):
+        added = self.l2.add(key, value, timeout, version=version, **kwargs)
+        if added:
+            self.l1.set(key, value, self._l1_timeout(timeout),
+                        version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        self._bump_generation()
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.l2.delete(key, version=version)
+        self._bump_generation()
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.l2.delete_many(keys, version=version)
+        self._bump_generation()
+
+    def invalidate_tags(self, *tags):
+        """Удалить записи с тегами в L2 и сбросить L1 всех процессов."""
+        deleted = self.l2.invalidate_tags(*tags)
+        self._bump_generation()
+        return deleted
+
+    def clear(self):
+        self.l2.clear()
+        self._bump_generation()
@@ -0,0 +1 @@
+"""Пакет для работы с SQLite в рабочем режиме."""
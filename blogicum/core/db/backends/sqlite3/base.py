@@ -0,0 +1,59 @@
+"""Бэкенд SQLite с настройками для одновременной работы процессов.
+
+Подключается через ``ENGINE = 'core.db.backends.sqlite3'``. Для каждого
+нового соединения выполняются PRAGMA из ``OPTIONS['pragmas']`` поверх
+``DEFAULT_PRAGMAS``: журнал WAL не блокирует читателей во время записи,
+а ``busy_timeout`` заставляет писателя ждать блокировку, а не сразу
+падать с ошибкой «database is locked». Транзакции ``atomic`` начинаются
+с ``BEGIN IMMEDIATE`` (``OPTIONS['transaction_mode']``): блокировка на
+запись берётся сразу, и транзакция не упирается в неустранимую ошибку
+при повышении блокировки чтения до записи.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    @property
+    def pragmas(self):
+        return {
+            **DEFAULT_PRAGMAS,
+            **self.settings_dict['OPTIONS'].get('pragmas', {}),
+        }
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get(
+            'transaction_mode', 'IMMEDIATE'
+        ).upper()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f'Неизвестный режим транзакций SQLite: {mode}.'
+            )
+        return mode
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if value is not None:
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,21 @@
+"""Копирование строк между БД без изменения значений.
+
+``bulk_create`` заполняет поля с ``auto_now_add`` текущим временем, и
+перенесённая строка получила бы новую дату создания. ``copy_rows``
+вставляет строки как есть, как ``loaddata``, и не посылает сигналов.
+"""
+from django.db import connections
+
+
+def copy_rows(model, rows, using):
+    """Вставить строки модели в БД using порциями."""
+    fields = model._meta.concrete_fields
+    manager = model._base_manager.using(using)
+    batch_size = max(
+        connections[using].ops.bulk_batch_size(fields, rows), 1
+    )
+    for start in range(0, len(rows), batch_size):
+        manager._insert(
+            rows[start:start + batch_size], fields=fields, raw=True,
+            using=using,
+        )
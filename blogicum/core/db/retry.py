@@ -0,0 +1,43 @@
+"""Повтор транзакций, которым помешала блокировка SQLite.
+
+Даже с ``busy_timeout`` запись может не дождаться блокировки под
+сильной нагрузкой. Транзакция в ``atomic_with_retry`` тогда целиком
+откатывается и повторяется после паузы, которая растёт
+экспоненциально со случайным разбросом.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+
+from core.metrics import registry
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+
+def is_locked_error(error):
+    return isinstance(error, OperationalError) and any(
+        message in str(error) for message in LOCKED_MESSAGES
+    )
+
+
+def atomic_with_retry(func, *args, using=None, **kwargs):
+    """Выполнить func в транзакции, повторяя её при блокировке БД.
+
+    Внутри внешней транзакции повтор невозможен, ошибка пробрасывается.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    attempts = getattr(settings, 'SQLITE_LOCK_RETRIES', 5)
+    delay = getattr(settings, 'SQLITE_LOCK_RETRY_DELAY', 0.05)
+    for attempt in range(attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if (not is_locked_error(error) or attempt == attempts
+                    or connections[using].in_atomic_block):
+                raise
+        registry.inc('blogicum_db_lock_retries_total', {'database': using})
+        time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
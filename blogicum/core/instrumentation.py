@@ -0,0 +1,183 @@
+"""Модуль для сбора показателей обработки запроса.
+
+Показатели копятся в объекте ``RequestStats``, который активен на время
+обработки запроса. Замеры делаются через ``measure``: запросы к БД,
+рендеринг шаблонов и другие слои оборачиваются в него один раз,
+а промежуточные слои подписываются на замеры через ``stats.listeners``.
+"""
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import CacheHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.template.library import InclusionNode, SimpleNode
+
+_current_stats = ContextVar('request_stats', default=None)
+_original_template_render = Template.render
+_original_node_renders = {
+    SimpleNode: SimpleNode.render,
+    InclusionNode: InclusionNode.render,
+}
+_original_create_cache = CacheHandler.create_connection
+_installed = False
+_nodes_installed = False
+_cache_installed = False
+
+
+class RequestStats:
+    """Показатели обработки одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.listeners = []
+        self._depth = defaultdict(int)
+
+    @property
+    def elapsed(self):
+        """Время с начала обработки запроса в секундах."""
+        return time.perf_counter() - self.started
+
+
+def current_stats():
+    """Получить показатели текущего запроса."""
+    return _current_stats.get()
+
+
+@contextmanager
+def collect_stats():
+    """Собрать показатели; вложенные вызовы используют общий объект."""
+    stats = _current_stats.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def measure(kind, name, **attrs):
+    """Замерить операцию слоя kind и оповестить подписчиков."""
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    with ExitStack() as stack:
+        for listener in tuple(stats.listeners):
+            stack.enter_context(listener(kind, name, attrs))
+        # Вложенные операции одного слоя (например, include внутри
+        # шаблона) учитываются в общем времени слоя только один раз.
+        stats._depth[kind] += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats._depth[kind] -= 1
+            stats.counts[kind] += 1
+            if not stats._depth[kind]:
+                stats.durations[kind] += time.perf_counter() - started
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    """Замерить выполнение SQL-запроса."""
+    if _current_stats.get() is None:
+        return execute(sql, params, many, context)
+    with measure('db', sql, params=params, many=many,
+                 alias=context['connection'].alias):
+        return execute(sql, params, many, context)
+
+
+def _template_render(self, context):
+    """Замерить рендеринг шаблона."""
+    if _current_stats.get() is None:
+        return _original_template_render(self, context)
+    with measure('template', self.name or '<string>'):
+        return _original_template_render(self, context)
+
+
+def _make_node_render(original_render):
+    def render(self, context):
+        """Замерить рендеринг тега шаблона."""
+        if _current_stats.get() is None:
+            return original_render(self, context)
+        with measure('node', f'{{% {self.func.__name__} %}}'):
+            return original_render(self, context)
+    return render
+
+
+class InstrumentedCache:
+    """Обёртка над бэкендом кэша с замером обращений."""
+
+    MEASURED_METHODS = frozenset((
+        'add', 'get', 'set', 'touch', 'delete', 'get_many', 'get_or_set',
+        'has_key', 'incr', 'decr', 'set_many', 'delete_many', 'clear',
+        'invalidate_tags',
+    ))
+
+    def __init__(self, cache, alias):
+        self._cache = cache
+        self._alias = alias
+
+    def __getattr__(self, name):
+        attr = getattr(self._cache, name)
+        if name not in self.MEASURED_METHODS:
+            return attr
+
+        def method(*args, **kwargs):
+            if _current_stats.get() is None:
+                return attr(*args, **kwargs)
+            with measure('cache', f'{self._alias}.{name}'):
+                return attr(*args, **kwargs)
+        return method
+
+    def __contains__(self, key):
+        return self.has_key(key)
+
+
+def _create_cache(self, alias):
+    return InstrumentedCache(_original_create_cache(self, alias), alias)
+
+
+def _add_execute_wrapper(connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def install():
+    """Подключить замеры к БД и шаблонам; повторный вызов ничего не делает."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template.render = _template_render
+    connection_created.connect(_add_execute_wrapper)
+    for connection in connections.all():
+        _add_execute_wrapper(connection)
+
+
+def install_template_nodes():
+    """Подключить замеры к тегам simple_tag и inclusion_tag."""
+    global _nodes_installed
+    if _nodes_installed:
+        return
+    _nodes_installed = True
+    for node_class, original_render in _original_node_renders.items():
+        node_class.render = _make_node_render(original_render)
+
+
+def install_cache():
+    """Подключить замеры к обращениям к кэшам."""
+    global _cache_installed
+    if _cache_installed:
+        return
+    _cache_installed = True
+    CacheHandler.create_connection = _create_cache
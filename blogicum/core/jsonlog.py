@@ -0,0 +1,25 @@
+"""Модуль для журналов из JSON-объектов, по одному на строку."""
+import json
+import threading
+
+_write_lock = threading.Lock()
+
+
+def append_json_line(path, entry):
+    """Дописать запись в конец журнала."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(entry, ensure_ascii=False) + '\n'
+    with _write_lock, open(path, 'a', encoding='utf-8') as log_file:
+        log_file.write(line)
+
+
+def read_json_lines(path):
+    """Прочитать записи журнала, пропуская повреждённые строки."""
+    if not path.exists():
+        return
+    with open(path, encoding='utf-8') as log_file:
+        for line in log_file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
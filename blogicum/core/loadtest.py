@@ -0,0 +1,175 @@
+"""Модуль с общими частями нагрузочного тестирования.
+
+Здесь HTTP-сессия виртуального пользователя и сбор задержек по
+маршрутам; ими пользуются команды ``loadtest`` и ``replay_log``.
+"""
+import http.cookiejar
+import math
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.contrib.auth import get_user_model
+
+LOADTEST_USERNAME = 'loadtest_user_{}'
+LOADTEST_PASSWORD = 'loadtest-password-1'
+REQUEST_TIMEOUT = 30
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Не переходить по перенаправлениям: замеряем сам адрес."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Сессия виртуального пользователя с собственными cookie."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect,
+        )
+
+    def get_cookie(self, name):
+        for cookie in self.cookies:
+            if cookie.name == name:
+                return cookie.value
+        return None
+
+    def request(self, method, path, data=None):
+        """Выполнить запрос; вернуть статус ответа и время в секундах."""
+        body = None
+        headers = {'Referer': self.base_url + '/'}
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.get_cookie(
+                'csrftoken') or '')
+            body = urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(
+            self.base_url + path, data=body, method=method, headers=headers,
+        )
+        started = time.perf_counter()
+        try:
+            with self.opener.open(
+                request, timeout=REQUEST_TIMEOUT
+            ) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            status = error.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        return status, time.perf_counter() - started
+
+    def login(self, username, password):
+        """Войти на сайт через форму входа."""
+        self.request('GET', '/auth/login/')
+        status, _ = self.request('POST', '/auth/login/', {
+            'username': username, 'password': password,
+        })
+        return status == 302
+
+
+def ensure_users(count, password=LOADTEST_PASSWORD):
+    """Создать недостающих пользователей для нагрузки; вернуть их имена."""
+    User = get_user_model()
+    usernames = [LOADTEST_USERNAME.format(number) for number in range(count)]
+    existing = set(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', flat=True)
+    )
+    for username in usernames:
+        if username not in existing:
+            user = User(username=username)
+            user.set_password(password)
+            user.save()
+    return usernames
+
+
+def percentile(values, share):
+    """Перцентиль по методу ближайшего ранга для отсортированных значений."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(share * len(values)) - 1, 0)
+    return values[rank]
+
+
+def is_error(status, expected=None):
+    """Ошибка ли ответ: статус не из expected, а без него — не 2xx и 3xx.
+
+    Ответы 403 (CSRF) и 404 тоже ошибки: иначе прогон, где не прошёл ни
+    один комментарий, показал бы 0% ошибок.
+    """
+    if expected is not None:
+        return status not in expected
+    return not 200 <= status < 400
+
+
+class LatencyStats:
+    """Задержки и ошибки по маршрутам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, route, status, elapsed, expected=None):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(elapsed)
+            if is_error(status, expected):
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        """Сводка по маршрутам и в целом; время в миллисекундах."""
+        wall = (self.finished or time.perf_counter()) - self.started
+        rows = {}
+        all_latencies = []
+        for route, latencies in self.latencies.items():
+            all_latencies.extend(latencies)
+            rows[route] = self._row(latencies, self.errors.get(route, 0),
+                                    wall)
+        rows['TOTAL'] = self._row(all_latencies, sum(self.errors.values()),
+                                  wall)
+        return rows
+
+    @staticmethod
+    def _row(latencies, errors, wall):
+        latencies = sorted(latencies)
+        count = len(latencies)
+        return {
+            'requests': count,
+            'errors': errors,
+            'error_rate': errors / count if count else 0.0,
+            'rps': count / wall if wall else 0.0,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p90_ms': percentile(latencies, 0.9) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': (latencies[-1] * 1000) if latencies else 0.0,
+        }
+
+
+def format_summary(summary):
+    """Таблица сводки для вывода в консоль."""
+    lines = [
+        f'{"маршрут":<28} {"запросов":>8} {"rps":>8} {"p50":>8}'
+        f' {"p90":>8} {"p99":>8} {"max":>8} {"ошибки":>7}'
+    ]
+    for route, row in sorted(summary.items(),
+                             key=lambda item: item[0] == 'TOTAL'):
+        lines.append(
+            f'{route:<28} {row["requests"]:>8} {row["rps"]:>8.1f}'
+            f' {row["p50_ms"]:>8.1f} {row["p90_ms"]:>8.1f}'
+            f' {row["p99_ms"]:>8.1f} {row["max_ms"]:>8.1f}'
+            f' {row["error_rate"]:>6.1%}'
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,147 @@
+"""Модуль для режима обслуживания «только чтение».
+
+Режим включается файлом-флагом ``MAINTENANCE_FLAG_FILE`` (команда
+``python manage.py maintenance on``) и выключается его удалением, без
+перезапуска процессов: каждый процесс проверяет файл не чаще раза
+в ``MAINTENANCE_CHECK_INTERVAL`` секунд.
+
+В режиме обслуживания ``MaintenanceMiddleware``:
+
+* отвечает 503 с ``Retry-After`` на запросы с изменяющими методами и на
+  страницы создания, правки, удаления, комментирования и регистрации
+  (``MAINTENANCE_BLOCKED_VIEWS``), не обращаясь к БД;
+* остальные запросы выполняет на соединениях с ``PRAGMA query_only``,
+  так что случайная запись не пройдёт; страницы из кэша
+  (``core.page_cache``, ``core.stale``) отдаются как обычно.
+"""
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+DEFAULT_MESSAGE = 'Сайт на обслуживании, изменения временно недоступны.'
+
+_checked = 0.0
+_message = None
+_lock = threading.Lock()
+
+
+def get_flag_file():
+    return getattr(settings, 'MAINTENANCE_FLAG_FILE',
+                   settings.BASE_DIR / 'maintenance.flag')
+
+
+def enable(message=''):
+    """Включить режим обслуживания во всех процессах."""
+    path = get_flag_file()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as flag_file:
+        flag_file.write(message)
+    os.replace(tmp_path, path)
+    reset()
+
+
+def disable():
+    """Выключить режим обслуживания во всех процессах."""
+    try:
+        os.remove(get_flag_file())
+    except FileNotFoundError:
+        pass
+    reset()
+
+
+def reset():
+    """Перечитать флаг при следующей проверке."""
+    global _checked
+    _checked = 0.0
+
+
+def get_message():
+    """Сообщение режима обслуживания или None, если он выключен."""
+    global _checked, _message
+    interval = getattr(settings, 'MAINTENANCE_CHECK_INTERVAL', 1)
+    now = time.monotonic()
+    with _lock:
+        if now - _checked >= interval or not _checked:
+            try:
+                with open(get_flag_file(), encoding='utf-8') as flag_file:
+                    _message = flag_file.read().strip() or DEFAULT_MESSAGE
+            except FileNotFoundError:
+                _message = None
+            _checked = now
+        return _message
+
+
+def is_active():
+    return get_message() is not None
+
+
+def get_url_name(request):
+    """Имя URL запроса до того, как его обработают другие middleware."""
+    try:
+        return resolve(request.path_info).view_name
+    except Resolver404:
+        return None
+
+
+class ReadOnly:
+    """Обёртка запросов, включающая SQLite ``PRAGMA query_only``."""
+
+    def __init__(self):
+        self.prepared = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        raw = connection.connection
+        if connection.vendor == 'sqlite' and raw not in self.prepared:
+            # Реплики и так только для чтения: запоминаем прежнее значение.
+            self.prepared[raw], = raw.execute(
+                'PRAGMA query_only'
+            ).fetchone()
+            raw.execute('PRAGMA query_only = ON')
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        for raw, query_only in self.prepared.items():
+            raw.execute(f'PRAGMA query_only = {query_only}')
+        self.prepared.clear()
+
+
+class MaintenanceMiddleware:
+    """Блокирует запись, пока включён режим обслуживания."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.blocked_views = set(
+            getattr(settings, 'MAINTENANCE_BLOCKED_VIEWS', ())
+        )
+        self.retry_after = getattr(settings, 'MAINTENANCE_RETRY_AFTER', 60)
+
+    def __call__(self, request):
+        message = get_message()
+        if message is None:
+            return self.get_response(request)
+        if (request.method not in SAFE_METHODS
+                or get_url_name(request) in self.blocked_views):
+            return self.maintenance_response(message)
+        read_only = ReadOnly()
+        with ExitStack() as stack:
+            stack.callback(read_only.reset)
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(read_only)
+                )
+            return self.get_response(request)
+
+    def maintenance_response(self, message):
+        response = HttpResponse(
+            message, status=503, content_type='text/plain; charset=utf-8'
+        )
+        response['Retry-After'] = self.retry_after
+        return response
@@ -0,0 +1,129 @@
+"""Команда для сравнения бэкендов кэша."""
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from core.loadtest import percentile
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'core.cache.backends.sqlite.SQLiteCache',
+}
+
+
+def run_backend(name, workers, operations, keys, value_size, read_ratio):
+    """Нагрузить новый кэш name чтением и записью; вернуть сводку."""
+    directory = tempfile.TemporaryDirectory(prefix='cache_benchmark_')
+    location = str(Path(directory.name) / 'cache')
+    if name == 'sqlite':
+        location += '.sqlite3'
+    cache = import_string(BACKENDS[name])(
+        location, {'OPTIONS': {'MAX_ENTRIES': keys * 2}},
+    )
+    value = 'x' * value_size
+    results = {'get': [], 'set': [], 'hits': 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        generator = random.Random(seed)
+        latencies = {'get': [], 'set': []}
+        hits = 0
+        for _ in range(operations):
+            key = f'key{generator.randrange(keys)}'
+            started = time.perf_counter()
+            if generator.random() < read_ratio:
+                hits += cache.get(key) is not None
+                kind = 'get'
+            else:
+                cache.set(key, value)
+                kind = 'set'
+            latencies[kind].append(time.perf_counter() - started)
+        with lock:
+            for kind, values in latencies.items():
+                results[kind].extend(values)
+            results['hits'] += hits
+
+    try:
+        cache.set_many({f'key{number}': value for number in range(keys)})
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker, args=(seed,))
+            for seed in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        cache.close()
+        directory.cleanup()
+    summary = {
+        'backend': name,
+        'per_second': workers * operations / elapsed,
+        'hit_ratio': results['hits'] / max(len(results['get']), 1),
+    }
+    for kind in ('get', 'set'):
+        latencies = sorted(results[kind])
+        summary[f'{kind}_p50_us'] = percentile(latencies, 0.5) * 1e6
+        summary[f'{kind}_p99_us'] = percentile(latencies, 0.99) * 1e6
+    return summary
+
+
+class Command(BaseCommand):
+    help = ('Сравнить кэш core.cache.backends.sqlite с бэкендами locmem '
+            'и filebased.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Число потоков.')
+        parser.add_argument('--operations', type=int, default=5000,
+                            help='Операций на поток.')
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--value-size', type=int, default=4096,
+                            help='Размер значения в байтах.')
+        parser.add_argument('--read-ratio', type=float, default=0.9,
+                            help='Доля чтений среди операций.')
+        parser.add_argument('--backends', default=','.join(BACKENDS),
+                            help='Бэкенды через запятую: '
+                                 + ', '.join(BACKENDS))
+        parser.add_argument('--json', type=Path,
+                            help='Сохранить сводку в JSON-файл.')
+
+    def handle(self, *args, **options):
+        backends = [name.strip() for name in options['backends'].split(',')]
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные бэкенды: {", ".join(sorted(unknown))}.'
+            )
+        rows = [
+            run_backend(name, options['workers'], options['operations'],
+                        options['keys'], options['value_size'],
+                        options['read_ratio'])
+            for name in backends
+        ]
+        self.stdout.write(
+            f'{"бэкенд":<10} {"опер./с":>10} {"get p50":>9}'
+            f' {"get p99":>9} {"set p50":>9} {"set p99":>9}'
+            f' {"попадания":>10}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["backend"]:<10} {row["per_second"]:>10.0f}'
+                f' {row["get_p50_us"]:>9.1f} {row["get_p99_us"]:>9.1f}'
+                f' {row["set_p50_us"]:>9.1f} {row["set_p99_us"]:>9.1f}'
+                f' {row["hit_ratio"]:>10.2f}'
+            )
+        self.stdout.write('Задержки в микросекундах.')
+        if options['json']:
+            options['json'].write_text(
+                json.dumps(rows, ensure_ascii=False, indent=2)
+            )
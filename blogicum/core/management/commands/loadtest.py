@@ -0,0 +1,198 @@
+"""Команда для нагрузочного тестирования запущенного сайта."""
+import json
+import math
+import random
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.cbv_mixins import COUNT_PAGINATE
+from blog.models import Category, Post
+from blog.pagination import filter_annotate
+from core.loadtest import (
+    LOADTEST_PASSWORD, HttpSession, LatencyStats, ensure_users,
+    format_summary,
+)
+
+DEFAULT_MIX = (
+    'index=30,index_deep=10,category=15,profile=15,detail=25,comment=5'
+)
+AUTH_SCENARIOS = {'comment'}
+# Ответы, которые считаются успешными; для остальных сценариев — 200.
+EXPECTED_STATUSES = {'comment': {302}}
+
+
+def parse_mix(value):
+    """Разобрать смесь сценариев вида 'index=30,detail=25'."""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        try:
+            mix[name.strip()] = float(weight)
+        except ValueError:
+            raise CommandError(f'Неверный вес сценария: {item}')
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise CommandError(
+            f'Неизвестные сценарии: {", ".join(sorted(unknown))}.'
+            f' Доступны: {", ".join(SCENARIOS)}.'
+        )
+    return mix
+
+
+def scenario_index(session, targets, rng):
+    return 'GET', '/', None
+
+
+def scenario_index_deep(session, targets, rng):
+    return 'GET', f'/?page={rng.randint(2, targets["pages"])}', None
+
+
+def scenario_category(session, targets, rng):
+    return 'GET', f'/category/{rng.choice(targets["categories"])}/', None
+
+
+def scenario_profile(session, targets, rng):
+    return 'GET', f'/profile/{rng.choice(targets["authors"])}/', None
+
+
+def scenario_detail(session, targets, rng):
+    return 'GET', f'/posts/{rng.choice(targets["posts"])}/', None
+
+
+def scenario_comment(session, targets, rng):
+    return (
+        'POST',
+        f'/posts/{rng.choice(targets["posts"])}/comment/',
+        {'text': f'Нагрузочный комментарий {rng.random()}'},
+    )
+
+
+SCENARIOS = {
+    'index': scenario_index,
+    'index_deep': scenario_index_deep,
+    'category': scenario_category,
+    'profile': scenario_profile,
+    'detail': scenario_detail,
+    'comment': scenario_comment,
+}
+
+
+def collect_targets():
+    """Адреса для нагрузки из опубликованных данных."""
+    posts = filter_annotate(Post.objects, filter=True, annotate=False)
+    post_ids = list(posts.values_list('id', flat=True)[:1000])
+    if not post_ids:
+        raise CommandError('Нет опубликованных постов для нагрузки.')
+    return {
+        'posts': post_ids,
+        'pages': math.ceil(len(post_ids) / COUNT_PAGINATE),
+        'categories': list(
+            Category.objects.filter(is_published=True)
+            .values_list('slug', flat=True)
+        ),
+        'authors': list(
+            posts.values_list('author__username', flat=True).distinct()
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Нагрузить запущенный сайт смесью запросов из нескольких '
+            'потоков и вывести пропускную способность и задержки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='Число параллельных виртуальных'
+                                 ' пользователей.')
+        parser.add_argument('--duration', type=float, default=30,
+                            help='Длительность нагрузки в секундах.')
+        parser.add_argument('--requests', type=int,
+                            help='Остановиться после этого числа запросов.')
+        parser.add_argument('--users', type=int, default=20,
+                            help='Сколько пользователей сгенерировать.')
+        parser.add_argument('--auth-share', type=float, default=0.3,
+                            help='Доля авторизованных виртуальных'
+                                 ' пользователей.')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Веса сценариев: ' + DEFAULT_MIX)
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--json', type=Path,
+                            help='Сохранить сводку в JSON-файл.')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        targets = collect_targets()
+        if not targets['categories']:
+            mix.pop('category', None)
+        if targets['pages'] < 2:
+            # Второй страницы ленты нет: запросы к ней дали бы 404.
+            mix.pop('index_deep', None)
+        usernames = ensure_users(options['users'])
+        seed = options['seed']
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        stats = LatencyStats()
+        deadline = time.monotonic() + options['duration']
+        budget = {'left': options['requests']}
+        budget_lock = threading.Lock()
+
+        def take_request():
+            if time.monotonic() >= deadline:
+                return False
+            if budget['left'] is None:
+                return True
+            with budget_lock:
+                if budget['left'] <= 0:
+                    return False
+                budget['left'] -= 1
+                return True
+
+        def worker(number):
+            rng = random.Random(seed + number)
+            session = HttpSession(options['url'])
+            is_authenticated = (
+                number < round(options['concurrency'] * options['auth_share'])
+                and session.login(usernames[number % len(usernames)],
+                                  LOADTEST_PASSWORD)
+            )
+            scenarios = [
+                name for name in mix
+                if is_authenticated or name not in AUTH_SCENARIOS
+            ]
+            weights = [mix[name] for name in scenarios]
+            while scenarios and take_request():
+                name = rng.choices(scenarios, weights)[0]
+                method, path, data = SCENARIOS[name](session, targets, rng)
+                status, elapsed = session.request(method, path, data)
+                stats.record(name, status, elapsed,
+                             EXPECTED_STATUSES.get(name, {200}))
+
+        threads = [
+            threading.Thread(target=worker, args=(number,), daemon=True)
+            for number in range(options['concurrency'])
+        ]
+        self.stdout.write(
+            f'Нагрузка {options["url"]}: потоков {len(threads)},'
+            f' seed {seed}.'
+        )
+        stats.started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats.stop()
+
+        summary = stats.summary()
+        self.stdout.write(format_summary(summary))
+        if options['json']:
+            options['json'].write_text(json.dumps({
+                'url': options['url'],
+                'concurrency': options['concurrency'],
+                'mix': mix,
+                'seed': seed,
+                'summary': summary,
+            }, ensure_ascii=False, indent=2))
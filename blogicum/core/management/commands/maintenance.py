@@ -0,0 +1,25 @@
+"""Команда для включения и выключения режима обслуживания."""
+from django.core.management.base import BaseCommand
+
+from core import maintenance
+
+
+class Command(BaseCommand):
+    help = ('Включить или выключить режим обслуживания «только чтение» '
+            'без перезапуска процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('on', 'off', 'status'))
+        parser.add_argument('--message', default='',
+                            help='Текст ответа на заблокированные запросы.')
+
+    def handle(self, *args, **options):
+        if options['action'] == 'on':
+            maintenance.enable(options['message'])
+        elif options['action'] == 'off':
+            maintenance.disable()
+        message = maintenance.get_message()
+        if message is None:
+            self.stdout.write('Режим обслуживания выключен.')
+        else:
+            self.stdout.write(f'Режим обслуживания включён: {message}')
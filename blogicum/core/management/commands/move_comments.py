@@ -0,0 +1,97 @@
+"""Команда для переноса комментариев в отдельную БД."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+
+from blog.models import Comment, Post
+from core.db.copy import copy_rows
+from core.routers import get_comments_db
+
+CHUNK_SIZE = 1000
+
+
+def is_same_comment(first, second):
+    """Тот же ли это комментарий, перенесённый прерванным запуском."""
+    fields = ('post_id', 'author_id', 'created_at', 'text')
+    return all(
+        getattr(first, field) == getattr(second, field) for field in fields
+    )
+
+
+def move_comments(target, chunk_size=CHUNK_SIZE):
+    """Перенести комментарии из основной БД в target порциями.
+
+    Каждая порция копируется и удаляется из основной БД отдельно, так что
+    прерванный перенос можно просто запустить снова. Комментарии, которые
+    уже пишутся в target, нумеруются там заново и могут занять номера ещё
+    не перенесённых; такие комментарии переносятся под номерами больше
+    всех существующих в обеих БД.
+    """
+    source = Comment.objects.using(DEFAULT_DB_ALIAS).order_by('pk')
+    last_source_pk = source.aggregate(last=Max('pk'))['last'] or 0
+    moved = 0
+    while True:
+        comments = list(source[:chunk_size])
+        if not comments:
+            return moved
+        pks = [comment.pk for comment in comments]
+        with transaction.atomic(using=target):
+            taken = Comment.objects.using(target).in_bulk(pks)
+            next_pk = max(
+                last_source_pk,
+                Comment.objects.using(target).aggregate(
+                    last=Max('pk')
+                )['last'] or 0,
+            ) + 1
+            new = []
+            for comment in comments:
+                existing = taken.get(comment.pk)
+                if existing is not None:
+                    if is_same_comment(existing, comment):
+                        continue
+                    comment.pk = next_pk
+                    next_pk += 1
+                new.append(comment)
+            copy_rows(Comment, new, target)
+        source.filter(pk__in=pks)._raw_delete(DEFAULT_DB_ALIAS)
+        moved += len(comments)
+
+
+def prune_orphans(target, chunk_size=CHUNK_SIZE):
+    """Удалить из target комментарии к удалённым постам."""
+    post_ids = list(
+        Comment.objects.using(target).order_by()
+        .values_list('post_id', flat=True).distinct()
+    )
+    orphans = set(post_ids)
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[start:start + chunk_size]
+        orphans -= set(
+            Post.objects.using(DEFAULT_DB_ALIAS)
+            .filter(pk__in=chunk).values_list('pk', flat=True)
+        )
+    deleted, _ = Comment.objects.using(target).filter(
+        post_id__in=orphans
+    ).delete()
+    return deleted
+
+
+class Command(BaseCommand):
+    help = 'Перенести комментарии в БД COMMENTS_DATABASE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--prune-orphans', action='store_true',
+                            help='Удалить комментарии к удалённым постам.')
+
+    def handle(self, *args, **options):
+        target = get_comments_db()
+        if not target:
+            raise CommandError(
+                'Отдельная БД комментариев не задана: COMMENTS_DATABASE.'
+            )
+        moved = move_comments(target, options['chunk_size'])
+        self.stdout.write(f'Перенесено комментариев: {moved}.')
+        if options['prune_orphans']:
+            deleted = prune_orphans(target, options['chunk_size'])
+            self.stdout.write(f'Удалено осиротевших: {deleted}.')
@@ -0,0 +1,22 @@
+"""Команда для выдачи токена профилирования запросов."""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import TOKEN_HEADER, make_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выдать сотруднику значение заголовка для профилирования запроса.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'],
+                                    is_staff=True)
+        except User.DoesNotExist:
+            raise CommandError('Сотрудник с таким именем не найден.')
+        self.stdout.write(f'{TOKEN_HEADER}: {make_token(user)}')
@@ -0,0 +1,233 @@
+"""Команда для воспроизведения нагрузки из журнала доступа."""
+import csv
+import json
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from core.loadtest import (
+    LOADTEST_PASSWORD, HttpSession, LatencyStats, ensure_users,
+    format_summary,
+)
+
+ANONYMOUS = {'', '-', 'anonymous', 'anon'}
+COMBINED_LOG_RE = re.compile(
+    r'^\S+ \S+ (?P<user>\S+) \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<url>\S+)[^"]*"(?: (?P<status>\d{3}))?'
+)
+COMBINED_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+COMPARED_COLUMNS = ('p50_ms', 'p90_ms', 'p99_ms')
+REPLAYED_POST_ROUTES = {'blog:add_comment'}
+
+
+def parse_timestamp(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_status(value):
+    return int(value) if value else None
+
+
+def read_log(path):
+    """Прочитать журнал доступа: CSV или формат common/combined.
+
+    В CSV ожидаются колонки timestamp, method, url и user; user — класс
+    или идентификатор пользователя, пустое значение — аноним. Статус
+    ответа из журнала (колонка status в CSV) при воспроизведении
+    считается ожидаемым; без него ошибка — любой ответ не 2xx и 3xx.
+    """
+    with open(path, encoding='utf-8') as log_file:
+        first_line = log_file.readline()
+        log_file.seek(0)
+        if COMBINED_LOG_RE.match(first_line):
+            for line in log_file:
+                match = COMBINED_LOG_RE.match(line)
+                if match is None:
+                    continue
+                yield (
+                    datetime.strptime(match['time'], COMBINED_TIME_FORMAT)
+                    .timestamp(),
+                    match['method'],
+                    match['url'],
+                    match['user'],
+                    parse_status(match['status']),
+                )
+            return
+        for row in csv.DictReader(log_file):
+            yield (
+                parse_timestamp(row['timestamp']),
+                row.get('method') or 'GET',
+                row['url'],
+                row.get('user', ''),
+                parse_status(row.get('status')),
+            )
+
+
+def get_route(url):
+    try:
+        return resolve(urlsplit(url).path).view_name
+    except Resolver404:
+        return '<unresolved>'
+
+
+def compare(base, new):
+    """Сравнение задержек двух прогонов по маршрутам."""
+    rows = []
+    for route in sorted(set(base['summary']) | set(new['summary'])):
+        before = base['summary'].get(route)
+        after = new['summary'].get(route)
+        if before is None or after is None:
+            continue
+        row = {'route': route}
+        for column in COMPARED_COLUMNS:
+            row[column] = (before[column], after[column])
+        rows.append(row)
+    return rows
+
+
+class Command(BaseCommand):
+    help = ('Воспроизвести журнал доступа на локальном сайте и сравнить '
+            'задержки по маршрутам между сборками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', nargs='?', type=Path,
+                            help='Журнал доступа: CSV или combined.')
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Во сколько раз сжать время журнала.')
+        parser.add_argument('--max-rate', action='store_true',
+                            help='Не соблюдать интервалы между запросами.')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--users', type=int, default=50,
+                            help='Сколько пользователей сгенерировать для'
+                                 ' авторизованных сессий журнала.')
+        parser.add_argument('--label', default='',
+                            help='Метка сборки в результатах.')
+        parser.add_argument('--json', type=Path,
+                            help='Сохранить результаты в JSON-файл.')
+        parser.add_argument('--compare', nargs=2, type=Path,
+                            metavar=('BASE', 'NEW'),
+                            help='Сравнить два сохранённых прогона.')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.print_comparison(*options['compare'])
+            return
+        if options['log'] is None:
+            raise CommandError('Укажите журнал доступа или --compare.')
+        if options['speed'] <= 0:
+            raise CommandError('--speed должен быть больше нуля.')
+        if options['users'] < 1:
+            raise CommandError('--users должен быть больше нуля.')
+        entries = sorted(read_log(options['log']), key=lambda item: item[0])
+        if not entries:
+            raise CommandError('В журнале нет запросов.')
+
+        user_keys = sorted({
+            user for _, _, _, user, _ in entries if user not in ANONYMOUS
+        })
+        usernames = ensure_users(min(len(user_keys), options['users']))
+        user_map = {
+            key: usernames[number % len(usernames)]
+            for number, key in enumerate(user_keys)
+        }
+        sessions = {}
+        sessions_lock = threading.Lock()
+        stats = LatencyStats()
+        skipped = 0
+        tasks = queue.Queue(maxsize=options['concurrency'] * 4)
+
+        def get_session(user):
+            key = user_map.get(user)
+            with sessions_lock:
+                session = sessions.get(key)
+                if session is None:
+                    session = sessions[key] = HttpSession(options['url'])
+                    if key is not None:
+                        session.login(key, LOADTEST_PASSWORD)
+                return session
+
+        def worker():
+            while True:
+                task = tasks.get()
+                if task is None:
+                    return
+                method, url, user, route, expected = task
+                data = None
+                if method != 'GET':
+                    data = {'text': 'Комментарий из журнала доступа'}
+                status, elapsed = get_session(user).request(method, url, data)
+                stats.record(route, status, elapsed,
+                             None if expected is None else {expected})
+
+        threads = [
+            threading.Thread(target=worker, daemon=True)
+            for _ in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        first_timestamp = entries[0][0]
+        stats.started = started = time.perf_counter()
+        for timestamp, method, url, user, expected in entries:
+            route = get_route(url)
+            if method != 'GET' and route not in REPLAYED_POST_ROUTES:
+                # Тела запросов в журнале нет, подставить его умеем
+                # только для комментария.
+                skipped += 1
+                continue
+            if not options['max_rate']:
+                delay = ((timestamp - first_timestamp) / options['speed']
+                         - (time.perf_counter() - started))
+                if delay > 0:
+                    time.sleep(delay)
+            tasks.put((method, url, user, route, expected))
+        for _ in threads:
+            tasks.put(None)
+        for thread in threads:
+            thread.join()
+        stats.stop()
+
+        summary = stats.summary()
+        self.stdout.write(format_summary(summary))
+        if skipped:
+            self.stdout.write(
+                f'Пропущено изменяющих запросов без тела: {skipped}.'
+            )
+        if options['json']:
+            options['json'].write_text(json.dumps({
+                'label': options['label'],
+                'log': str(options['log']),
+                'speed': None if options['max_rate'] else options['speed'],
+                'summary': summary,
+            }, ensure_ascii=False, indent=2))
+
+    def print_comparison(self, base_path, new_path):
+        base = json.loads(base_path.read_text())
+        new = json.loads(new_path.read_text())
+        self.stdout.write(
+            f'{"маршрут":<28}'
+            + ''.join(f' {column:>22}' for column in COMPARED_COLUMNS)
+        )
+        self.stdout.write(
+            f'{"":<28}' + f' {base["label"] or "base":>10}'
+            f' {new["label"] or "new":>11}' * len(COMPARED_COLUMNS)
+        )
+        for row in compare(base, new):
+            cells = []
+            for column in COMPARED_COLUMNS:
+                before, after = row[column]
+                change = (after - before) / before * 100 if before else 0.0
+                cells.append(
+                    f' {before:>7.1f} → {after:>7.1f} {change:>+4.0f}%'
+                )
+            self.stdout.write(f'{row["route"]:<28}' + ''.join(cells))
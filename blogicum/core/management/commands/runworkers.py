@@ -0,0 +1,160 @@
+"""Команда для запуска сайта в нескольких процессах с общим прогревом.
+
+Главный процесс прогревает Django (``core.warmup``), замораживает
+созданные объекты ``gc.freeze()`` и только затем создаёт рабочие
+процессы через fork. Замороженные объекты сборщик мусора больше не
+обходит и не трогает их заголовки, поэтому страницы памяти с ними
+остаются общими для всех процессов (copy-on-write). Потоки fork не
+переживают: зеркало (``core.mirror``) и метрики (``core.metrics``)
+перезапускаются в рабочих процессах своими обработчиками
+``os.register_at_fork``.
+
+Рабочий процесс завершается после ``--max-requests`` запросов или когда
+его RSS превышает ``--max-rss`` МБ, и главный процесс создаёт вместо
+него новый. Раз в ``--memory-report`` секунд печатается RSS, PSS и
+общая с другими процессами память каждого рабочего процесса.
+"""
+import gc
+import os
+import signal
+import time
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from core.warmup import warm_up
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty')
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def read_memory(pid):
+    """Память процесса в КБ из /proc/<pid>/smaps_rollup."""
+    memory = dict.fromkeys(SMAPS_FIELDS, 0)
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as smaps:
+            for line in smaps:
+                name, _, value = line.partition(':')
+                if name in memory:
+                    memory[name] = int(value.split()[0])
+    except OSError:
+        return None
+    return memory
+
+
+def serve(server, max_requests, max_rss):
+    """Цикл рабочего процесса: обрабатывать запросы до переработки."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    served = 0
+    while not max_requests or served < max_requests:
+        server.handle_request()
+        served += 1
+        if max_rss:
+            memory = read_memory(os.getpid())
+            if memory and memory['Rss'] > max_rss * 1024:
+                break
+
+
+class Command(BaseCommand):
+    help = ('Запустить сайт в нескольких процессах, созданных fork после '
+            'прогрева.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('addrport', nargs='?', default='127.0.0.1:8000')
+        parser.add_argument('--workers', type=int,
+                            default=os.cpu_count() or 2)
+        parser.add_argument('--max-requests', type=int, default=10000,
+                            help='Перезапускать процесс после стольких'
+                                 ' запросов; 0 — не перезапускать.')
+        parser.add_argument('--max-rss', type=int, default=0,
+                            help='Перезапускать процесс, если его RSS'
+                                 ' больше стольких МБ.')
+        parser.add_argument('--memory-report', type=float, default=0,
+                            help='Печатать память процессов раз в столько'
+                                 ' секунд.')
+        parser.add_argument('--no-freeze', action='store_true',
+                            help='Не вызывать gc.freeze() перед fork.')
+
+    def handle(self, *args, **options):
+        host, _, port = options['addrport'].rpartition(':')
+        if not port.isdigit():
+            raise CommandError(f'Неверный адрес: {options["addrport"]}.')
+        application = get_wsgi_application()
+        timings = warm_up(application)
+        self.stdout.write('Прогрев: ' + ', '.join(
+            f'{name} {seconds * 1000:.0f} мс'
+            for name, seconds in timings.items()
+        ))
+        server = make_server(host or '127.0.0.1', int(port), application,
+                             handler_class=QuietHandler)
+        if not options['no_freeze']:
+            # Мусор собираем до заморозки, чтобы не держать его вечно.
+            gc.collect()
+            gc.freeze()
+            self.stdout.write(
+                f'Заморожено объектов: {gc.get_freeze_count()}.'
+            )
+        self.stdout.write(
+            f'Слушаю http://{host or "127.0.0.1"}:{port}/,'
+            f' процессов: {options["workers"]}.'
+        )
+        workers = set()
+        stopping = False
+
+        def spawn():
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    serve(server, options['max_requests'],
+                          options['max_rss'])
+                finally:
+                    os._exit(0)
+            workers.add(pid)
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+            for pid in list(workers):
+                os.kill(pid, signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for _ in range(options['workers']):
+            spawn()
+        last_report = time.monotonic()
+        try:
+            while workers:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+                if pid:
+                    workers.discard(pid)
+                    if not stopping:
+                        spawn()
+                    continue
+                if (options['memory_report'] and time.monotonic()
+                        - last_report >= options['memory_report']):
+                    last_report = time.monotonic()
+                    self.report_memory(workers)
+                time.sleep(0.1)
+        finally:
+            server.server_close()
+
+    def report_memory(self, workers):
+        self.stdout.write(
+            f'{"pid":>8} {"RSS, МБ":>9} {"PSS, МБ":>9} {"общая, МБ":>10}'
+        )
+        for pid in sorted(workers):
+            memory = read_memory(pid)
+            if memory is None:
+                continue
+            shared = memory['Shared_Clean'] + memory['Shared_Dirty']
+            self.stdout.write(
+                f'{pid:>8} {memory["Rss"] / 1024:>9.1f}'
+                f' {memory["Pss"] / 1024:>9.1f} {shared / 1024:>10.1f}'
+            )
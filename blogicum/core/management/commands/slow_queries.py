@@ -0,0 +1,63 @@
+"""Команда для просмотра сводки журнала медленных запросов."""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import read_entries
+
+SORT_KEYS = ('total', 'count', 'avg', 'max')
+
+
+class Command(BaseCommand):
+    help = 'Сводка медленных SQL-запросов по отпечаткам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', type=Path,
+                            help='Путь к журналу вместо SLOW_QUERY_LOG.')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--view', help='Только запросы представления.')
+        parser.add_argument('--plans', action='store_true',
+                            help='Показать последний план запроса.')
+
+    def handle(self, *args, **options):
+        aggregates = {}
+        for entry in read_entries(options['log']):
+            if options['view'] and entry['view'] != options['view']:
+                continue
+            aggregate = aggregates.setdefault(entry['fingerprint'], {
+                'sql': entry['sql'],
+                'count': 0,
+                'total': 0.0,
+                'max': 0.0,
+                'views': set(),
+                'plan': [],
+            })
+            aggregate['count'] += 1
+            aggregate['total'] += entry['duration_ms']
+            aggregate['max'] = max(aggregate['max'], entry['duration_ms'])
+            aggregate['views'].add(entry['view'])
+            aggregate['plan'] = entry['plan'] or aggregate['plan']
+        for aggregate in aggregates.values():
+            aggregate['avg'] = aggregate['total'] / aggregate['count']
+
+        if not aggregates:
+            self.stdout.write('Медленных запросов не найдено.')
+            return
+        rows = sorted(aggregates.items(),
+                      key=lambda item: item[1][options['sort']],
+                      reverse=True)[:options['limit']]
+        for fingerprint, aggregate in rows:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{fingerprint}  count={aggregate["count"]}'
+                f'  total={aggregate["total"]:.1f}ms'
+                f'  avg={aggregate["avg"]:.1f}ms'
+                f'  max={aggregate["max"]:.1f}ms'
+            ))
+            self.stdout.write(
+                f'  views: {", ".join(sorted(aggregate["views"]))}'
+            )
+            self.stdout.write(f'  {aggregate["sql"]}')
+            if options['plans']:
+                for line in aggregate['plan']:
+                    self.stdout.write(f'    {line}')
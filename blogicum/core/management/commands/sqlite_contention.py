@@ -0,0 +1,174 @@
+"""Команда для замера конкуренции за запись в SQLite."""
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from core.db.backends.sqlite3.base import DEFAULT_PRAGMAS
+from core.db.retry import atomic_with_retry, is_locked_error
+from core.loadtest import percentile
+from core.write_queue import WriteQueue
+
+BENCH_ALIAS = 'sqlite_contention'
+MODES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'OPTIONS': {},
+    },
+    'tuned': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'OPTIONS': {'pragmas': DEFAULT_PRAGMAS,
+                    'transaction_mode': 'IMMEDIATE'},
+    },
+}
+# Запись через очередь с групповой фиксацией на настроенном бэкенде.
+MODES['queued'] = MODES['tuned']
+SCHEMA = (
+    'CREATE TABLE bench_comment (id INTEGER PRIMARY KEY, post_id INTEGER,'
+    ' text TEXT, created_at REAL)',
+    'CREATE INDEX bench_comment_post ON bench_comment (post_id, created_at)',
+)
+
+
+def write_comment(number):
+    """Типичная запись: чтение перед вставкой в одной транзакции."""
+    with connections[BENCH_ALIAS].cursor() as cursor:
+        cursor.execute(
+            'SELECT COUNT(*) FROM bench_comment WHERE post_id = %s',
+            [number % 10],
+        )
+        cursor.execute(
+            'INSERT INTO bench_comment (post_id, text, created_at)'
+            ' VALUES (%s, %s, %s)',
+            [number % 10, 'Комментарий ' * 10, time.time()],
+        )
+
+
+def read_comments(number):
+    with connections[BENCH_ALIAS].cursor() as cursor:
+        cursor.execute(
+            'SELECT * FROM bench_comment WHERE post_id = %s'
+            ' ORDER BY created_at DESC LIMIT 10',
+            [number % 10],
+        )
+        cursor.fetchall()
+
+
+def run_mode(mode, writers, readers, duration):
+    """Нагрузить новую БД в режиме mode; вернуть сводку."""
+    directory = tempfile.TemporaryDirectory(prefix='sqlite_contention_')
+    connections.settings[BENCH_ALIAS] = {
+        **MODES[mode], 'NAME': str(Path(directory.name) / 'bench.sqlite3'),
+    }
+    results = {'write': [], 'read': [], 'errors': 0}
+    lock = threading.Lock()
+    write_queue = WriteQueue(using=BENCH_ALIAS)
+    deadline = time.monotonic() + duration
+
+    def worker(number, is_writer):
+        latencies = []
+        errors = 0
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if not is_writer:
+                        read_comments(number)
+                    elif mode == 'queued':
+                        write_queue.submit(write_comment, number)
+                    elif mode == 'tuned':
+                        atomic_with_retry(write_comment, number,
+                                          using=BENCH_ALIAS)
+                    else:
+                        with transaction.atomic(using=BENCH_ALIAS):
+                            write_comment(number)
+                except OperationalError as error:
+                    if not is_locked_error(error):
+                        raise
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connections[BENCH_ALIAS].close()
+        with lock:
+            results['write' if is_writer else 'read'].extend(latencies)
+            results['errors'] += errors
+
+    try:
+        with connections[BENCH_ALIAS].cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+        threads = [
+            threading.Thread(target=worker, args=(number, True))
+            for number in range(writers)
+        ] + [
+            threading.Thread(target=worker, args=(number, False))
+            for number in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        write_queue.stop()
+        connections[BENCH_ALIAS].close()
+        del connections[BENCH_ALIAS]
+        del connections.settings[BENCH_ALIAS]
+        directory.cleanup()
+    summary = {'mode': mode, 'errors': results['errors']}
+    for kind in ('write', 'read'):
+        latencies = sorted(results[kind])
+        summary[f'{kind}s'] = len(latencies)
+        summary[f'{kind}_per_second'] = len(latencies) / duration
+        summary[f'{kind}_p50_ms'] = percentile(latencies, 0.5) * 1000
+        summary[f'{kind}_p99_ms'] = percentile(latencies, 0.99) * 1000
+    return summary
+
+
+class Command(BaseCommand):
+    help = ('Сравнить конкурентную запись в SQLite с настройками по '
+            'умолчанию и с настройками core.db.backends.sqlite3.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Длительность каждого прогона в секундах.')
+        parser.add_argument('--modes', default=','.join(MODES),
+                            help='Режимы через запятую: '
+                                 + ', '.join(MODES))
+        parser.add_argument('--json', type=Path,
+                            help='Сохранить сводку в JSON-файл.')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',')]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные режимы: {", ".join(sorted(unknown))}.'
+            )
+        rows = [
+            run_mode(mode, options['writers'], options['readers'],
+                     options['duration'])
+            for mode in modes
+        ]
+        self.stdout.write(
+            f'{"режим":<10} {"записей/с":>10} {"p50":>8} {"p99":>8}'
+            f' {"чтений/с":>10} {"p50":>8} {"p99":>8} {"блокировки":>11}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["mode"]:<10} {row["write_per_second"]:>10.1f}'
+                f' {row["write_p50_ms"]:>8.1f} {row["write_p99_ms"]:>8.1f}'
+                f' {row["read_per_second"]:>10.1f}'
+                f' {row["read_p50_ms"]:>8.1f} {row["read_p99_ms"]:>8.1f}'
+                f' {row["errors"]:>11}'
+            )
+        if options['json']:
+            options['json'].write_text(
+                json.dumps(rows, ensure_ascii=False, indent=2)
+            )
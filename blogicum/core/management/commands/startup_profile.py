@@ -0,0 +1,121 @@
+"""Команда для замера времени запуска процесса по этапам и импортам.
+
+Запуск повторяется в отдельном процессе ``python -X importtime``: так
+видны все импорты, а не только те, что ещё не сделала сама команда.
+Время импортов складывается по пакетам верхнего уровня.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Этапы запуска рабочего процесса, как в blogicum/wsgi.py; время
+# каждого и статусы ответов прогрева печатаются в JSON. Запросы прогрева
+# выполняются, только если их включает WARMUP_ON_START.
+STARTUP_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+timings = {}
+warmup = {}
+
+def phase(name, func):
+    begin = time.perf_counter()
+    result = func()
+    timings[name] = time.perf_counter() - begin
+    return result
+
+import django
+phase('setup', django.setup)
+from django.core.wsgi import get_wsgi_application
+application = phase('wsgi', get_wsgi_application)
+from django.conf import settings
+from core.warmup import load_templates, load_urlconf, request_urls
+phase('urlconf', load_urlconf)
+phase('templates', load_templates)
+if settings.WARMUP_ON_START:
+    warmup = phase('requests', lambda: request_urls(application))
+timings['total'] = time.perf_counter() - started
+print(json.dumps({'phases': timings, 'warmup': warmup}))
+'''
+
+
+def parse_importtime(lines):
+    """Собственное время импортов в секундах по пакетам верхнего уровня."""
+    packages = {}
+    for line in lines:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us) / 1e6
+    return packages
+
+
+def profile_startup(env=None):
+    """Запустить процесс и вернуть время этапов и импортов по пакетам.
+
+    В ``warmup`` — статусы ответов на запросы прогрева по адресам.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, **(env or {})},
+    )
+    if result.returncode:
+        raise CommandError(
+            f'Процесс не запустился:\n{result.stderr[-2000:]}'
+        )
+    profile = json.loads(result.stdout.strip().splitlines()[-1])
+    profile['imports'] = parse_importtime(result.stderr.splitlines())
+    return profile
+
+
+class Command(BaseCommand):
+    help = 'Замерить время запуска процесса по этапам и импортам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15,
+                            help='Сколько самых долгих пакетов показать.')
+        parser.add_argument('--production', action='store_true',
+                            help='Запускать с BLOGICUM_DEBUG=0.')
+        parser.add_argument('--budget', type=float,
+                            help='Завершиться с ошибкой, если запуск'
+                                 ' дольше стольких секунд; по умолчанию'
+                                 ' STARTUP_TIME_BUDGET.')
+        parser.add_argument('--json', type=Path,
+                            help='Сохранить результат в JSON-файл.')
+
+    def handle(self, *args, **options):
+        env = {'BLOGICUM_DEBUG': '0'} if options['production'] else None
+        profile = profile_startup(env)
+        phases, imports = profile['phases'], profile['imports']
+        self.stdout.write('Этапы запуска, мс:')
+        for name, seconds in phases.items():
+            self.stdout.write(f'  {name:<12} {seconds * 1000:>8.0f}')
+        self.stdout.write(
+            f'Импорты, всего {sum(imports.values()) * 1000:.0f} мс:'
+        )
+        top = sorted(imports.items(), key=lambda item: -item[1])
+        for package, seconds in top[:options['top']]:
+            self.stdout.write(f'  {package:<24} {seconds * 1000:>8.1f}')
+        for url, status in profile['warmup'].items():
+            if status is None or status >= 500:
+                self.stderr.write(f'Прогрев {url}: ответ {status}.')
+        if options['json']:
+            options['json'].write_text(
+                json.dumps(profile, ensure_ascii=False, indent=2)
+            )
+        budget = options['budget']
+        if budget is None:
+            budget = getattr(settings, 'STARTUP_TIME_BUDGET', None)
+        if budget is not None and phases['total'] > budget:
+            raise CommandError(
+                f'Запуск занял {phases["total"]:.2f} с при бюджете'
+                f' {budget} с.'
+            )
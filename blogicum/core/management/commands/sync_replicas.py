@@ -0,0 +1,55 @@
+"""Команда для копирования основной БД SQLite в реплики."""
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import get_replicas
+
+PAGES_PER_STEP = 1024
+
+
+def sync_replica(alias):
+    """Скопировать основную БД в реплику через backup API SQLite.
+
+    Копирование идёт порциями страниц, так что запись в основную БД
+    не блокируется на всё время копирования.
+    """
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    target = sqlite3.connect(str(connections[alias].settings_dict['NAME']))
+    try:
+        primary.connection.backup(target, pages=PAGES_PER_STEP)
+    finally:
+        target.close()
+
+
+class Command(BaseCommand):
+    help = 'Скопировать основную БД SQLite в реплики DATABASE_REPLICAS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*',
+                            help='Реплики; по умолчанию все.')
+        parser.add_argument('--interval', type=float,
+                            help='Повторять копирование через столько'
+                                 ' секунд.')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or get_replicas()
+        if not aliases:
+            raise CommandError('Реплики не настроены: DATABASE_REPLICAS.')
+        for alias in aliases:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'Реплика {alias} — не SQLite.')
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                sync_replica(alias)
+                self.stdout.write(
+                    f'{alias}: скопировано за'
+                    f' {(time.perf_counter() - started) * 1000:.0f} мс.'
+                )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
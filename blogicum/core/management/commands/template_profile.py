@@ -0,0 +1,71 @@
+"""Команда для просмотра профиля рендеринга шаблонов по представлениям."""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.template_profiler import read_entries
+
+
+class Command(BaseCommand):
+    help = 'Сводка времени рендеринга шаблонов по представлениям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', type=Path,
+                            help='Путь к журналу вместо TEMPLATE_PROFILE_LOG.')
+        parser.add_argument('--view', help='Только указанное представление.')
+        parser.add_argument('--limit', type=int, default=15,
+                            help='Число шаблонов в сводке представления.')
+        parser.add_argument('--folded', action='store_true',
+                            help='Вывести свёрнутые стеки для flamegraph.pl.')
+
+    def handle(self, *args, **options):
+        views = {}
+        for entry in read_entries(options['log']):
+            if options['view'] and entry['view'] != options['view']:
+                continue
+            view = views.setdefault(entry['view'], {
+                'requests': 0, 'total_ms': 0.0, 'templates': {}, 'stacks': {},
+            })
+            view['requests'] += 1
+            view['total_ms'] += entry['total_ms']
+            for name, data in entry['templates'].items():
+                template = view['templates'].setdefault(
+                    name, {'calls': 0, 'total_ms': 0.0, 'self_ms': 0.0}
+                )
+                for key in template:
+                    template[key] += data[key]
+            for path, value in entry['stacks'].items():
+                view['stacks'][path] = view['stacks'].get(path, 0) + value
+
+        if not views:
+            self.stdout.write('Записей профилирования не найдено.')
+            return
+        if options['folded']:
+            for view_name, view in sorted(views.items()):
+                for path, value in sorted(view['stacks'].items()):
+                    self.stdout.write(f'{view_name};{path} {value}')
+            return
+        for view_name, view in sorted(
+            views.items(), key=lambda item: item[1]['total_ms'], reverse=True
+        ):
+            requests = view['requests']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{view_name}: {requests} запросов, рендеринг в среднем'
+                f' {view["total_ms"] / requests:.2f} мс'
+            ))
+            self.stdout.write(
+                f'  {"self, мс":>10} {"total, мс":>10} {"вызовов":>8}'
+                f' {"доля":>6}  шаблон'
+            )
+            templates = sorted(view['templates'].items(),
+                               key=lambda item: item[1]['self_ms'],
+                               reverse=True)[:options['limit']]
+            for name, data in templates:
+                share = (data['self_ms'] / view['total_ms'] * 100
+                         if view['total_ms'] else 0)
+                self.stdout.write(
+                    f'  {data["self_ms"] / requests:>10.3f}'
+                    f' {data["total_ms"] / requests:>10.3f}'
+                    f' {data["calls"] / requests:>8.1f}'
+                    f' {share:>5.1f}%  {name}'
+                )
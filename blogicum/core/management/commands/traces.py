@@ -0,0 +1,122 @@
+"""Команда для просмотра самых медленных трасс по адресам."""
+import json
+from pathlib import Path
+from statistics import median
+
+from django.core.management.base import BaseCommand
+
+from core.tracing import get_trace_file
+
+
+def read_traces(path):
+    """Прочитать трассы из файла и его ротированных копий."""
+    # Копии traces.jsonl.1, .2, ... — чем больше номер, тем старше.
+    paths = sorted(
+        (backup for backup in path.parent.glob(f'{path.name}.*')
+         if backup.suffix[1:].isdigit()),
+        key=lambda backup: int(backup.suffix[1:]),
+        reverse=True,
+    )
+    for trace_path in paths + [path]:
+        if not trace_path.exists():
+            continue
+        with open(trace_path, encoding='utf-8') as trace_file:
+            for line in trace_file:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    continue
+                for resource in data['resourceSpans']:
+                    for scope in resource['scopeSpans']:
+                        if scope['spans']:
+                            yield scope['spans']
+
+
+def duration_ms(span):
+    return (int(span['endTimeUnixNano'])
+            - int(span['startTimeUnixNano'])) / 1e6
+
+
+def get_attribute(span, key):
+    for attribute in span['attributes']:
+        if attribute['key'] == key:
+            return next(iter(attribute['value'].values()))
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Самые медленные трассы запросов по адресам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=Path,
+                            help='Файл трасс вместо TRACING_FILE.')
+        parser.add_argument('--limit', type=int, default=5,
+                            help='Число трасс для каждого адреса.')
+        parser.add_argument('--endpoint', help='Только указанный адрес.')
+        parser.add_argument('--trace', help='Показать дерево трассы.')
+
+    def handle(self, *args, **options):
+        traces = list(read_traces(options['file'] or get_trace_file()))
+        if options['trace']:
+            for spans in traces:
+                if spans[0]['traceId'] == options['trace']:
+                    self.print_tree(spans)
+                    return
+            self.stderr.write('Трасса не найдена.')
+            return
+
+        endpoints = {}
+        for spans in traces:
+            root = next(
+                (span for span in spans if not span.get('parentSpanId')),
+                None,
+            )
+            if root is None:
+                continue
+            endpoint = get_attribute(root, 'http.route') or root['name']
+            if options['endpoint'] and endpoint != options['endpoint']:
+                continue
+            endpoints.setdefault(endpoint, []).append((root, spans))
+        if not endpoints:
+            self.stdout.write('Трасс не найдено.')
+            return
+
+        for endpoint, items in sorted(
+            endpoints.items(),
+            key=lambda item: max(duration_ms(root) for root, _ in item[1]),
+            reverse=True,
+        ):
+            durations = [duration_ms(root) for root, _ in items]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{endpoint}: трасс {len(items)}, медиана'
+                f' {median(durations):.1f} мс, максимум'
+                f' {max(durations):.1f} мс'
+            ))
+            items.sort(key=lambda item: duration_ms(item[0]), reverse=True)
+            for root, spans in items[:options['limit']]:
+                queries = sum(span['kind'] == 3 for span in spans)
+                self.stdout.write(
+                    f'  {duration_ms(root):>9.1f} мс  {root["traceId"]}'
+                    f'  интервалов: {len(spans)}, запросов к БД и кэшу:'
+                    f' {queries}'
+                )
+
+    def print_tree(self, spans):
+        children = {}
+        for span in spans:
+            children.setdefault(span.get('parentSpanId', ''), []).append(
+                span
+            )
+
+        def walk(parent_id, depth):
+            for span in sorted(
+                children.get(parent_id, ()),
+                key=lambda item: int(item['startTimeUnixNano']),
+            ):
+                self.stdout.write(
+                    f'{duration_ms(span):>9.2f} мс  {"  " * depth}'
+                    f'{span["name"]}'
+                )
+                walk(span['spanId'], depth + 1)
+
+        walk('', 0)
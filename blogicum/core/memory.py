@@ -0,0 +1,89 @@
+"""Модуль для учёта памяти, выделенной при обработке запроса.
+
+С помощью tracemalloc замеряется пик выделенной памяти и места
+наибольших выделений. Результаты пишутся в журнал
+``blogicum.memory`` и в гистограмму метрик по представлениям.
+tracemalloc учитывает память всего процесса, поэтому при нескольких
+потоках в одном процессе замеры соседних запросов смешиваются.
+"""
+import logging
+import random
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.metrics import get_view_name, registry
+
+logger = logging.getLogger('blogicum.memory')
+
+MEMORY_BUCKETS = tuple(
+    2 ** power * 1024 for power in range(4, 20, 2)
+)
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+)
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+
+def top_allocations(before, after, limit):
+    """Места с наибольшим приростом выделенной памяти."""
+    return [
+        {
+            'site': str(stat.traceback[0]),
+            'size': stat.size_diff,
+            'count': stat.count_diff,
+        }
+        for stat in after.compare_to(before, 'lineno')[:limit]
+        if stat.size_diff > 0
+    ]
+
+
+class MemoryProfilingMiddleware:
+    """Замеряет пик памяти и места выделений для запросов."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MEMORY_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(
+                getattr(settings, 'MEMORY_PROFILING_FRAMES', 1)
+            )
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'MEMORY_PROFILING_SAMPLE_RATE',
+                                   1)
+        self.top_n = getattr(settings, 'MEMORY_PROFILING_TOP', 10)
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        before = take_snapshot() if self.top_n else None
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        response = self.get_response(request)
+        current, peak = tracemalloc.get_traced_memory()
+        peak -= baseline
+        sites = []
+        if self.top_n:
+            sites = top_allocations(before, take_snapshot(), self.top_n)
+        view = get_view_name(request)
+        registry.observe('blogicum_request_peak_memory_bytes',
+                         {'view': view}, peak, buckets=MEMORY_BUCKETS)
+        registry.observe('blogicum_request_retained_memory_bytes',
+                         {'view': view}, max(current - baseline, 0),
+                         buckets=MEMORY_BUCKETS)
+        logger.info(
+            'Память %s: пик %d КиБ, осталось %d КиБ%s',
+            view, peak // 1024, (current - baseline) // 1024,
+            ''.join(
+                f'\n  {site["size"] // 1024} КиБ, {site["count"]} блоков:'
+                f' {site["site"]}'
+                for site in sites
+            ),
+            extra={'view': view, 'peak': peak, 'sites': sites},
+        )
+        return response
@@ -0,0 +1,316 @@
+"""Модуль для сбора метрик в формате Prometheus.
+
+Каждый процесс копит метрики в памяти и периодически сохраняет их
+в свой файл в каталоге ``METRICS_DIR``. При выдаче метрик файлы всех
+процессов складываются, поэтому внешний сервис агрегации не нужен.
+Файлы завершившихся процессов при этом переносятся в общий файл
+``metrics-retired.json``, чтобы каталог не рос при перезапуске
+рабочих процессов.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import instrumentation
+from core.warmup import is_warmup_request
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+UNRESOLVED_VIEW = '<unresolved>'
+RETIRED_FILE = 'metrics-retired.json'
+
+METRICS = {
+    'blogicum_http_requests_total': (
+        'counter', 'Число обработанных запросов.'),
+    'blogicum_http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.'),
+    'blogicum_db_queries_total': (
+        'counter', 'Число запросов к БД.'),
+    'blogicum_db_duration_seconds': (
+        'histogram', 'Время запросов к БД за один запрос.'),
+    'blogicum_template_duration_seconds': (
+        'histogram', 'Время рендеринга шаблонов за один запрос.'),
+    'blogicum_request_peak_memory_bytes': (
+        'histogram', 'Пик памяти, выделенной при обработке запроса.'),
+    'blogicum_request_retained_memory_bytes': (
+        'histogram', 'Память, оставшаяся выделенной после запроса.'),
+    'blogicum_db_lock_retries_total': (
+        'counter', 'Число повторов транзакций из-за блокировки БД.'),
+    'blogicum_write_queue_batch_size': (
+        'histogram', 'Число заданий в пачке очереди записи.'),
+    'blogicum_cache_requests_total': (
+        'counter', 'Число обращений к уровням кэша.'),
+    'blogicum_page_cache_total': (
+        'counter', 'Число обращений к кэшу страниц по исходу.'),
+    'blogicum_stale_responses_total': (
+        'counter', 'Число устаревших страниц, отданных вместо ошибки.'),
+    'blogicum_shed_requests_total': (
+        'counter', 'Число запросов, отклонённых из-за перегрузки.'),
+}
+
+
+class Registry:
+    """Хранилище метрик процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        """Увеличить счётчик."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def clear(self):
+        """Забыть все метрики."""
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def observe(self, name, labels, value, buckets=DEFAULT_BUCKETS):
+        """Учесть значение в гистограмме."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * len(buckets),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        """Получить сериализуемую копию метрик."""
+        with self._lock:
+            return {
+                'counters': [
+                    [name, list(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, list(labels),
+                     dict(histogram, counts=list(histogram['counts']))]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def merge(self, snapshot):
+        """Добавить к хранилищу метрики из снимка."""
+        for name, labels, value in snapshot['counters']:
+            self.inc(name, dict(labels), value)
+        with self._lock:
+            for name, labels, histogram in snapshot['histograms']:
+                key = (name, tuple(sorted(tuple(pair) for pair in labels)))
+                current = self.histograms.get(key)
+                if current is None:
+                    self.histograms[key] = dict(
+                        histogram, counts=list(histogram['counts'])
+                    )
+                    continue
+                current['counts'] = [
+                    a + b for a, b in zip(current['counts'],
+                                          histogram['counts'])
+                ]
+                current['sum'] += histogram['sum']
+                current['count'] += histogram['count']
+
+
+registry = Registry()
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _after_fork():
+    # Метрики главного процесса (например, запросов прогрева) уже учтены
+    # в его файле; процесс, созданный fork, начинает счёт с нуля.
+    global _last_flush, _flush_lock
+    registry.clear()
+    _last_flush = 0.0
+    _flush_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def get_metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR',
+                        settings.BASE_DIR / 'metrics'))
+
+
+def _write(path, snapshot):
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(snapshot))
+    os.replace(tmp_path, path)
+
+
+def flush(force=False):
+    """Сохранить метрики процесса в его файл."""
+    global _last_flush
+    interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+    if not force and time.monotonic() - _last_flush < interval:
+        return
+    with _flush_lock:
+        _last_flush = time.monotonic()
+        metrics_dir = get_metrics_dir()
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        _write(metrics_dir / f'metrics-{os.getpid()}.json',
+               registry.snapshot())
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def retire_dead(metrics_dir):
+    """Перенести метрики завершившихся процессов в общий файл."""
+    dead = []
+    for path in metrics_dir.glob('metrics-*.json'):
+        pid = path.stem.split('-', 1)[1]
+        if pid.isdigit() and not is_alive(int(pid)):
+            dead.append(path)
+    if not dead:
+        return
+    retired = Registry()
+    retired_path = metrics_dir / RETIRED_FILE
+    for path in [retired_path] + dead:
+        try:
+            retired.merge(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    _write(retired_path, retired.snapshot())
+    for path in dead:
+        path.unlink(missing_ok=True)
+
+
+def collect():
+    """Сложить метрики всех процессов."""
+    flush(force=True)
+    metrics_dir = get_metrics_dir()
+    total = Registry()
+    # Одновременный перенос файлов в двух процессах учёл бы их дважды.
+    with open(metrics_dir / 'metrics.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            retire_dead(metrics_dir)
+            for path in metrics_dir.glob('metrics-*.json'):
+                try:
+                    total.merge(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return total
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(
+            key,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(metrics_registry):
+    """Представить метрики в текстовом формате Prometheus."""
+    series = {}
+    for (name, labels), value in sorted(metrics_registry.counters.items()):
+        series.setdefault(name, []).append(
+            f'{name}{_format_labels(labels)} {_format_value(value)}'
+        )
+    for (name, labels), histogram in sorted(
+        metrics_registry.histograms.items()
+    ):
+        lines = series.setdefault(name, [])
+        for bound, count in zip(histogram['buckets'], histogram['counts']):
+            bucket_labels = labels + (('le', _format_value(float(bound))),)
+            lines.append(
+                f'{name}_bucket{_format_labels(bucket_labels)} {count}'
+            )
+        lines.append(
+            f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))}'
+            f' {histogram["count"]}'
+        )
+        lines.append(f'{name}_sum{_format_labels(labels)}'
+                     f' {_format_value(histogram["sum"])}')
+        lines.append(f'{name}_count{_format_labels(labels)}'
+                     f' {histogram["count"]}')
+    output = []
+    for name, lines in sorted(series.items()):
+        metric_type, help_text = METRICS.get(name, ('untyped', ''))
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {metric_type}')
+        output.extend(lines)
+    return '\n'.join(output) + '\n'
+
+
+def get_view_name(request):
+    """Получить имя представления, обработавшего запрос."""
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return UNRESOLVED_VIEW
+    return resolver_match.view_name
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов по именам представлений."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if is_warmup_request(request):
+            return self.get_response(request)
+        with instrumentation.collect_stats() as stats:
+            response = self.get_response(request)
+            elapsed = stats.elapsed
+        view = get_view_name(request)
+        labels = {'view': view}
+        registry.inc('blogicum_http_requests_total', {
+            'view': view,
+            'method': request.method,
+            'status': str(response.status_code),
+        })
+        registry.observe('blogicum_http_request_duration_seconds',
+                         labels, elapsed)
+        registry.inc('blogicum_db_queries_total', labels,
+                     stats.counts['db'])
+        registry.observe('blogicum_db_duration_seconds',
+                         labels, stats.durations['db'])
+        registry.observe('blogicum_template_duration_seconds',
+                         labels, stats.durations['template'])
+        flush()
+        return response
@@ -0,0 +1,323 @@
+"""Модуль для зеркала опубликованного контента в памяти процесса.
+
+При ``MIRROR_ENABLED`` каждый процесс держит копию таблиц постов,
+категорий, локаций, комментариев и пользователей в SQLite в памяти
+(база ``mirror``). Анонимные запросы к ленте и постам из ``MIRROR_VIEWS``
+читают из зеркала, остальные — из основной БД.
+
+При запуске процесса зеркало строится в фоновом потоке; если за
+``MIRROR_BUILD_TIMEOUT`` секунд построить его не удалось, запросы и дальше
+идут в основную БД. Затем поток раз в ``MIRROR_SYNC_INTERVAL`` секунд
+применяет новые записи журнала ``ChangeLog``, который пополняют сигналы
+сохранения и удаления. Изменения через ``QuerySet.update()`` сигналов не
+посылают и в зеркало не попадают.
+
+Процессы, созданные fork, не наследуют поток синхронизации, а
+соединениями SQLite нельзя пользоваться в двух процессах сразу, поэтому
+после fork зеркало строится заново в базе с именем, уникальным для
+процесса. Пока поток работает с БД, fork ждёт: иначе потомок унаследовал
+бы захваченные мьютексы SQLite и завис на первом же соединении.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.db.copy import copy_rows
+from core.metrics import get_view_name
+from core.models import ChangeLog
+
+logger = logging.getLogger('blogicum.mirror')
+
+MIRROR_ALIAS = 'mirror'
+# В порядке копирования: сначала те, на кого ссылаются.
+MIRRORED_MODELS = (
+    'auth.User', 'blog.Category', 'blog.Location', 'blog.Post',
+    'blog.Comment',
+)
+ROW_FILTERS = {'blog.Post': {'is_published': True}}
+CHUNK_SIZE = 1000
+SYNC_BATCH_SIZE = 1000
+
+_active = ContextVar('mirror_active', default=False)
+
+
+class MirrorTimeout(Exception):
+    """Зеркало не построено за отведённое время."""
+
+
+def is_enabled():
+    return getattr(settings, 'MIRROR_ENABLED', False)
+
+
+def is_active():
+    """Читает ли текущий запрос из зеркала."""
+    return _active.get()
+
+
+def get_label(model):
+    return model._meta.label
+
+
+def is_mirrored(model):
+    return get_label(model) in MIRRORED_MODELS
+
+
+def get_source(model):
+    """БД, из которой копируются строки модели."""
+    return router.db_for_write(model)
+
+
+class Mirror:
+    """Зеркало процесса: построение и синхронизация по журналу."""
+
+    def __init__(self):
+        self.ready = False
+        self.last_change_id = 0
+        self._sync_lock = threading.Lock()
+        self._fork_lock = threading.Lock()
+        self._forking = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._keeper = None
+        self._inherited = []
+        self._name = None
+
+    def _keep_alive(self):
+        # База в памяти живёт, пока открыто хотя бы одно соединение.
+        if self._keeper is None:
+            self._keeper = sqlite3.connect(
+                str(connections[MIRROR_ALIAS].settings_dict['NAME']),
+                uri=True, check_same_thread=False,
+            )
+
+    def build(self, timeout=None):
+        """Построить зеркало заново не дольше чем за timeout секунд."""
+        if timeout is None:
+            timeout = getattr(settings, 'MIRROR_BUILD_TIMEOUT', 30)
+        deadline = time.monotonic() + timeout
+        started = time.perf_counter()
+        self.ready = False
+        self._keep_alive()
+        connection = connections[MIRROR_ALIAS]
+        models = [apps.get_model(label) for label in MIRRORED_MODELS]
+        with connection.schema_editor() as editor:
+            for table in connection.introspection.table_names():
+                editor.execute(
+                    f'DROP TABLE {connection.ops.quote_name(table)}'
+                )
+            for model in models:
+                editor.create_model(model)
+        # Целостность обеспечивает основная БД; в зеркале строки
+        # обновляются по одной, и внешние ключи бы мешали.
+        connection.disable_constraint_checking()
+        self.last_change_id = ChangeLog.objects.using(
+            DEFAULT_DB_ALIAS
+        ).aggregate(last=Max('id'))['last'] or 0
+        for model in models:
+            queryset = model._base_manager.using(get_source(model)).filter(
+                **ROW_FILTERS.get(get_label(model), {})
+            ).order_by('pk')
+            last_pk = None
+            while True:
+                if time.monotonic() > deadline:
+                    raise MirrorTimeout(
+                        f'Зеркало не построено за {timeout} с.'
+                    )
+                chunk = queryset
+                if last_pk is not None:
+                    chunk = chunk.filter(pk__gt=last_pk)
+                rows = list(chunk[:CHUNK_SIZE])
+                if not rows:
+                    break
+                copy_rows(model, rows, MIRROR_ALIAS)
+                last_pk = rows[-1].pk
+        self.sync()
+        self.ready = True
+        logger.info('Зеркало построено за %.0f мс.',
+                    (time.perf_counter() - started) * 1000)
+
+    def sync(self):
+        """Применить к зеркалу новые записи журнала изменений."""
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            while True:
+                changes = list(
+                    ChangeLog.objects.using(DEFAULT_DB_ALIAS)
+                    .filter(id__gt=self.last_change_id)
+                    .values_list('id', 'model', 'object_id')
+                    [:SYNC_BATCH_SIZE]
+                )
+                if not changes:
+                    return
+                keys = dict.fromkeys(
+                    (label, object_id) for _, label, object_id in changes
+                )
+                with transaction.atomic(using=MIRROR_ALIAS):
+                    for label, object_id in keys:
+                        self._copy_row(apps.get_model(label), object_id)
+                self.last_change_id = changes[-1][0]
+        finally:
+            self._sync_lock.release()
+
+    def _copy_row(self, model, object_id):
+        # Строку обновляем на месте: при read_uncommitted читатели иначе
+        # увидели бы её отсутствие между удалением и вставкой.
+        mirror = model._base_manager.using(MIRROR_ALIAS).filter(
+            pk=object_id
+        )
+        row = model._base_manager.using(get_source(model)).filter(
+            pk=object_id, **ROW_FILTERS.get(get_label(model), {})
+        ).first()
+        if row is None:
+            mirror._raw_delete(MIRROR_ALIAS)
+            return
+        values = {
+            field.attname: getattr(row, field.attname)
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        }
+        if not mirror.update(**values):
+            copy_rows(model, [row], MIRROR_ALIAS)
+
+    def start(self):
+        """Построить зеркало и синхронизировать его в фоновом потоке."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._keeper = None
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='mirror', daemon=True
+        )
+        self._thread.start()
+
+    def before_fork(self):
+        """Дождаться, пока поток зеркала отпустит БД."""
+        if self._pid == os.getpid():
+            self._fork_lock.acquire()
+            self._forking = True
+
+    def after_fork_in_parent(self):
+        if self._forking:
+            self._forking = False
+            self._fork_lock.release()
+
+    def after_fork(self):
+        """Перестроить зеркало в процессе, созданном fork."""
+        self._fork_lock = threading.Lock()
+        self._forking = False
+        if self._pid is None:
+            return
+        # Унаследованные соединения не закрываем: они принадлежат
+        # главному процессу, а их закрытие здесь может его задеть.
+        self._inherited.append(self._keeper)
+        self._keeper = None
+        self._sync_lock = threading.Lock()
+        self.ready = False
+        connection = connections[MIRROR_ALIAS]
+        self._inherited.append(connection.connection)
+        connection.connection = None
+        if self._name is None:
+            self._name = connection.settings_dict['NAME']
+        base, _, query = self._name.partition('?')
+        connection.settings_dict['NAME'] = f'{base}_{os.getpid()}?{query}'
+        self.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        interval = getattr(settings, 'MIRROR_SYNC_INTERVAL', 1)
+        try:
+            if not self.ready:
+                with self._fork_lock:
+                    prune_change_log()
+                    self.build()
+        except Exception:
+            logger.exception('Не удалось построить зеркало.')
+            return
+        while not self._stop.wait(interval):
+            try:
+                with self._fork_lock:
+                    self.sync()
+            except Exception:
+                logger.exception('Не удалось синхронизировать зеркало.')
+
+
+_mirror = Mirror()
+os.register_at_fork(before=_mirror.before_fork,
+                    after_in_parent=_mirror.after_fork_in_parent,
+                    after_in_child=_mirror.after_fork)
+
+
+def get_mirror():
+    return _mirror
+
+
+def record_change(sender, instance, using, update_fields=None, **kwargs):
+    """Записать изменение зеркалируемой модели в журнал."""
+    if not is_enabled() or using == MIRROR_ALIAS:
+        return
+    if update_fields == {'last_login'}:
+        # Вход пользователя зеркалу не важен, а журнал бы раздувал.
+        return
+    entry = ChangeLog(model=get_label(sender), object_id=instance.pk)
+    if using == DEFAULT_DB_ALIAS:
+        entry.save(using=DEFAULT_DB_ALIAS)
+    else:
+        # Журнал один на все БД: комментарии могут жить отдельно. Запись
+        # в нём не входит в транзакцию изменения, поэтому делаем её
+        # только после фиксации, чтобы откат не оставил лишних строк.
+        transaction.on_commit(
+            lambda: entry.save(using=DEFAULT_DB_ALIAS), using=using
+        )
+
+
+def prune_change_log():
+    """Удалить устаревшие записи журнала изменений."""
+    max_age = getattr(settings, 'MIRROR_CHANGE_LOG_MAX_AGE', 24 * 60 * 60)
+    ChangeLog.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=max_age)
+    ).delete()
+
+
+class MirrorMiddleware:
+    """Направляет анонимное чтение ленты и постов в зеркало."""
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.views = set(getattr(settings, 'MIRROR_VIEWS', ()))
+        get_mirror().start()
+
+    def __call__(self, request):
+        request._mirror_token = None
+        try:
+            response = self.get_response(request)
+        finally:
+            token = request._mirror_token
+            if token is not None:
+                _active.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (get_mirror().ready and request.method in ('GET', 'HEAD')
+                and not request.user.is_authenticated
+                and get_view_name(request) in self.views):
+            request._mirror_token = _active.set(True)
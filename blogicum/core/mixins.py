@@ -1,7 +1,18 @@
 """Импорт."""
+import hashlib
+
+from django.conf import settings  # type: ignore
 from django.contrib.auth.mixins import UserPassesTestMixin  # type: ignore
+from django.contrib.auth.models import AnonymousUser  # type: ignore
+from django.db import router  # type: ignore
+from django.http import (  # type: ignore
+    HttpRequest, HttpResponse, HttpResponseRedirect,
+)
 from django.shortcuts import redirect  # type: ignore
 
+from core import page_cache, write_queue
+from core.db.retry import atomic_with_retry
+
 
 class OnlyAuthorMixin(UserPassesTestMixin):
     """Проверка на авторство."""
@@ -14,3 +25,116 @@ class OnlyAuthorMixin(UserPassesTestMixin):
         """Перенаправляет неавторов."""
         return redirect('blog:post_detail',
                         post_id=self.kwargs.get('post_id'))
+
+
+class WriteMixin:
+    """Изменяющий запрос в транзакции с повтором или через очередь записи.
+
+    При включённой очереди записи сохранение формы и удаление объекта
+    выполняет писатель ``core.write_queue``, а запрос ждёт фиксации.
+    Если писатель не успел начать задание, оно отменяется, а запрос
+    получает ответ 503.
+    """
+
+    def get_write_db(self):
+        """БД, в которую пишет представление."""
+        return router.db_for_write(self.model)
+
+    def post(self, request, *args, **kwargs):
+        """Обрабатывает POST в транзакции с повтором."""
+        if write_queue.is_enabled():
+            return super().post(request, *args, **kwargs)
+        return atomic_with_retry(super().post, request, *args,
+                                 using=self.get_write_db(), **kwargs)
+
+    def form_valid(self, form):
+        """Сохраняет форму через очередь записи."""
+        if not write_queue.is_enabled():
+            return super().form_valid(form)
+        try:
+            self.object = write_queue.submit(form.save,
+                                             using=self.get_write_db())
+        except write_queue.WriteQueueTimeout:
+            return self.write_queue_timeout()
+        return HttpResponseRedirect(self.get_success_url())
+
+    def delete(self, request, *args, **kwargs):
+        """Удаляет объект через очередь записи."""
+        if not write_queue.is_enabled():
+            return super().delete(request, *args, **kwargs)
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        try:
+            write_queue.submit(self.object.delete,
+                               using=self.get_write_db())
+        except write_queue.WriteQueueTimeout:
+            return self.write_queue_timeout()
+        return HttpResponseRedirect(success_url)
+
+    def write_queue_timeout(self):
+        """Ответ на отменённую из-за перегрузки запись."""
+        response = HttpResponse(
+            'Сервер перегружен, изменения не сохранены. Повторите запрос'
+            ' позже.',
+            status=503, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = getattr(
+            settings, 'WRITE_QUEUE_RETRY_AFTER', 5
+        )
+        return response
+
+
+class CachedPageMixin:
+    """Страница для анонимных пользователей из кэша ``core.page_cache``.
+
+    Кэшируется отрисованная страница с тегами ``page_cache_tags``; при
+    изменении данных записи с этими тегами удаляются.
+    """
+
+    page_cache_tags = ('blog',)
+
+    def get_page_cache_key(self):
+        path = self.request.get_full_path().encode()
+        return f'page:{hashlib.md5(path).hexdigest()}'
+
+    def get_page_request(self):
+        """Анонимная копия запроса для отрисовки страницы в кэш.
+
+        Пересчёт может идти в фоновом потоке уже после ответа, поэтому
+        исходные запрос и представление он не трогает.
+        """
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = self.request.path
+        request.path_info = self.request.path_info
+        request.META = {
+            key: value for key, value in self.request.META.items()
+            if key != 'HTTP_COOKIE' and not key.startswith('wsgi.')
+        }
+        request.GET = self.request.GET.copy()
+        request.COOKIES = {}
+        request.user = AnonymousUser()
+        request.resolver_match = self.request.resolver_match
+        return request
+
+    def get(self, request, *args, **kwargs):
+        """Отдаёт страницу из кэша или отрисовывает её."""
+        if not page_cache.is_enabled() or request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        page_request = self.get_page_request()
+
+        def render():
+            view = self.__class__()
+            view.setup(page_request, *args, **kwargs)
+            response = super(CachedPageMixin, view).get(
+                page_request, *args, **kwargs
+            )
+            response.render()
+            return response.content, response['Content-Type']
+
+        content, content_type = page_cache.get_or_compute(
+            self.get_page_cache_key(), render,
+            getattr(settings, 'PAGE_CACHE_TIMEOUT', 60),
+            tags=self.page_cache_tags,
+        )
+        return HttpResponse(content, content_type=content_type)
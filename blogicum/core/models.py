@@ -0,0 +1,20 @@
+"""Модуль для описания служебных моделей."""
+from django.db import models
+
+
+class ChangeLog(models.Model):
+    """Журнал изменений для зеркала опубликованного контента."""
+
+    model = models.CharField('Модель', max_length=100)
+    object_id = models.BigIntegerField('Идентификатор объекта')
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+
+        verbose_name = 'изменение'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ('id',)
+
+    def __str__(self) -> str:
+        """Переопределяем метод str."""
+        return f'{self.model}:{self.object_id}'
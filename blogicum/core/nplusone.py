@@ -0,0 +1,115 @@
+"""Модуль для обнаружения N+1 запросов.
+
+Ленивая загрузка связанного объекта по внешнему ключу у второго
+и последующих объектов одной модели за запрос считается признаком
+загрузки в цикле. В режиме ``NPLUSONE_MODE = 'log'`` такие загрузки
+пишутся в журнал, в режиме ``'raise'`` вызывают ``NPlusOneError``.
+В сообщении указывается шаблон и строка, где произошла загрузка.
+"""
+import logging
+import sys
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor
+)
+from django.template.base import Node
+
+logger = logging.getLogger('blogicum.nplusone')
+
+MODES = ('log', 'raise')
+_current_detector = ContextVar('nplusone_detector', default=None)
+_original_get_object = ForwardManyToOneDescriptor.get_object
+_installed = False
+
+
+class NPlusOneError(Exception):
+    """Связанный объект загружается в цикле по одному запросу на строку."""
+
+
+def find_template_location():
+    """Найти шаблон и строку, рендеринг которых вызвал загрузку."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if (frame.f_code.co_name == 'render_annotated'
+                and isinstance(node, Node)
+                and getattr(node, 'token', None) is not None):
+            origin = getattr(node, 'origin', None)
+            template_name = getattr(origin, 'template_name', None) or getattr(
+                origin, 'name', '<unknown>'
+            )
+            return f'{template_name}, строка {node.token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+class NPlusOneDetector:
+    """Учёт ленивых загрузок связанных объектов за запрос."""
+
+    def __init__(self, mode, ignore=()):
+        self.mode = mode
+        self.ignore = set(ignore)
+        self.loads = {}
+        self.reported = set()
+
+    def on_lazy_load(self, descriptor, instance):
+        field = descriptor.field
+        key = f'{field.model._meta.label}.{field.name}'
+        if key in self.ignore:
+            return
+        loaded = self.loads.setdefault(key, set())
+        loaded.add(instance.pk)
+        if len(loaded) < 2 or key in self.reported:
+            return
+        self.reported.add(key)
+        location = find_template_location()
+        message = (
+            f'N+1: `{key}` загружается отдельным запросом для каждого'
+            f' объекта ({len(loaded)} и более). Добавьте'
+            f' select_related(\'{field.name}\') в выборку.'
+        )
+        if location:
+            message += f' Шаблон: {location}.'
+        if self.mode == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+def _get_object(self, instance):
+    detector = _current_detector.get()
+    if detector is not None:
+        detector.on_lazy_load(self, instance)
+    return _original_get_object(self, instance)
+
+
+def install():
+    """Подключить учёт ленивых загрузок; повторный вызов ничего не делает."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    ForwardManyToOneDescriptor.get_object = _get_object
+
+
+class NPlusOneMiddleware:
+    """Обнаруживает N+1 запросы при обработке запроса."""
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'NPLUSONE_MODE', None)
+        if self.mode not in MODES:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.ignore = getattr(settings, 'NPLUSONE_IGNORE', ())
+
+    def __call__(self, request):
+        token = _current_detector.set(
+            NPlusOneDetector(self.mode, self.ignore)
+        )
+        try:
+            return self.get_response(request)
+        finally:
+            _current_detector.reset(token)
@@ -0,0 +1,126 @@
+"""Модуль для кэширования дорогих вычислений без лавины пересчётов.
+
+``get_or_compute`` хранит значение вместе со временем его вычисления
+и сроком свежести и защищает от одновременного пересчёта:
+
+* пересчёт выполняет один процесс — тот, кто взял блокировку
+  ``cache.add`` (single flight); остальные при пустом кэше ждут его
+  результат не дольше ``PAGE_CACHE_LOCK_TIMEOUT`` секунд;
+* после истечения ``timeout`` запись ещё ``PAGE_CACHE_STALE_TIMEOUT``
+  секунд отдаётся устаревшей, пока её пересчитывает фоновый поток
+  (stale-while-revalidate);
+* незадолго до истечения пересчёт запускается заранее с вероятностью,
+  растущей к концу срока и времени вычисления (XFetch,
+  ``PAGE_CACHE_BETA``), так что записи обычно не успевают устареть.
+
+Блокировки берутся в общем кэше (L2 для ``TieredCache``), минуя кэш
+процесса. Теги записей поддерживает ``SQLiteCache``; с другими кэшами
+записи не сбрасываются по тегам и живут до истечения срока.
+"""
+import logging
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from core.metrics import registry
+
+logger = logging.getLogger('blogicum.page_cache')
+
+LOCK_SUFFIX = ':lock'
+WAIT_INTERVAL = 0.05
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_CACHE_ENABLED', False)
+
+
+def count(result):
+    registry.inc('blogicum_page_cache_total', {'result': result})
+
+
+def supports_tags(cache):
+    """Умеет ли кэш (или его общий уровень) удалять записи по тегам."""
+    return hasattr(getattr(cache, 'l2', cache), 'invalidate_tags')
+
+
+def invalidate(*tags, cache=None):
+    """Удалить записи с тегами, если кэш это умеет."""
+    cache = cache or caches['default']
+    if supports_tags(cache):
+        cache.invalidate_tags(*tags)
+
+
+def should_refresh_early(delta, expires, now, beta=None):
+    """Решить по XFetch, пора ли пересчитать ещё свежую запись."""
+    if beta is None:
+        beta = getattr(settings, 'PAGE_CACHE_BETA', 1.0)
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def _store(cache, key, compute, timeout, tags):
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    stale_timeout = getattr(settings, 'PAGE_CACHE_STALE_TIMEOUT', 600)
+    entry = (value, delta, time.time() + timeout)
+    if tags and supports_tags(cache):
+        cache.set(key, entry, timeout + stale_timeout, tags=tags)
+    else:
+        cache.set(key, entry, timeout + stale_timeout)
+    return value
+
+
+def _refresh(cache, lock_cache, key, compute, timeout, tags):
+    try:
+        _store(cache, key, compute, timeout, tags)
+    except Exception:
+        logger.exception('Не удалось пересчитать %s.', key)
+    finally:
+        lock_cache.delete(key + LOCK_SUFFIX)
+        connections.close_all()
+
+
+def get_or_compute(key, compute, timeout, tags=(), cache=None):
+    """Получить значение из кэша или вычислить его compute()."""
+    cache = cache or caches['default']
+    lock_cache = getattr(cache, 'l2', cache)
+    lock_timeout = getattr(settings, 'PAGE_CACHE_LOCK_TIMEOUT', 10)
+    lock_key = key + LOCK_SUFFIX
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        now = time.time()
+        if now < expires and not should_refresh_early(delta, expires, now):
+            count('hit')
+            return value
+        if lock_cache.add(lock_key, 1, lock_timeout):
+            count('early' if now < expires else 'stale')
+            threading.Thread(
+                target=_refresh, name='page-cache-refresh', daemon=True,
+                args=(cache, lock_cache, key, compute, timeout, tags),
+            ).start()
+        else:
+            count('hit' if now < expires else 'stale')
+        return value
+    count('miss')
+    deadline = time.monotonic() + lock_timeout
+    while not lock_cache.add(lock_key, 1, lock_timeout):
+        # Значение уже вычисляет другой процесс: ждём его результат.
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() > deadline:
+            return _store(cache, key, compute, timeout, tags)
+    try:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        return _store(cache, key, compute, timeout, tags)
+    finally:
+        lock_cache.delete(lock_key)
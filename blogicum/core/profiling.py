@@ -0,0 +1,126 @@
+"""Модуль для профилирования запросов персонала через cProfile.
+
+Запрос профилируется, если его отправил сотрудник и либо передал
+подписанный заголовок ``X-Profile-Token``, либо попал в выборку
+``PROFILING_SAMPLE_RATE``. Профили сохраняются в ``PROFILE_DIR``
+и доступны персоналу на странице ``/admin/profiles/``.
+"""
+import cProfile
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.metrics import get_view_name
+
+TOKEN_HEADER = 'X-Profile-Token'
+TOKEN_SALT = 'core.profiling'
+PROFILE_NAME_RE = re.compile(
+    r'^(?P<timestamp>\d+)_(?P<duration>\d+)ms_(?P<view>[\w.<>-]+)\.prof$'
+)
+
+
+def get_profile_dir():
+    return Path(getattr(settings, 'PROFILE_DIR',
+                        settings.BASE_DIR / 'profiles'))
+
+
+def make_token(user):
+    """Подписанный токен профилирования для сотрудника."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(user.get_username())
+
+
+def check_token(request):
+    """Проверить токен профилирования из заголовка запроса."""
+    token = request.headers.get(TOKEN_HEADER)
+    if not token:
+        return False
+    try:
+        username = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token,
+            max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600),
+        )
+    except signing.BadSignature:
+        return False
+    return username == request.user.get_username()
+
+
+def list_profiles():
+    """Сохранённые профили, от новых к старым."""
+    profile_dir = get_profile_dir()
+    if not profile_dir.exists():
+        return []
+    profiles = []
+    for path in profile_dir.iterdir():
+        match = PROFILE_NAME_RE.match(path.name)
+        if match is None:
+            continue
+        profiles.append({
+            'name': path.name,
+            'view': match['view'].replace('.', ':'),
+            'created': datetime.fromtimestamp(
+                int(match['timestamp']) / 1000, tz=timezone.utc
+            ),
+            'duration_ms': int(match['duration']),
+            'size': path.stat().st_size,
+        })
+    return sorted(profiles, key=lambda item: item['created'], reverse=True)
+
+
+def get_profile_path(name):
+    """Путь к профилю по имени файла или None."""
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = get_profile_dir() / name
+    return path if path.is_file() else None
+
+
+def save_profile(profiler, view, duration):
+    """Сохранить профиль и удалить самые старые сверх лимита."""
+    profile_dir = get_profile_dir()
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    view = re.sub(r'[^\w.<>-]', '-', view.replace(':', '.'))
+    name = (f'{int(time.time() * 1000)}_{int(duration * 1000)}ms_'
+            f'{view}.prof')
+    profiler.dump_stats(profile_dir / name)
+    max_files = getattr(settings, 'PROFILING_MAX_FILES', 200)
+    for profile in list_profiles()[max_files:]:
+        (profile_dir / profile['name']).unlink(missing_ok=True)
+    return name
+
+
+class ProfilingMiddleware:
+    """Профилирует запросы персонала по токену или по выборке."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+
+    def should_profile(self, request):
+        if not (request.user.is_active and request.user.is_staff):
+            return False
+        if check_token(request):
+            return True
+        return random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        name = save_profile(profiler, get_view_name(request),
+                            time.perf_counter() - started)
+        response['X-Profile-File'] = name
+        return response
@@ -0,0 +1,53 @@
+"""Модуль для сбора бюджетов SQL-запросов представлений.
+
+Каждый urls-модуль может объявить словарь ``QUERY_BUDGETS``, в котором
+имени маршрута сопоставлено максимальное число запросов к БД при одном
+обращении к странице. Имена маршрутов дополняются пространством имён
+приложения, например ``blog:index``.
+"""
+from django.urls import URLResolver, get_resolver
+
+BUDGETS_ATTR = 'QUERY_BUDGETS'
+
+
+def collect_query_budgets(resolver=None, namespace=None):
+    """Собрать бюджеты запросов из всех подключённых urls-модулей."""
+    if resolver is None:
+        resolver = get_resolver()
+    budgets = {}
+    for pattern in resolver.url_patterns:
+        if not isinstance(pattern, URLResolver):
+            continue
+        pattern_namespace = namespace
+        if pattern.namespace:
+            pattern_namespace = ':'.join(
+                filter(None, (namespace, pattern.namespace))
+            )
+        for name, budget in getattr(
+            pattern.urlconf_module, BUDGETS_ATTR, {}
+        ).items():
+            budgets[
+                f'{pattern_namespace}:{name}' if pattern_namespace else name
+            ] = budget
+        budgets.update(collect_query_budgets(pattern, pattern_namespace))
+    return budgets
+
+
+def get_url_names(resolver=None, namespace=None):
+    """Получить имена всех маршрутов модуля вместе с пространством имён."""
+    if resolver is None:
+        resolver = get_resolver()
+    names = set()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            pattern_namespace = namespace
+            if pattern.namespace:
+                pattern_namespace = ':'.join(
+                    filter(None, (namespace, pattern.namespace))
+                )
+            names |= get_url_names(pattern, pattern_namespace)
+        elif pattern.name:
+            names.add(
+                f'{namespace}:{pattern.name}' if namespace else pattern.name
+            )
+    return names
@@ -0,0 +1,132 @@
+"""Модуль для чтения из реплик базы данных.
+
+``PrimaryReplicaRouter`` отправляет чтение моделей приложений
+``REPLICA_APPS`` на случайную реплику из ``DATABASE_REPLICAS``, а запись —
+в основную БД ``default``. Реплики используются только внутри запросов,
+прошедших через ``ReplicaPinningMiddleware``: после записи пользователь
+``REPLICA_PIN_SECONDS`` секунд читает из основной БД и видит свои посты
+и комментарии, даже если реплики ещё не догнали её. Реплики SQLite
+обновляет копированием ``python manage.py sync_replicas``.
+
+Чтение анонимных запросов, включённых в зеркало ``core.mirror``, идёт
+в зеркало в памяти процесса раньше всех реплик.
+
+Если задан ``COMMENTS_DATABASE``, модель ``blog.Comment`` целиком живёт
+в этой БД: туда идут её чтение, запись и миграции, а связанные с
+комментарием пост и автор читаются из основной БД.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+from core import mirror
+
+PIN_SESSION_KEY = '_replica_pin_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+COMMENT_MODEL = 'blog.Comment'
+
+
+class ReplicaState:
+    """Состояние маршрутизации в рамках одного запроса."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def uses_replicas(model):
+    return model._meta.app_label in getattr(settings, 'REPLICA_APPS', ())
+
+
+def get_comments_db():
+    """БД комментариев или None, если они в основной БД."""
+    return getattr(settings, 'COMMENTS_DATABASE', None)
+
+
+def is_comment(model):
+    return model._meta.label == COMMENT_MODEL
+
+
+class PrimaryReplicaRouter:
+    """Чтение из реплик, запись в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        if mirror.is_active() and mirror.is_mirrored(model):
+            return mirror.MIRROR_ALIAS
+        comments_db = get_comments_db()
+        if comments_db and is_comment(model):
+            return comments_db
+        state = _state.get()
+        if state is not None and uses_replicas(model):
+            replicas = get_replicas()
+            if state.pinned or not replicas:
+                return DEFAULT_DB_ALIAS
+            return random.choice(replicas)
+        instance = hints.get('instance')
+        if (comments_db and instance is not None
+                and instance._state.db == comments_db):
+            # Пост и автор комментария лежат в основной БД.
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and uses_replicas(model):
+            state.pinned = state.wrote = True
+        comments_db = get_comments_db()
+        if comments_db and is_comment(model):
+            return comments_db
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все БД проекта — копии или части одной схемы.
+        if {obj1._state.db, obj2._state.db} <= set(settings.DATABASES):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == mirror.MIRROR_ALIAS or db in get_replicas():
+            return False
+        comments_db = get_comments_db()
+        if comments_db:
+            in_comments_db = (
+                f'{app_label}.{model_name}' == COMMENT_MODEL.lower()
+            )
+            return in_comments_db == (db == comments_db)
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Включает чтение из реплик и закрепляет автора за основной БД."""
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in SAFE_METHODS
+            or request.session.get(PIN_SESSION_KEY, 0) > time.time()
+        )
+        state = ReplicaState(pinned)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            request.session[PIN_SESSION_KEY] = time.time() + self.pin_seconds
+        return response
@@ -0,0 +1,47 @@
+"""Модуль для заголовка Server-Timing.
+
+Заголовок делит время ответа на слои: запросы к БД, рендеринг шаблонов
+и обращения к кэшу. Его показывают инструменты разработчика браузера,
+поэтому для разбора медленных страниц не нужна отладочная панель.
+"""
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import instrumentation
+
+HEADER = 'Server-Timing'
+
+
+def format_server_timing(stats):
+    """Собрать значение заголовка Server-Timing из показателей запроса."""
+    metrics = (
+        ('db', stats.durations['db'],
+         f'ORM, {stats.counts["db"]} queries'),
+        ('tpl', stats.durations['template'], 'Templates'),
+        ('cache', stats.durations['cache'],
+         f'Cache, {stats.counts["cache"]} calls'),
+        ('total', stats.elapsed, 'Total'),
+    )
+    # Значения заголовков должны быть в latin-1, поэтому описания
+    # метрик на английском.
+    return ', '.join(
+        f'{name};dur={duration * 1000:.2f};desc="{description}"'
+        for name, duration, description in metrics
+    )
+
+
+class ServerTimingMiddleware:
+    """Добавляет к ответам заголовок Server-Timing."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        instrumentation.install_cache()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with instrumentation.collect_stats() as stats:
+            response = self.get_response(request)
+            response[HEADER] = format_server_timing(stats)
+        return response
@@ -0,0 +1,129 @@
+"""Модуль для сброса нагрузки при перегрузке процесса.
+
+При ``LOAD_SHEDDING_ENABLED`` ``LoadSheddingMiddleware`` ограничивает
+число запросов, одновременно обрабатываемых процессом:
+
+* не больше ``LOAD_SHEDDING_MAX_CONCURRENCY`` запросов обрабатываются
+  сразу, ещё ``LOAD_SHEDDING_MAX_QUEUE`` ждут свободного места не дольше
+  ``LOAD_SHEDDING_QUEUE_TIMEOUT`` секунд;
+* у представлений из ``LOAD_SHEDDING_VIEW_LIMITS`` (имя URL или шаблон
+  вида ``admin:*_changelist``) свой предел одновременных запросов без
+  очереди, чтобы дорогие страницы не занимали все потоки.
+
+Остальные запросы сразу получают ответ 503 с ``Retry-After``, не
+касаясь БД. Пределы действуют в каждом процессе отдельно; отказы
+считает метрика ``blogicum_shed_requests_total``.
+"""
+import fnmatch
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+from core.metrics import UNRESOLVED_VIEW, get_view_name, registry
+
+
+def is_enabled():
+    return getattr(settings, 'LOAD_SHEDDING_ENABLED', False)
+
+
+class Limiter:
+    """Предел одновременных запросов с ограниченной очередью."""
+
+    def __init__(self, limit, max_queue=0, timeout=0):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Занять место; False, если места нет и очередь полна."""
+        with self._condition:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+class LoadSheddingMiddleware:
+    """Отвечает 503 на запросы сверх пределов процесса."""
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.retry_after = getattr(settings, 'LOAD_SHEDDING_RETRY_AFTER', 1)
+        self.limiter = Limiter(
+            getattr(settings, 'LOAD_SHEDDING_MAX_CONCURRENCY', 32),
+            getattr(settings, 'LOAD_SHEDDING_MAX_QUEUE', 64),
+            getattr(settings, 'LOAD_SHEDDING_QUEUE_TIMEOUT', 1),
+        )
+        self.view_limits = getattr(settings, 'LOAD_SHEDDING_VIEW_LIMITS', {})
+        self.view_limiters = {}
+        self._lock = threading.Lock()
+
+    def get_view_limiter(self, view_name):
+        """Предел представления или None, если его нет."""
+        with self._lock:
+            if view_name not in self.view_limiters:
+                limit = next((
+                    limit for pattern, limit in self.view_limits.items()
+                    if fnmatch.fnmatchcase(view_name, pattern)
+                ), None)
+                self.view_limiters[view_name] = (
+                    None if limit is None else Limiter(limit)
+                )
+            return self.view_limiters[view_name]
+
+    def reject(self, view_name, reason):
+        registry.inc('blogicum_shed_requests_total',
+                     {'view': view_name, 'reason': reason})
+        response = HttpResponse(
+            'Сервер перегружен, повторите запрос позже.',
+            status=503, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = self.retry_after
+        return response
+
+    def __call__(self, request):
+        if not self.limiter.acquire():
+            return self.reject(UNRESOLVED_VIEW, 'global')
+        request._shedding_limiter = None
+        try:
+            return self.get_response(request)
+        finally:
+            if request._shedding_limiter is not None:
+                request._shedding_limiter.release()
+            self.limiter.release()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = get_view_name(request)
+        limiter = self.get_view_limiter(view_name)
+        if limiter is None:
+            return None
+        if not limiter.acquire():
+            return self.reject(view_name, 'view')
+        request._shedding_limiter = limiter
+        return None
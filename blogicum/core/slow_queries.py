@@ -0,0 +1,135 @@
+"""Модуль для журнала медленных SQL-запросов.
+
+Запросы дольше ``SLOW_QUERY_THRESHOLD_MS`` записываются в файл
+``SLOW_QUERY_LOG`` по одному JSON-объекту на строку вместе с именем
+представления, отпечатком запроса и планом ``EXPLAIN QUERY PLAN``.
+Сводку по отпечаткам выводит команда ``manage.py slow_queries``.
+"""
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.sqlite3.base import FORMAT_QMARK_REGEX
+
+from core import instrumentation
+from core.jsonlog import append_json_line, read_json_lines
+from core.metrics import get_view_name
+
+logger = logging.getLogger('blogicum.slow_queries')
+
+DEFAULT_THRESHOLD_MS = 100
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)',
+                         re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Заменить литералы и списки параметров заполнителями."""
+    sql = _STRING_LITERAL_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Короткий отпечаток нормализованного запроса."""
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def explain_query_plan(alias, sql, params):
+    """Получить план запроса SQLite в обход обёрток выполнения."""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite' or connection.connection is None:
+        return []
+    query = FORMAT_QMARK_REGEX.sub('?', sql).replace('%%', '%')
+    try:
+        cursor = connection.connection.execute(
+            f'EXPLAIN QUERY PLAN {query}', params or ()
+        )
+        return [row[-1] for row in cursor.fetchall()]
+    except sqlite3.Error:
+        return []
+
+
+def get_log_path():
+    return Path(getattr(settings, 'SLOW_QUERY_LOG',
+                        settings.BASE_DIR / 'slow_queries.log'))
+
+
+def write_entry(entry):
+    """Дописать запись в журнал медленных запросов."""
+    append_json_line(get_log_path(), entry)
+
+
+def read_entries(path=None):
+    """Прочитать записи журнала медленных запросов."""
+    return read_json_lines(path or get_log_path())
+
+
+class SlowQueryListener:
+    """Подписчик на замеры запросов к БД."""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold = threshold_ms / 1000
+
+    @contextmanager
+    def __call__(self, kind, name, attrs):
+        if kind != 'db':
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.log(name, attrs, duration)
+
+    def log(self, sql, attrs, duration):
+        plan = []
+        if not attrs.get('many'):
+            plan = explain_query_plan(attrs['alias'], sql, attrs['params'])
+        entry = {
+            'time': time.time(),
+            'view': get_view_name(self.request),
+            'fingerprint': fingerprint(sql),
+            'sql': normalize_sql(sql),
+            'duration_ms': round(duration * 1000, 3),
+            'plan': plan,
+        }
+        logger.warning('Медленный запрос %s (%.1f мс) в %s: %s',
+                       entry['fingerprint'], entry['duration_ms'],
+                       entry['view'], entry['sql'])
+        write_entry(entry)
+
+
+class SlowQueryLogMiddleware:
+    """Записывает медленные запросы к БД в журнал."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        self.get_response = get_response
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS',
+                                    DEFAULT_THRESHOLD_MS)
+
+    def __call__(self, request):
+        with instrumentation.collect_stats() as stats:
+            listener = SlowQueryListener(request, self.threshold_ms)
+            stats.listeners.append(listener)
+            try:
+                return self.get_response(request)
+            finally:
+                stats.listeners.remove(listener)
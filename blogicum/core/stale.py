@@ -0,0 +1,212 @@
+"""Модуль для отдачи устаревших страниц при недоступной БД.
+
+При ``STALE_ON_ERROR_ENABLED`` ``StaleOnErrorMiddleware`` запоминает в
+кэше последнюю удачно отрисованную версию страниц из ``STALE_VIEWS``
+(не чаще раза в ``STALE_STORE_INTERVAL`` секунд на адрес и
+пользователя). Запросы к БД SQLite в этих представлениях ограничены
+сроком ``STALE_DEADLINE``: обработчик прогресса SQLite прерывает долгий
+запрос, а ``busy_timeout`` не даёт ждать блокировку дольше срока.
+
+Если БД заблокирована или не уложилась в срок, вместо ошибки 500
+отдаётся сохранённая страница с заголовками ``Age`` и ``Warning``.
+После ``STALE_FAILURE_THRESHOLD`` таких ошибок подряд размыкается
+предохранитель: ``STALE_RESET_TIMEOUT`` секунд сохранённые страницы
+отдаются сразу, без обращения к БД, а затем один запрос проверяет,
+восстановилась ли она.
+"""
+import hashlib
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+
+from core.db.retry import is_locked_error
+from core.metrics import get_view_name, registry
+
+PROGRESS_STEPS = 1000
+STALE_WARNING = '110 - "Response is Stale"'
+MAX_STORED_KEYS = 10000
+
+
+def is_enabled():
+    return getattr(settings, 'STALE_ON_ERROR_ENABLED', False)
+
+
+def is_unavailable_error(error):
+    """Заблокирована ли БД или прерван ли запрос по сроку."""
+    return is_locked_error(error) or (
+        isinstance(error, OperationalError) and 'interrupted' in str(error)
+    )
+
+
+class CircuitBreaker:
+    """Предохранитель: размыкается после череды ошибок подряд."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        """Разомкнут ли; по истечении паузы пропускает один запрос."""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return True
+            # Полуразомкнутое состояние: следующая ошибка снова
+            # разомкнёт предохранитель на полную паузу.
+            self.opened_at = time.monotonic()
+            return False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+
+class Deadline:
+    """Обёртка запросов к БД, прерывающая их по истечении срока."""
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+        self.prepared = {}
+
+    def expired(self):
+        return time.monotonic() > self.expires
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        raw = connection.connection
+        if connection.vendor == 'sqlite' and raw not in self.prepared:
+            remaining = max(self.expires - time.monotonic(), 0)
+            raw.execute(f'PRAGMA busy_timeout = {int(remaining * 1000)}')
+            self.prepared[raw] = getattr(
+                connection, 'pragmas', {}
+            ).get('busy_timeout', 5000)
+            raw.set_progress_handler(self.expired, PROGRESS_STEPS)
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        """Вернуть соединениям обычные настройки."""
+        for raw, busy_timeout in self.prepared.items():
+            raw.set_progress_handler(None, 0)
+            raw.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+        self.prepared.clear()
+
+
+class StaleOnErrorMiddleware:
+    """Отдаёт последнюю удачную версию страницы, если БД недоступна."""
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.views = set(getattr(settings, 'STALE_VIEWS', ()))
+        self.deadline = getattr(settings, 'STALE_DEADLINE', 2)
+        self.store_interval = getattr(settings, 'STALE_STORE_INTERVAL', 30)
+        self.max_age = getattr(settings, 'STALE_MAX_AGE', 24 * 60 * 60)
+        self.breaker = CircuitBreaker(
+            getattr(settings, 'STALE_FAILURE_THRESHOLD', 5),
+            getattr(settings, 'STALE_RESET_TIMEOUT', 30),
+        )
+        self._stored = {}
+
+    def get_key(self, request, user_id=None):
+        if user_id is None:
+            user_id = request.user.pk or 0
+        path = request.get_full_path().encode()
+        return f'stale:{hashlib.md5(path).hexdigest()}:{user_id}'
+
+    def __call__(self, request):
+        request._stale_key = None
+        with ExitStack() as request._stale_stack:
+            response = self.get_response(request)
+        key = request._stale_key
+        if key is not None and response.status_code == 200:
+            self.breaker.record_success()
+            self.store(key, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or get_view_name(request) not in self.views):
+            return None
+        # Срок действует до конца запроса, включая чтение сессии и
+        # пользователя для ключа и отрисовку шаблона.
+        deadline = Deadline(self.deadline)
+        stack = request._stale_stack
+        stack.callback(deadline.reset)
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(deadline))
+        try:
+            request._stale_key = self.get_key(request)
+        except OperationalError as error:
+            # Ошибка из process_view не попадает в process_exception.
+            if not is_unavailable_error(error):
+                raise
+            # Пользователя не узнать: отдаём страницу для анонимов.
+            request._stale_key = self.get_key(request, user_id=0)
+            self.breaker.record_failure()
+            response = self.stale_response(request, 'error')
+            if response is None:
+                raise
+            request._stale_key = None
+            return response
+        if self.breaker.is_open():
+            response = self.stale_response(request, 'breaker')
+            if response is not None:
+                request._stale_key = None
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        if request._stale_key is None or not is_unavailable_error(
+            exception
+        ):
+            return None
+        self.breaker.record_failure()
+        response = self.stale_response(request, 'error')
+        if response is not None:
+            request._stale_key = None
+        return response
+
+    def store(self, key, response):
+        now = time.monotonic()
+        if now - self._stored.get(key, -self.store_interval) < (
+            self.store_interval
+        ):
+            return
+        if len(self._stored) > MAX_STORED_KEYS:
+            self._stored.clear()
+        self._stored[key] = now
+        cache.set(
+            key,
+            (response.content, response['Content-Type'], time.time()),
+            self.max_age,
+        )
+
+    def stale_response(self, request, reason):
+        stored = cache.get(request._stale_key)
+        if stored is None:
+            return None
+        content, content_type, stored_at = stored
+        registry.inc('blogicum_stale_responses_total',
+                     {'view': get_view_name(request), 'reason': reason})
+        response = HttpResponse(content, content_type=content_type)
+        response['Age'] = int(time.time() - stored_at)
+        response['Warning'] = STALE_WARNING
+        return response
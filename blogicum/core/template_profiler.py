@@ -0,0 +1,113 @@
+"""Модуль для профилирования рендеринга шаблонов.
+
+Для каждого запроса замеряются шаблоны (в том числе подключённые через
+``{% include %}``) и теги ``simple_tag``/``inclusion_tag``. В журнал
+``TEMPLATE_PROFILE_LOG`` пишется сводка запроса и свёрнутые стеки
+в формате flamegraph.pl. Сводку по представлениям выводит команда
+``manage.py template_profile``.
+"""
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import instrumentation
+from core.jsonlog import append_json_line, read_json_lines
+from core.metrics import get_view_name
+
+PROFILED_KINDS = ('template', 'node')
+
+
+def get_log_path():
+    return Path(getattr(settings, 'TEMPLATE_PROFILE_LOG',
+                        settings.BASE_DIR / 'template_profile.log'))
+
+
+def read_entries(path=None):
+    """Прочитать записи журнала профилирования шаблонов."""
+    return read_json_lines(path or get_log_path())
+
+
+class TemplateProfile:
+    """Профиль рендеринга шаблонов одного запроса."""
+
+    def __init__(self):
+        self.stack = []
+        self.templates = {}
+        self.stacks = {}
+
+    @contextmanager
+    def __call__(self, kind, name, attrs):
+        if kind not in PROFILED_KINDS:
+            yield
+            return
+        frame = {'name': name, 'children': 0.0}
+        self.stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            self.stack.pop()
+            # Одинаковые шаблоны во вложенных вызовах учитываются в общем
+            # времени только один раз, как в cProfile.
+            is_recursive = any(item['name'] == name for item in self.stack)
+            if self.stack:
+                self.stack[-1]['children'] += duration
+            own = duration - frame['children']
+            template = self.templates.setdefault(
+                name, {'calls': 0, 'total_ms': 0.0, 'self_ms': 0.0}
+            )
+            template['calls'] += 1
+            template['self_ms'] += own * 1000
+            if not is_recursive:
+                template['total_ms'] += duration * 1000
+            path = ';'.join(
+                [item['name'] for item in self.stack] + [name]
+            )
+            self.stacks[path] = self.stacks.get(path, 0) + int(own * 1e6)
+
+    def as_entry(self, view, total):
+        return {
+            'time': time.time(),
+            'view': view,
+            'total_ms': round(total * 1000, 3),
+            'templates': {
+                name: {
+                    'calls': data['calls'],
+                    'total_ms': round(data['total_ms'], 3),
+                    'self_ms': round(data['self_ms'], 3),
+                }
+                for name, data in self.templates.items()
+            },
+            'stacks': self.stacks,
+        }
+
+
+class TemplateProfilerMiddleware:
+    """Профилирует рендеринг шаблонов каждого запроса."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TEMPLATE_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        instrumentation.install_template_nodes()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with instrumentation.collect_stats() as stats:
+            profile = TemplateProfile()
+            stats.listeners.append(profile)
+            try:
+                response = self.get_response(request)
+            finally:
+                stats.listeners.remove(profile)
+            render_time = stats.durations['template']
+        if profile.templates:
+            append_json_line(
+                get_log_path(),
+                profile.as_entry(get_view_name(request), render_time),
+            )
+        return response
@@ -0,0 +1,235 @@
+"""Модуль для локальной трассировки запросов.
+
+Для запроса строится дерево вложенных интервалов (span): обработка
+запроса, представление, каждый SQL-запрос, рендеринг шаблонов и
+обращения к кэшу. Трассы пишутся в файл ``TRACING_FILE`` с ротацией,
+по одной на строку, в формате OTLP JSON (как у файлового экспортёра
+OpenTelemetry). Самые медленные трассы показывает ``manage.py traces``.
+
+Интервал запроса открывает ``TracingMiddleware``, интервал
+представления — ``ViewSpanMiddleware`` в конце ``MIDDLEWARE``.
+"""
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import instrumentation
+from core.metrics import get_view_name
+from core.warmup import is_warmup_request
+
+logger = logging.getLogger('blogicum.tracing')
+
+SERVICE_NAME = 'blogicum'
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+
+def get_trace_file():
+    return Path(getattr(settings, 'TRACING_FILE',
+                        settings.BASE_DIR / 'traces' / 'traces.jsonl'))
+
+
+def configure_logger():
+    """Направить журнал трасс в файл TRACING_FILE с ротацией."""
+    path = get_trace_file()
+    for handler in list(logger.handlers):
+        if getattr(handler, 'baseFilename', None) == str(path.absolute()):
+            return
+        logger.removeHandler(handler)
+        handler.close()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=getattr(settings, 'TRACING_MAX_BYTES', 10 * 1024 * 1024),
+        backupCount=getattr(settings, 'TRACING_BACKUP_COUNT', 5),
+        encoding='utf-8',
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    """Интервал трассы."""
+
+    def __init__(self, trace_id, name, parent=None, kind=SPAN_KIND_INTERNAL,
+                 **attributes):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else ''
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.time_ns()
+
+    def as_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or time.time_ns()),
+            'attributes': [
+                _attribute(key, value)
+                for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error:
+            span['status'] = {'code': STATUS_CODE_ERROR,
+                              'message': self.error}
+        return span
+
+
+class Trace:
+    """Трасса одного запроса; подписчик на замеры слоёв."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self.stack = []
+
+    def start_span(self, name, **kwargs):
+        parent = self.stack[-1] if self.stack else None
+        span = Span(self.trace_id, name, parent, **kwargs)
+        self.spans.append(span)
+        self.stack.append(span)
+        return span
+
+    def finish_span(self, span):
+        span.finish()
+        if span in self.stack:
+            self.stack.remove(span)
+
+    @contextmanager
+    def __call__(self, kind, name, attrs):
+        if kind == 'db':
+            span = self.start_span(
+                ' '.join(name.split()[:1]) or 'SQL',
+                kind=SPAN_KIND_CLIENT,
+                **{'db.system': 'sqlite', 'db.statement': name,
+                   'db.name': attrs['alias']},
+            )
+        elif kind == 'cache':
+            span = self.start_span(f'cache {name}', kind=SPAN_KIND_CLIENT)
+        else:
+            span = self.start_span(f'{kind} {name}')
+        try:
+            yield
+        except Exception as error:
+            span.error = repr(error)
+            raise
+        finally:
+            self.finish_span(span)
+
+    def as_otlp(self):
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                _attribute('service.name', SERVICE_NAME),
+                _attribute('process.pid', os.getpid()),
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.as_otlp() for span in self.spans],
+            }],
+        }]}
+
+
+class TracingMiddleware:
+    """Трассирует запросы и пишет трассы в файл."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACING_ENABLED', False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        instrumentation.install_cache()
+        configure_logger()
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'TRACING_SAMPLE_RATE', 1)
+
+    def __call__(self, request):
+        if (random.random() >= self.sample_rate
+                or is_warmup_request(request)):
+            return self.get_response(request)
+        trace = Trace()
+        root = trace.start_span(
+            f'{request.method} {request.path}',
+            kind=SPAN_KIND_SERVER,
+            **{'http.method': request.method, 'http.target': request.path},
+        )
+        request._trace = trace
+        with instrumentation.collect_stats() as stats:
+            stats.listeners.append(trace)
+            try:
+                response = self.get_response(request)
+            except Exception as error:
+                root.error = repr(error)
+                raise
+            finally:
+                stats.listeners.remove(trace)
+                for span in reversed(trace.stack):
+                    span.finish()
+                view = get_view_name(request)
+                root.name = f'{request.method} {view}'
+                root.attributes['http.route'] = view
+                if not root.error:
+                    root.attributes['http.status_code'] = (
+                        response.status_code
+                    )
+                logger.info(json.dumps(trace.as_otlp(), ensure_ascii=False))
+        return response
+
+
+class ViewSpanMiddleware:
+    """Интервал представления вместе с отрисовкой его шаблона.
+
+    Должен стоять последним в ``MIDDLEWARE``: тогда в интервал не попадает
+    обработка ответа другими middleware (сохранение сессии, журнал
+    медленных запросов и т. п.).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = getattr(request, '_trace', None)
+        if trace is None:
+            return self.get_response(request)
+        span = trace.start_span('view')
+        try:
+            return self.get_response(request)
+        finally:
+            # Адрес разрешается внутри get_response, имя известно после.
+            span.name = f'view {get_view_name(request)}'
+            trace.finish_span(span)
@@ -0,0 +1,57 @@
+"""Модуль для служебных представлений."""
+from hmac import compare_digest
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden
+)
+from django.shortcuts import render
+
+from core import metrics as metrics_module
+from core import profiling
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def has_metrics_access(request):
+    """Доступ к метрикам есть у персонала и у владельца токена."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorization = request.headers.get('Authorization', '')
+    if token and compare_digest(authorization, f'Bearer {token}'):
+        return True
+    return request.user.is_active and request.user.is_staff
+
+
+def metrics(request):
+    """Метрики всех процессов в формате Prometheus."""
+    if not has_metrics_access(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_module.render(metrics_module.collect()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@staff_member_required
+def profile_list(request):
+    """Список сохранённых профилей, сгруппированный по представлениям."""
+    groups = {}
+    for profile in profiling.list_profiles():
+        groups.setdefault(profile['view'], []).append(profile)
+    context = dict(
+        admin.site.each_context(request),
+        title='Профили запросов',
+        groups=sorted(groups.items()),
+    )
+    return render(request, 'admin/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, name):
+    """Скачать файл профиля."""
+    path = profiling.get_profile_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
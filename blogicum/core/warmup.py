@@ -0,0 +1,113 @@
+"""Модуль для прогрева процесса перед приёмом запросов.
+
+``warm_up`` заранее делает то, что иначе досталось бы первому запросу:
+загружает URLconf со всеми представлениями, компилирует шаблоны и
+выполняет запросы к ``WARMUP_URLS``, которые заполняют кэши. Затем
+соединения с БД закрываются, чтобы их не унаследовали процессы,
+созданные fork после прогрева.
+
+Запросы прогрева передаются WSGI-приложению напрямую, без клиента
+тестов: ``django.test`` тянет за собой unittest и замедлил бы запуск.
+Метрики и трассировка такие запросы не учитывают.
+"""
+import logging
+import os
+import time
+from functools import partial
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger('blogicum.warmup')
+
+WARMUP_ENVIRON_KEY = 'blogicum.warmup'
+
+
+def is_warmup_request(request):
+    """Выполняется ли запрос при прогреве."""
+    return request.META.get(WARMUP_ENVIRON_KEY, False)
+
+
+def load_urlconf():
+    resolver = get_resolver()
+    # reverse_dict импортирует все представления и строит таблицы URL.
+    resolver.reverse_dict
+
+
+def load_templates():
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if not name.endswith(('.html', '.txt')):
+                        continue
+                    template_name = os.path.relpath(
+                        os.path.join(root, name), directory
+                    )
+                    try:
+                        engine.get_template(template_name)
+                    except TemplateSyntaxError:
+                        logger.warning('Шаблон %s не компилируется.',
+                                       template_name)
+
+
+def request_urls(application=None):
+    """Выполнить запросы к WARMUP_URLS; вернуть статусы ответов."""
+    application = application or WSGIHandler()
+    responses = {}
+    host = next(
+        (host for host in settings.ALLOWED_HOSTS if '*' not in host),
+        'localhost',
+    )
+    for url in getattr(settings, 'WARMUP_URLS', ['/']):
+        path, _, query = url.partition('?')
+        environ = {
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'HTTP_HOST': host,
+            WARMUP_ENVIRON_KEY: True,
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+            return lambda data: None
+
+        result = application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        responses[url] = statuses[0] if statuses else None
+        if statuses and statuses[0] >= 500:
+            logger.warning('Прогрев %s: ответ %s.', url, statuses[0])
+    return responses
+
+
+def warm_up(application=None):
+    """Прогреть процесс; вернуть длительность этапов в секундах.
+
+    Запросы выполняет application, а без него — новый ``WSGIHandler``.
+    """
+    phases = (
+        ('urlconf', load_urlconf),
+        ('templates', load_templates),
+        ('requests', partial(request_urls, application)),
+    )
+    timings = {}
+    for name, phase in phases:
+        started = time.perf_counter()
+        phase()
+        timings[name] = time.perf_counter() - started
+    connections.close_all()
+    logger.info('Прогрев: %s.', ', '.join(
+        f'{name} {seconds * 1000:.0f} мс' for name, seconds in timings.items()
+    ))
+    return timings
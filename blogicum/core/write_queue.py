@@ -0,0 +1,217 @@
+"""Модуль для последовательной записи в SQLite через одну очередь.
+
+При ``WRITE_QUEUE_ENABLED`` изменения из представлений блога не пишутся
+в БД из потока запроса, а передаются писателю — отдельному потоку
+процесса. Писатель собирает накопившиеся задания в пачки до
+``WRITE_QUEUE_BATCH_SIZE`` штук, при необходимости ожидая следующие до
+``WRITE_QUEUE_BATCH_WINDOW`` секунд, и фиксирует пачку одной
+транзакцией; каждое задание выполняется в своей точке сохранения, так
+что ошибка одного не отменяет остальные. Поток запроса ждёт фиксации
+своего задания и получает его результат.
+
+Задание, которое писатель не начал за ``WRITE_QUEUE_TIMEOUT`` секунд,
+отменяется, и ``submit`` выбрасывает ``WriteQueueTimeout``: запись
+точно не произойдёт, и представление отвечает 503. Уже начатое задание
+ждут до конца, чтобы не сообщить об ошибке записи, которая пройдёт.
+
+Писатели разных процессов узла по очереди берут блокировку на файл
+``WRITE_QUEUE_LOCK_FILE``, поэтому за блокировку SQLite они не борются.
+"""
+import fcntl
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.db.retry import atomic_with_retry, is_locked_error
+from core.metrics import registry
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class WriteQueueTimeout(TimeoutError):
+    """Писатель не начал задание вовремя, и оно отменено."""
+
+
+class _WriteTask:
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = False
+        self.abandoned = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Отметить задание начатым, если его ещё не отменили."""
+        with self._lock:
+            if not self.abandoned:
+                self.started = True
+            return self.started
+
+    def abandon(self):
+        """Отменить задание, если писатель его ещё не начал."""
+        with self._lock:
+            if not self.started:
+                self.abandoned = True
+            return self.abandoned
+
+
+class WriteQueue:
+    """Очередь записи с одним потоком-писателем на процесс."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=32,
+                 batch_window=0, timeout=30, lock_file=None):
+        self.using = using
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.lock_file = lock_file
+        self._lock = threading.Lock()
+        self._tasks = None
+        self._thread = None
+        self._pid = None
+
+    def _ensure_writer(self):
+        # После fork поток-писатель не наследуется: запускаем свой.
+        with self._lock:
+            if (self._thread is not None and self._pid == os.getpid()
+                    and self._thread.is_alive()):
+                return
+            self._tasks = queue.Queue()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._tasks,),
+                name=f'write-queue-{self.using}', daemon=True,
+            )
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Выполнить func у писателя и дождаться фиксации.
+
+        Из потока писателя и внутри уже открытой транзакции функция
+        выполняется сразу: иначе запись ждала бы саму себя.
+        """
+        if (threading.current_thread() is self._thread
+                or connections[self.using].in_atomic_block):
+            return func(*args, **kwargs)
+        self._ensure_writer()
+        task = _WriteTask(func, args, kwargs)
+        self._tasks.put(task)
+        if not task.done.wait(self.timeout):
+            if task.abandon():
+                raise WriteQueueTimeout(
+                    'Очередь записи не начала задание вовремя.'
+                )
+            task.done.wait()
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def stop(self):
+        """Остановить писателя после уже поставленных заданий."""
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                return
+            self._tasks.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, tasks):
+        while True:
+            task = tasks.get()
+            if task is None:
+                connections[self.using].close()
+                return
+            batch = [task]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        task = tasks.get(timeout=timeout)
+                    else:
+                        task = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is None:
+                    tasks.put(None)
+                    break
+                batch.append(task)
+            batch = [task for task in batch if task.start()]
+            if not batch:
+                continue
+            try:
+                with self._node_lock():
+                    atomic_with_retry(self._run_batch, batch,
+                                      using=self.using)
+            except Exception as error:
+                for task in batch:
+                    task.error = error
+            finally:
+                connections[self.using].close_if_unusable_or_obsolete()
+            registry.observe('blogicum_write_queue_batch_size',
+                             {'database': self.using}, len(batch),
+                             BATCH_SIZE_BUCKETS)
+            for task in batch:
+                task.done.set()
+
+    def _run_batch(self, batch):
+        for task in batch:
+            task.result = task.error = None
+            try:
+                with transaction.atomic(using=self.using):
+                    task.result = task.func(*task.args, **task.kwargs)
+            except Exception as error:
+                if is_locked_error(error):
+                    # Повторяем всю пачку.
+                    raise
+                task.error = error
+
+    @contextmanager
+    def _node_lock(self):
+        if self.lock_file is None:
+            yield
+            return
+        with open(self.lock_file, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_write_queues = {}
+
+
+def is_enabled():
+    return getattr(settings, 'WRITE_QUEUE_ENABLED', False)
+
+
+def get_write_queue(using=DEFAULT_DB_ALIAS):
+    """Очередь записи в БД using по настройкам проекта."""
+    if using not in _write_queues:
+        lock_file = getattr(settings, 'WRITE_QUEUE_LOCK_FILE', None)
+        if lock_file is not None and using != DEFAULT_DB_ALIAS:
+            # У каждой БД своя блокировка записи.
+            lock_file = f'{lock_file}.{using}'
+        _write_queues[using] = WriteQueue(
+            using=using,
+            batch_size=getattr(settings, 'WRITE_QUEUE_BATCH_SIZE', 32),
+            batch_window=getattr(settings, 'WRITE_QUEUE_BATCH_WINDOW', 0),
+            timeout=getattr(settings, 'WRITE_QUEUE_TIMEOUT', 30),
+            lock_file=lock_file,
+        )
+    return _write_queues[using]
+
+
+def submit(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    return get_write_queue(using).submit(func, *args, **kwargs)
@@ -4,6 +4,12 @@ from . import views
 
 app_name = 'pages'
 
+# Максимальное число SQL-запросов при обращении к странице.
+QUERY_BUDGETS = {
+    'about': 2,
+    'rules': 2,
+}
+
 urlpatterns = [
     path('about/', views.About.as_view(), name='about'),
     path('rules/', views.Rules.as_view(), name='rules'),
@@ -18,6 +18,7 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db.models import Model, Field
 from django.forms import BaseForm
@@ -41,6 +42,36 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def metrics_in_tmp_path(tmp_path):
+    with override_settings(METRICS_DIR=tmp_path / "metrics"):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def node_files_in_tmp_path(tmp_path):
+    from core import maintenance
+
+    caches = {
+        alias: dict(options) for alias, options in settings.CACHES.items()
+    }
+    caches["shared"]["LOCATION"] = tmp_path / "cache.sqlite3"
+    with override_settings(
+        CACHES=caches,
+        WRITE_QUEUE_LOCK_FILE=tmp_path / "write_queue.lock",
+        MAINTENANCE_FLAG_FILE=tmp_path / "maintenance.flag",
+    ):
+        # Флаг обслуживания мог быть прочитан в прошлом тесте.
+        maintenance.reset()
+        yield
+
+
+@pytest.fixture(autouse=True)
+def enable_nplusone_raise():
+    with override_settings(NPLUSONE_MODE="raise"):
+        yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
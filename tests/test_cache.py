@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    from core.cache.backends.sqlite import SQLiteCache
+
+    return SQLiteCache(
+        tmp_path / "cache.sqlite3",
+        {"OPTIONS": {"MAX_ENTRIES": 10, "CULL_FREQUENCY": 2}},
+    )
+
+
+def test_sqlite_cache_basic_operations(sqlite_cache, tmp_path):
+    from core.cache.backends.sqlite import SQLiteCache
+
+    sqlite_cache.set("post", {"title": "Пост"})
+    assert SQLiteCache(tmp_path / "cache.sqlite3", {}).get("post") == {
+        "title": "Пост"
+    }, "Убедитесь, что кэш в файле SQLite общий для всех экземпляров."
+    assert not sqlite_cache.add("post", "другое")
+    assert sqlite_cache.add("new", 1)
+    assert sqlite_cache.get_many(["post", "new", "missing"]) == {
+        "post": {"title": "Пост"}, "new": 1,
+    }
+    sqlite_cache.set("expired", 1, timeout=-1)
+    assert sqlite_cache.get("expired", "нет") == "нет", (
+        "Убедитесь, что просроченные записи не отдаются."
+    )
+    assert sqlite_cache.delete("post")
+    assert not sqlite_cache.has_key("post")
+
+
+def test_sqlite_cache_atomic_incr(sqlite_cache):
+    sqlite_cache.set("counter", 0)
+    threads = [
+        threading.Thread(target=lambda: [
+            sqlite_cache.incr("counter") for _ in range(50)
+        ])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sqlite_cache.get("counter") == 200, (
+        "Убедитесь, что `incr` атомарен при одновременных обращениях."
+    )
+
+
+def test_sqlite_cache_lru_and_tags(sqlite_cache):
+    from core.cache.backends import sqlite
+
+    sqlite.ACCESS_RESOLUTION, resolution = -1, sqlite.ACCESS_RESOLUTION
+    try:
+        for number in range(10):
+            sqlite_cache.set(f"key{number}", number)
+        sqlite_cache.get("key0")
+        sqlite_cache.set("key10", 10)
+    finally:
+        sqlite.ACCESS_RESOLUTION = resolution
+    assert sqlite_cache.has_key("key0"), (
+        "Убедитесь, что при вытеснении остаются недавно прочитанные"
+        " записи."
+    )
+    assert not sqlite_cache.has_key("key1")
+
+    sqlite_cache.set("index", "лента", tags=["posts"])
+    sqlite_cache.set("category", "категория", tags=["posts", "categories"])
+    sqlite_cache.set("profile", "профиль", tags=["users"])
+    assert sqlite_cache.invalidate_tags("posts") == 2
+    assert sqlite_cache.get_many(["index", "category", "profile"]) == {
+        "profile": "профиль"
+    }, "Убедитесь, что `invalidate_tags` удаляет записи только с тегом."
+
+
+def test_sqlite_cache_entry_count(sqlite_cache):
+    for number in range(25):
+        sqlite_cache.set(f"key{number}", number)
+    sqlite_cache.set("key24", "новое значение")
+    sqlite_cache.add("key24", "не добавится")
+    sqlite_cache.delete("key24")
+    connection = sqlite_cache._connection()
+    entries, = connection.execute("SELECT entries FROM cache_count").fetchone()
+    count, = connection.execute("SELECT COUNT(*) FROM cache_entry").fetchone()
+    assert entries == count <= 10, (
+        "Убедитесь, что число записей кэша ведётся без подсчёта всей"
+        " таблицы и вытеснение его соблюдает."
+    )
+
+
+def test_cache_benchmark_command(capsys):
+    call_command(
+        "cache_benchmark", "--workers=2", "--operations=50", "--keys=20",
+    )
+    output = capsys.readouterr().out
+    for backend in ("locmem", "filebased", "sqlite"):
+        assert backend in output
+
+
+def test_tiered_cache_levels_and_generation(tmp_path):
+    from django.core.cache import caches
+    from django.test import override_settings
+
+    from core.cache.backends.tiered import TieredCache
+    from core.metrics import registry
+
+    def hits(level):
+        return registry.counters.get((
+            "blogicum_cache_requests_total",
+            (("level", level), ("result", "hit")),
+        ), 0)
+
+    shared = {
+        "BACKEND": "core.cache.backends.sqlite.SQLiteCache",
+        "LOCATION": tmp_path / "cache.sqlite3",
+    }
+    with override_settings(CACHES={"default": shared, "shared": shared}):
+        params = {"OPTIONS": {"GENERATION_CHECK_INTERVAL": 0}}
+        first, second = TieredCache(None, params), TieredCache(None, params)
+        first.set("index", "лента")
+        l1_hits, l2_hits = hits("l1"), hits("l2")
+        assert second.get("index") == "лента"
+        assert second.get("index") == "лента"
+        assert (hits("l1") - l1_hits, hits("l2") - l2_hits) == (1, 1), (
+            "Убедитесь, что значение из L2 запоминается в L1 процесса и"
+            " попадания считаются по уровням."
+        )
+        caches["shared"].set("index", "новая лента")
+        assert second.get("index") == "лента"
+        first.delete("other")
+        assert second.get("index") == "новая лента", (
+            "Убедитесь, что смена поколения в L2 сбрасывает L1 всех"
+            " экземпляров кэша."
+        )
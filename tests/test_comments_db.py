@@ -0,0 +1,99 @@
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True, databases=["default", "comments"]),
+]
+
+
+@pytest.fixture
+def post(mixer):
+    return mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+
+
+@override_settings(COMMENTS_DATABASE="comments")
+def test_comments_in_separate_db(post):
+    from blog.models import Comment
+
+    client = Client()
+    client.force_login(post.author)
+    response = client.post(
+        f"/posts/{post.id}/comment/", {"text": "В отдельной БД"}
+    )
+    assert response.status_code == 302
+    assert Comment.objects.using("comments").filter(post=post).exists(), (
+        "Убедитесь, что при заданном `COMMENTS_DATABASE` комментарии"
+        " сохраняются в отдельную БД."
+    )
+    assert not Comment.objects.using("default").exists()
+
+    response = client.get("/")
+    assert response.context["page_obj"][0].comment_count == 1, (
+        "Убедитесь, что число комментариев в ленте считается и для"
+        " комментариев из отдельной БД."
+    )
+    response = client.get(f"/posts/{post.id}/")
+    assert "В отдельной БД" in response.content.decode()
+
+    post.delete()
+    assert not Comment.objects.exists(), (
+        "Убедитесь, что при удалении поста удаляются и его комментарии"
+        " из отдельной БД."
+    )
+
+
+def test_move_comments(post, mixer):
+    from datetime import datetime, timezone
+
+    from blog.models import Comment
+
+    created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    mixer.cycle(3).blend("blog.Comment", post=post, author=post.author)
+    Comment.objects.update(created_at=created_at)
+    orphan = mixer.blend("blog.Post")
+    orphan_id = orphan.id
+    with override_settings(COMMENTS_DATABASE="comments"):
+        orphan.delete()
+        Comment.objects.using("comments").create(
+            post_id=orphan_id, author=post.author, text="Осиротевший"
+        )
+        call_command("move_comments", "--chunk-size=2", "--prune-orphans")
+        comments = Comment.objects.using("comments")
+        assert set(comments.values_list("post_id", flat=True)) == {
+            post.id
+        }, (
+            "Убедитесь, что `move_comments` переносит комментарии и удаляет"
+            " комментарии к удалённым постам."
+        )
+        assert comments.count() == 3, (
+            "Убедитесь, что `move_comments` не теряет комментарии, номера"
+            " которых уже заняты в отдельной БД."
+        )
+        assert set(comments.values_list("created_at", flat=True)) == {
+            created_at
+        }, "Убедитесь, что при переносе даты комментариев не меняются."
+    assert not Comment.objects.using("default").exists()
+
+
+def test_move_comments_rerun(post, mixer):
+    from blog.models import Comment
+
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post, author=post.author
+    )
+    with override_settings(COMMENTS_DATABASE="comments"):
+        # Прерванный запуск успел скопировать порцию, но не удалить её.
+        from core.db.copy import copy_rows
+
+        copy_rows(Comment, comments[:2], "comments")
+        call_command("move_comments", "--chunk-size=2")
+        assert sorted(
+            Comment.objects.using("comments").values_list("id", flat=True)
+        ) == sorted(comment.id for comment in comments), (
+            "Убедитесь, что повторный запуск `move_comments` не дублирует"
+            " уже скопированные комментарии."
+        )
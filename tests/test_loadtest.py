@@ -0,0 +1,138 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from conftest import N_PER_FIXTURE
+
+
+def test_percentile():
+    from core.loadtest import percentile
+
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.9) == 0.0
+
+
+def test_replay_log_rejects_no_users(tmp_path):
+    from django.core.management.base import CommandError
+
+    log = tmp_path / "access.log"
+    log.write_text(
+        '127.0.0.1 - alice [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1"'
+        ' 200 1\n'
+    )
+    with pytest.raises(CommandError, match="--users"):
+        call_command("replay_log", str(log), "--users", "0")
+
+
+def test_is_error():
+    from core.loadtest import is_error
+
+    for status in (0, 403, 404, 500):
+        assert is_error(status), (
+            f"Убедитесь, что ответ {status} считается ошибкой нагрузки."
+        )
+    assert not is_error(302)
+    assert is_error(200, expected={302}), (
+        "Убедитесь, что ответ не из ожидаемых сценарием считается ошибкой."
+    )
+    assert not is_error(404, expected={404})
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest_command(live_server, mixer, tmp_path):
+    mixer.cycle(N_PER_FIXTURE).blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    report = tmp_path / "report.json"
+    out = StringIO()
+    call_command(
+        "loadtest",
+        "--url", live_server.url,
+        "--requests", "60",
+        "--concurrency", "4",
+        "--users", "2",
+        "--auth-share", "0.5",
+        "--mix", "index=1,index_deep=1,category=1,profile=1,detail=1,"
+                 "comment=1",
+        "--seed", "1",
+        "--json", str(report),
+        stdout=out,
+    )
+    summary = json.loads(report.read_text())["summary"]
+    assert summary["TOTAL"]["requests"] == 60, (
+        "Убедитесь, что команда `loadtest` выполняет заданное число запросов."
+    )
+    assert summary["TOTAL"]["errors"] == 0, (
+        "Убедитесь, что при нагрузке сайт отвечает без ошибок:\n"
+        + out.getvalue()
+    )
+    assert "comment" in summary, (
+        "Убедитесь, что авторизованные пользователи оставляют комментарии."
+    )
+    assert "TOTAL" in out.getvalue()
+
+    from blog.models import Comment
+
+    assert Comment.objects.count() == summary["comment"]["requests"], (
+        "Убедитесь, что комментарии при нагрузке действительно сохраняются."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay_log_command(live_server, mixer, tmp_path):
+    posts = mixer.cycle(2).blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    log = tmp_path / "access.log"
+    log.write_text(
+        '127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 1\n'
+        f'127.0.0.1 - alice [19/Oct/2026:10:00:01 +0000] '
+        f'"GET /posts/{posts[0].id}/ HTTP/1.1" 200 1\n'
+        f'127.0.0.1 - alice [19/Oct/2026:10:00:02 +0000] '
+        f'"POST /posts/{posts[0].id}/comment/ HTTP/1.1" 302 1\n'
+        '127.0.0.1 - bob [19/Oct/2026:10:00:03 +0000] '
+        '"POST /posts/create/ HTTP/1.1" 302 1\n'
+        '127.0.0.1 - - [19/Oct/2026:10:00:04 +0000] "GET /missing/ HTTP/1.1"'
+        ' 404 1\n'
+    )
+    reports = []
+    for label in ("base", "new"):
+        report = tmp_path / f"{label}.json"
+        call_command(
+            "replay_log", str(log),
+            "--url", live_server.url,
+            "--max-rate",
+            "--concurrency", "2",
+            "--label", label,
+            "--json", str(report),
+            stdout=StringIO(),
+        )
+        reports.append(report)
+    summary = json.loads(reports[0].read_text())["summary"]
+    assert summary["TOTAL"]["requests"] == 4, (
+        "Убедитесь, что `replay_log` воспроизводит запросы журнала и"
+        " пропускает изменяющие запросы, тело которых неизвестно."
+    )
+    assert summary["TOTAL"]["errors"] == 0
+    assert {"blog:index", "blog:post_detail", "blog:add_comment",
+            "<unresolved>"} <= set(summary), (
+        "Убедитесь, что задержки в `replay_log` группируются по маршрутам."
+    )
+
+    from blog.models import Comment
+
+    assert Comment.objects.count() == 2, (
+        "Убедитесь, что запросы авторизованных пользователей журнала"
+        " выполняются от имени сгенерированных пользователей."
+    )
+
+    out = StringIO()
+    call_command("replay_log", "--compare", *map(str, reports), stdout=out)
+    assert "blog:post_detail" in out.getvalue(), (
+        "Убедитесь, что `replay_log --compare` сравнивает прогоны по"
+        " маршрутам."
+    )
@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import override_settings
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def maintenance_on(tmp_path):
+    with override_settings(MAINTENANCE_FLAG_FILE=tmp_path / "flag"):
+        call_command("maintenance", "on", "--message=Идёт миграция")
+        try:
+            yield
+        finally:
+            call_command("maintenance", "off")
+
+
+def test_maintenance_blocks_writes(maintenance_on, mixer):
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    client = Client()
+    client.force_login(post.author)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/posts/create/")
+        assert response.status_code == 503
+        response = client.post(
+            f"/posts/{post.id}/comment/", {"text": "Комментарий"}
+        )
+    assert response.status_code == 503, (
+        "Убедитесь, что в режиме обслуживания запись блокируется."
+    )
+    assert response.content.decode() == "Идёт миграция"
+    assert "Retry-After" in response
+    assert not len(queries), (
+        "Убедитесь, что заблокированные запросы не обращаются к БД."
+    )
+    assert client.get(f"/posts/{post.id}/").status_code == 200, (
+        "Убедитесь, что в режиме обслуживания страницы читаются."
+    )
+
+
+def test_maintenance_read_only_connection():
+    from blog.models import Location
+    from core.maintenance import ReadOnly
+
+    read_only = ReadOnly()
+    with connection.execute_wrapper(read_only):
+        with pytest.raises(OperationalError), transaction.atomic():
+            Location.objects.create(name="Запись")
+    read_only.reset()
+    assert Location.objects.create(name="Запись").pk, (
+        "Убедитесь, что после режима обслуживания запись снова разрешена."
+    )
+
+
+def test_maintenance_toggle_without_restart(tmp_path):
+    from core import maintenance
+
+    with override_settings(MAINTENANCE_FLAG_FILE=tmp_path / "flag"):
+        client = Client()
+        assert client.get("/posts/create/").status_code == 302
+        maintenance.enable()
+        assert client.get("/posts/create/").status_code == 503
+        maintenance.disable()
+        assert client.get("/posts/create/").status_code == 302, (
+            "Убедитесь, что режим обслуживания включается и выключается"
+            " без перезапуска."
+        )
@@ -0,0 +1,46 @@
+import logging
+import tracemalloc
+
+import pytest
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def stop_tracemalloc():
+    was_tracing = tracemalloc.is_tracing()
+    yield
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def test_memory_profiling(stop_tracemalloc, user, caplog):
+    from core.metrics import registry
+
+    with override_settings(
+        MEMORY_PROFILING_ENABLED=True, MEMORY_PROFILING_TOP=5
+    ):
+        client = Client()
+        with caplog.at_level(logging.INFO, logger="blogicum.memory"):
+            client.get(f"/profile/{user.username}/")
+    records = [
+        record for record in caplog.records if record.name == "blogicum.memory"
+    ]
+    assert len(records) == 1, (
+        "Убедитесь, что для каждого запроса в журнал `blogicum.memory`"
+        " пишется запись о памяти."
+    )
+    assert records[0].view == "blog:profile"
+    assert records[0].peak > 0, "Убедитесь, что замеряется пик памяти."
+    assert 0 < len(records[0].sites) <= 5, (
+        "Убедитесь, что в записи есть не более `MEMORY_PROFILING_TOP` мест"
+        " выделения памяти."
+    )
+    key = (
+        "blogicum_request_peak_memory_bytes", (("view", "blog:profile"),)
+    )
+    assert key in registry.histograms, (
+        "Убедитесь, что пик памяти попадает в метрики по представлению."
+    )
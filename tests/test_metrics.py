@@ -0,0 +1,90 @@
+import json
+import subprocess
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    with override_settings(
+        METRICS_ENABLED=True,
+        METRICS_DIR=tmp_path,
+        METRICS_TOKEN="secret",
+    ):
+        yield tmp_path
+
+
+@pytest.fixture
+def staff_client(mixer):
+    client = Client()
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    return client
+
+
+def test_metrics_access(metrics_dir, client, user_client, staff_client):
+    for denied_client in (client, user_client):
+        response = denied_client.get("/metrics")
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            "Убедитесь, что метрики недоступны пользователям без прав"
+            " персонала и без токена."
+        )
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что метрики доступны по токену из `METRICS_TOKEN`."
+    )
+    response = staff_client.get("/metrics")
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что метрики доступны персоналу."
+    )
+    assert response["Content-Type"].startswith("text/plain"), (
+        "Убедитесь, что метрики отдаются в текстовом формате Prometheus."
+    )
+
+
+def test_metrics_per_view(metrics_dir, client, staff_client):
+    client.get("/")
+    client.get("/pages/about/")
+    content = staff_client.get("/metrics").content.decode()
+    for expected in (
+        "# TYPE blogicum_http_request_duration_seconds histogram",
+        'blogicum_http_request_duration_seconds_count{view="blog:index"}',
+        'blogicum_http_request_duration_seconds_bucket{view="pages:about",'
+        'le="+Inf"}',
+        'blogicum_http_requests_total{method="GET",status="200",'
+        'view="blog:index"}',
+        'blogicum_db_duration_seconds_sum{view="blog:index"}',
+        'blogicum_template_duration_seconds_sum{view="pages:about"}',
+    ):
+        assert expected in content, (
+            f"Убедитесь, что в метриках есть строка `{expected}`."
+        )
+    assert list(metrics_dir.glob("metrics-*.json")), (
+        "Убедитесь, что метрики процесса сохраняются в `METRICS_DIR`."
+    )
+
+
+def test_metrics_of_dead_processes_are_retired(metrics_dir):
+    from core.metrics import RETIRED_FILE, Registry, collect
+
+    dead = Registry()
+    dead.inc("blogicum_http_requests_total", {"view": "blog:index"}, 3)
+    process = subprocess.Popen(["true"])
+    process.wait()
+    pid = process.pid
+    (metrics_dir / f"metrics-{pid}.json").write_text(
+        json.dumps(dead.snapshot())
+    )
+    for _ in range(2):
+        total = collect()
+        assert total.counters[
+            ("blogicum_http_requests_total", (("view", "blog:index"),))
+        ] == 3, "Убедитесь, что метрики завершившихся процессов не теряются."
+    assert not (metrics_dir / f"metrics-{pid}.json").exists(), (
+        "Убедитесь, что файлы метрик завершившихся процессов удаляются."
+    )
+    assert (metrics_dir / RETIRED_FILE).exists()
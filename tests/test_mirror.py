@@ -0,0 +1,229 @@
+import os
+import time
+
+import pytest
+from django.db import connections
+from django.test import override_settings
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True, databases=["default", "mirror"]),
+]
+
+
+@pytest.fixture
+def mirror():
+    from core.mirror import Mirror
+
+    with override_settings(MIRROR_ENABLED=True):
+        yield Mirror()
+
+
+def test_mirror_build_and_sync(mirror, mixer):
+    from blog.models import Post
+
+    posts = mixer.cycle(3).blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    mixer.blend("blog.Post", is_published=False)
+    mirror.build(timeout=10)
+    assert mirror.ready
+    mirrored = Post.objects.using("mirror")
+    assert set(mirrored.values_list("id", flat=True)) == {
+        post.id for post in posts
+    }, "Убедитесь, что в зеркало копируются только опубликованные посты."
+
+    new_post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    posts[0].is_published = False
+    posts[0].save()
+    posts[1].title = "Новый заголовок"
+    posts[1].save()
+    posts[2].delete()
+    mirror.sync()
+    assert set(mirrored.values_list("id", flat=True)) == {
+        posts[1].id, new_post.id
+    }, "Убедитесь, что зеркало догоняет основную БД по журналу изменений."
+    assert mirrored.get(id=posts[1].id).title == "Новый заголовок"
+
+
+def test_mirror_build_timeout(mirror, mixer):
+    from core.mirror import MirrorTimeout
+
+    mixer.blend("blog.Post")
+    with pytest.raises(MirrorTimeout):
+        mirror.build(timeout=-1)
+    assert not mirror.ready, (
+        "Убедитесь, что недостроенное зеркало не используется."
+    )
+
+
+def test_anonymous_reads_from_mirror(mixer):
+    from core import mirror
+
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    with override_settings(MIRROR_ENABLED=True):
+        mirror.get_mirror().build(timeout=10)
+        client = Client()
+        try:
+            with CaptureQueriesContext(connections["mirror"]) as queries:
+                assert client.get("/").status_code == 200
+                assert client.get(f"/posts/{post.id}/").status_code == 200
+            assert len(queries), (
+                "Убедитесь, что лента и пост для анонимов читаются из"
+                " зеркала."
+            )
+            client.force_login(post.author)
+            with CaptureQueriesContext(connections["mirror"]) as queries:
+                assert client.get("/").status_code == 200
+            assert not len(queries), (
+                "Убедитесь, что авторизованные пользователи читают из"
+                " основной БД."
+            )
+        finally:
+            mirror.get_mirror().stop()
+            mirror.get_mirror().ready = False
+
+
+def test_mirror_restarts_after_fork(mixer):
+    import json
+
+    from core import metrics, mirror
+
+    mixer.blend("blog.Post", is_published=True, category__is_published=True)
+    with override_settings(MIRROR_ENABLED=True, MIRROR_BUILD_TIMEOUT=10):
+        mirror.get_mirror().start()
+        metrics.registry.inc("blogicum_http_requests_total", {"view": "x"})
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            result = {}
+            try:
+                thread = mirror.get_mirror()._thread
+                result["alive"] = thread is not None and thread.is_alive()
+                for _ in range(100):
+                    if mirror.get_mirror().ready:
+                        break
+                    time.sleep(0.05)
+                result["ready"] = mirror.get_mirror().ready
+                result["counters"] = len(metrics.registry.counters)
+            finally:
+                os.write(write_fd, json.dumps(result).encode())
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            result = json.loads(pipe.read() or "{}")
+        os.waitpid(pid, 0)
+        mirror.get_mirror().stop()
+        mirror.get_mirror().ready = False
+    assert result.get("alive"), (
+        "Убедитесь, что после fork в процессе запускается поток"
+        " синхронизации зеркала."
+    )
+    assert result.get("ready"), (
+        "Убедитесь, что после fork зеркало строится заново."
+    )
+    assert result.get("counters") == 0, (
+        "Убедитесь, что после fork метрики главного процесса сбрасываются."
+    )
+
+
+def test_mirror_sync_updates_rows_in_place(mirror, mixer):
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    mirror.build(timeout=10)
+    post.title = "Новый заголовок"
+    post.save()
+    with CaptureQueriesContext(connections["mirror"]) as queries:
+        mirror.sync()
+    assert not [
+        query for query in queries if query["sql"].startswith("DELETE")
+    ], (
+        "Убедитесь, что изменённые строки обновляются в зеркале на месте,"
+        " а не удаляются и вставляются заново."
+    )
+    from blog.models import Post
+
+    assert Post.objects.using("mirror").get(id=post.id).title == (
+        "Новый заголовок"
+    )
+
+
+def test_change_log_skips_last_login(mirror, mixer):
+    from django.contrib.auth.models import update_last_login
+
+    from core.models import ChangeLog
+
+    user = mixer.blend("auth.User")
+    ChangeLog.objects.all().delete()
+    update_last_login(None, user)
+    assert not ChangeLog.objects.exists(), (
+        "Убедитесь, что вход пользователя не попадает в журнал изменений"
+        " зеркала."
+    )
+
+
+@pytest.mark.django_db(
+    transaction=True, databases=["default", "mirror", "comments"]
+)
+@override_settings(COMMENTS_DATABASE="comments")
+def test_change_log_waits_for_commit(mirror, mixer):
+    from django.db import transaction
+
+    from blog.models import Comment
+    from core.models import ChangeLog
+
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    ChangeLog.objects.all().delete()
+    with pytest.raises(RuntimeError):
+        with transaction.atomic(using="comments"):
+            Comment.objects.create(post=post, author=post.author, text="1")
+            raise RuntimeError
+    assert not ChangeLog.objects.exists(), (
+        "Убедитесь, что откат транзакции в другой БД не оставляет записей"
+        " в журнале изменений."
+    )
+    with transaction.atomic(using="comments"):
+        comment = Comment.objects.create(
+            post=post, author=post.author, text="2"
+        )
+        assert not ChangeLog.objects.exists()
+    assert ChangeLog.objects.filter(
+        model="blog.Comment", object_id=comment.id
+    ).exists(), (
+        "Убедитесь, что изменение в другой БД попадает в журнал после"
+        " фиксации транзакции."
+    )
+
+
+def test_mirror_keeps_created_at(mirror, mixer):
+    from datetime import datetime, timezone
+
+    from blog.models import Comment, Post
+
+    created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    Post.objects.filter(id=post.id).update(created_at=created_at)
+    mirror.build(timeout=10)
+    comment = mixer.blend("blog.Comment", post=post, author=post.author)
+    Comment.objects.filter(id=comment.id).update(created_at=created_at)
+    comment.save(update_fields=["text"])
+    mirror.sync()
+    assert Post.objects.using("mirror").get(id=post.id).created_at == (
+        created_at
+    ), "Убедитесь, что при построении зеркала даты создания не меняются."
+    assert Comment.objects.using("mirror").get(
+        id=comment.id
+    ).created_at == created_at, (
+        "Убедитесь, что при синхронизации зеркала даты создания не"
+        " меняются."
+    )
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, override_settings
+
+from conftest import N_PER_FIXTURE
+
+pytestmark = [pytest.mark.django_db]
+
+LOOP_TEMPLATE = (
+    "{% for post in posts %}\n"
+    "  {{ post.author.username }}\n"
+    "{% endfor %}"
+)
+
+
+def render_posts_view(queryset):
+    def view(request):
+        template = Template(LOOP_TEMPLATE)
+        return HttpResponse(template.render(Context({"posts": queryset})))
+    return view
+
+
+@pytest.fixture
+def posts(mixer):
+    return mixer.cycle(N_PER_FIXTURE).blend("blog.Post")
+
+
+def test_nplusone_raise(posts):
+    from blog.models import Post
+    from core.nplusone import NPlusOneError, NPlusOneMiddleware
+
+    middleware = NPlusOneMiddleware(render_posts_view(Post.objects.all()))
+    with pytest.raises(NPlusOneError, match=r"blog\.Post\.author.*строка 2"):
+        middleware(RequestFactory().get("/"))
+
+    middleware = NPlusOneMiddleware(
+        render_posts_view(Post.objects.select_related("author"))
+    )
+    middleware(RequestFactory().get("/"))
+
+
+def test_nplusone_log(posts, caplog):
+    from blog.models import Post
+    from core.nplusone import NPlusOneMiddleware
+
+    with override_settings(NPLUSONE_MODE="log"):
+        middleware = NPlusOneMiddleware(render_posts_view(Post.objects.all()))
+    with caplog.at_level(logging.WARNING, logger="blogicum.nplusone"):
+        middleware(RequestFactory().get("/"))
+    assert len(caplog.records) == 1, (
+        "Убедитесь, что в режиме `log` о загрузке в цикле сообщается один"
+        " раз за запрос."
+    )
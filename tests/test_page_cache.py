@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import override_settings
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def locmem():
+    return LocMemCache("page-cache-test", {})
+
+
+def test_single_flight(locmem):
+    from core.page_cache import get_or_compute
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "страница"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            get_or_compute("index", compute, 60, cache=locmem)
+        ))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["страница"] * 8
+    assert len(calls) == 1, (
+        "Убедитесь, что при пустом кэше значение вычисляет только один"
+        " поток, а остальные ждут его результат."
+    )
+
+
+def test_stale_while_revalidate(locmem):
+    from core.page_cache import get_or_compute
+
+    locmem.set("index", ("старая", 0.1, time.time() - 1))
+    assert get_or_compute("index", lambda: "новая", 60,
+                          cache=locmem) == "старая", (
+        "Убедитесь, что устаревшее значение отдаётся, пока идёт пересчёт."
+    )
+    for thread in threading.enumerate():
+        if thread.name == "page-cache-refresh":
+            thread.join()
+    assert get_or_compute("index", lambda: "ещё новее", 60,
+                          cache=locmem) == "новая"
+
+
+def test_early_refresh():
+    from core.page_cache import should_refresh_early
+
+    now = time.time()
+    assert not should_refresh_early(0, now + 60, now)
+    assert should_refresh_early(100, now + 1, now, beta=1e6), (
+        "Убедитесь, что долго вычисляемое значение пересчитывается"
+        " незадолго до истечения."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_index_page_cache(mixer, tmp_path):
+    shared = {
+        "BACKEND": "core.cache.backends.sqlite.SQLiteCache",
+        "LOCATION": tmp_path / "cache.sqlite3",
+    }
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    tiered = {"BACKEND": "core.cache.backends.tiered.TieredCache"}
+    with override_settings(PAGE_CACHE_ENABLED=True,
+                           CACHES={"default": tiered, "shared": shared}):
+        client = Client()
+        assert post.title in client.get("/").content.decode()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/")
+        assert response.status_code == 200
+        assert not len(queries), (
+            "Убедитесь, что лента для анонимов отдаётся из кэша страниц."
+        )
+        new_post = mixer.blend(
+            "blog.Post", is_published=True, category=post.category,
+            title="Новый пост",
+        )
+        assert new_post.title in client.get("/").content.decode(), (
+            "Убедитесь, что изменение постов сбрасывает кэш страниц."
+        )
+
+
+def test_tags_without_tag_support():
+    from core.page_cache import get_or_compute, invalidate
+
+    plain = LocMemCache("page-cache-tags-test", {})
+    assert get_or_compute("index", lambda: "страница", 60, tags=("blog",),
+                          cache=plain) == "страница", (
+        "Убедитесь, что теги не мешают кэшам без их поддержки."
+    )
+    invalidate("blog", cache=plain)
+
+
+@pytest.mark.django_db
+def test_page_render_uses_fresh_request(mixer):
+    from django.test import RequestFactory
+
+    from blog.views import Index
+
+    mixer.blend("blog.Post", is_published=True, category__is_published=True)
+    request = RequestFactory().get("/", HTTP_COOKIE="sessionid=1")
+    request.user = AnonymousUser()
+    view = Index()
+    view.setup(request)
+    page_request = view.get_page_request()
+    assert page_request is not request
+    assert "HTTP_COOKIE" not in page_request.META
+    with override_settings(PAGE_CACHE_ENABLED=True):
+        caches["default"].delete(view.get_page_cache_key())
+        assert view.get(request).status_code == 200
+    assert not hasattr(view, "object_list"), (
+        "Убедитесь, что страница для кэша отрисовывается новым"
+        " представлением, а не тем, что обрабатывает запрос."
+    )
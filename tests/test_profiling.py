@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def staff_user(mixer):
+    return mixer.blend("auth.User", is_staff=True)
+
+
+@pytest.fixture
+def staff_client(staff_user):
+    client = Client()
+    client.force_login(staff_user)
+    return client
+
+
+def test_profiling_by_token(tmp_path, staff_user, staff_client, user_client):
+    from core.profiling import TOKEN_HEADER, make_token
+
+    header = "HTTP_" + TOKEN_HEADER.upper().replace("-", "_")
+    with override_settings(PROFILING_ENABLED=True, PROFILE_DIR=tmp_path):
+        response = Client().get("/", **{header: make_token(staff_user)})
+        assert "X-Profile-File" not in response, (
+            "Убедитесь, что запросы не от персонала не профилируются."
+        )
+        response = staff_client.get("/", **{header: "bad-token"})
+        assert "X-Profile-File" not in response, (
+            "Убедитесь, что запрос с неверной подписью не профилируется."
+        )
+        response = staff_client.get("/", **{header: make_token(staff_user)})
+        assert "X-Profile-File" in response, (
+            "Убедитесь, что запрос сотрудника с подписанным заголовком"
+            " профилируется."
+        )
+        name = response["X-Profile-File"]
+        assert (tmp_path / name).is_file()
+
+        response = staff_client.get("/admin/profiles/")
+        assert response.status_code == HTTPStatus.OK
+        assert name in response.content.decode(), (
+            "Убедитесь, что профиль есть на странице `/admin/profiles/`."
+        )
+        response = staff_client.get(f"/admin/profiles/{name}/")
+        assert response.status_code == HTTPStatus.OK
+        assert response.get("Content-Disposition", "").startswith(
+            "attachment"
+        ), "Убедитесь, что профиль можно скачать."
+        response = user_client.get("/admin/profiles/")
+        assert response.status_code != HTTPStatus.OK, (
+            "Убедитесь, что список профилей доступен только персоналу."
+        )
+
+
+def test_profiling_sample_rate(tmp_path, staff_client):
+    with override_settings(
+        PROFILING_ENABLED=True,
+        PROFILING_SAMPLE_RATE=1,
+        PROFILE_DIR=tmp_path,
+    ):
+        response = staff_client.get("/pages/about/")
+    assert response["X-Profile-File"].endswith("_pages.about.prof"), (
+        "Убедитесь, что при `PROFILING_SAMPLE_RATE = 1` профилируются все"
+        " запросы персонала и профиль помечен именем представления."
+    )
@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+DATA_SIZES = (1, N_PER_PAGE + 5)
+BUDGETED_APPS = ("blog", "pages")
+POST_DATA = {
+    "blog:add_comment": {"text": "Комментарий для проверки бюджета"},
+}
+
+
+@pytest.fixture
+def query_budgets():
+    try:
+        from core.query_budget import collect_query_budgets, get_url_names
+    except Exception as e:
+        raise AssertionError(
+            "Убедитесь, что в файле `core/query_budget.py` нет ошибок. При"
+            f" его импорте возникла ошибка:\n{type(e).__name__}: {e}"
+        )
+    budgets = collect_query_budgets()
+    for url_name in get_url_names():
+        if url_name.split(":")[0] not in BUDGETED_APPS:
+            continue
+        assert url_name in budgets, (
+            f"Объявите бюджет SQL-запросов для маршрута `{url_name}` в словаре"
+            " `QUERY_BUDGETS` его urls-модуля."
+        )
+    return {
+        url_name: budget for url_name, budget in budgets.items()
+        if url_name.split(":")[0] in BUDGETED_APPS
+    }
+
+
+def populate(mixer: Mixer, author, another_user, size: int):
+    category = mixer.blend("blog.Category", is_published=True)
+    posts = mixer.cycle(size).blend(
+        "blog.Post",
+        author=author,
+        category=category,
+        location=mixer.blend("blog.Location", is_published=True),
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    post = posts[0]
+    comments = mixer.cycle(size).blend(
+        "blog.Comment", post=post, author=mixer.sequence(author, another_user)
+    )
+    return {
+        "category_slug": category.slug,
+        "username": author.username,
+        "post_id": post.id,
+        "comment_id": comments[0].id,
+    }
+
+
+def get_url(url_name: str, url_kwargs: dict) -> str:
+    for kwargs_names in (
+        ("post_id", "comment_id"),
+        ("post_id",),
+        ("category_slug",),
+        ("username",),
+        (),
+    ):
+        try:
+            return reverse(
+                url_name,
+                kwargs={name: url_kwargs[name] for name in kwargs_names},
+            )
+        except Exception:
+            continue
+    raise AssertionError(f"Не удалось построить адрес маршрута `{url_name}`.")
+
+
+def format_queries(queries, budget: int) -> str:
+    lines = []
+    for number, query in enumerate(queries, start=1):
+        marker = "!!" if number > budget else "  "
+        lines.append(f"{marker} {number}. {query['sql']}")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("size", DATA_SIZES)
+@pytest.mark.parametrize("client_kind", ("anonymous", "author", "another"))
+def test_query_budgets(
+        mixer, user, another_user, query_budgets, size, client_kind
+):
+    url_kwargs = populate(mixer, user, another_user, size)
+    client = Client()
+    if client_kind == "author":
+        client.force_login(user)
+    elif client_kind == "another":
+        client.force_login(another_user)
+
+    exceeded = []
+    for url_name, budget in sorted(query_budgets.items()):
+        url = get_url(url_name, url_kwargs)
+        with CaptureQueriesContext(connection) as ctx:
+            if url_name in POST_DATA:
+                client.post(url, data=POST_DATA[url_name])
+            else:
+                client.get(url)
+        if len(ctx.captured_queries) > budget:
+            exceeded.append(
+                f"`{url_name}` ({url}): {len(ctx.captured_queries)} запросов"
+                f" при бюджете {budget}; превысившие бюджет отмечены `!!`:\n"
+                + format_queries(ctx.captured_queries, budget)
+            )
+    assert not exceeded, (
+        f"Превышены бюджеты SQL-запросов для клиента `{client_kind}` при"
+        f" числе записей {size}:\n" + "\n\n".join(exceeded)
+    )
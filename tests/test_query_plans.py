@@ -0,0 +1,140 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+N_USERS = 20
+N_CATEGORIES = 8
+N_POSTS = 300
+N_COMMENTS = 600
+WATCHED_TABLES = {"blog_post", "blog_comment"}
+# Любая временная сортировка, в том числе «FOR RIGHT PART OF ORDER BY» и
+# «FOR LAST N TERMS OF ORDER BY».
+BAD_STEP_PREFIX = "USE TEMP B-TREE"
+ALIAS_RE = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)"?')
+SCAN_RE = re.compile(r"^SCAN (\w+)")
+
+
+@pytest.fixture
+def populated_db(mixer: Mixer, user):
+    users = [user] + mixer.cycle(N_USERS - 1).blend("auth.User")
+    categories = mixer.cycle(N_CATEGORIES).blend(
+        "blog.Category", is_published=True
+    )
+    now = timezone.now()
+    posts = mixer.cycle(N_POSTS).blend(
+        "blog.Post",
+        author=mixer.sequence(*users),
+        category=mixer.sequence(*categories),
+        location=mixer.blend("blog.Location", is_published=True),
+        is_published=True,
+        pub_date=(now - timedelta(hours=hours) for hours in range(N_POSTS)),
+    )
+    mixer.cycle(N_COMMENTS).blend(
+        "blog.Comment",
+        post=mixer.sequence(*posts),
+        author=mixer.sequence(*users),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return {"user": user, "category": categories[0], "post": posts[0]}
+
+
+def explain(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def find_regressions(sql, plan):
+    aliases = {alias: table for table, alias in ALIAS_RE.findall(sql)}
+    regressions = []
+    for step in plan:
+        match = SCAN_RE.match(step)
+        if match and aliases.get(match[1], match[1]) in WATCHED_TABLES:
+            regressions.append(step)
+        elif step.startswith(BAD_STEP_PREFIX):
+            regressions.append(step)
+    return regressions
+
+
+def test_find_regressions_partial_sort():
+    for step in (
+        "USE TEMP B-TREE FOR ORDER BY",
+        "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY",
+        "USE TEMP B-TREE FOR LAST 2 TERMS OF ORDER BY",
+        "USE TEMP B-TREE FOR GROUP BY",
+    ):
+        assert find_regressions("", [step]) == [step], (
+            f"Убедитесь, что шаг плана `{step}` считается деградацией."
+        )
+
+
+def check_plan(description, sql, params=()):
+    plan = explain(sql, params)
+    regressions = find_regressions(sql, plan)
+    assert not regressions, (
+        f"План запроса `{description}` деградировал: "
+        f"{', '.join(regressions)}.\nЗапрос: {sql}\nПлан:\n"
+        + "\n".join(f"  {step}" for step in plan)
+    )
+
+
+def test_filter_annotate_plans(populated_db):
+    from blog.models import Post
+    from blog.pagination import filter_annotate
+
+    user = populated_db["user"]
+    post = populated_db["post"]
+    # Варианты filter_annotate, которые используют представления блога.
+    cases = {
+        "Index": filter_annotate(Post.objects, filter=True)[:10],
+        "CategoryList": filter_annotate(
+            populated_db["category"].posts, filter=True
+        )[:10],
+        "ProfileDetailView, автор": filter_annotate(
+            user.posts.all().select_related("category"), annotate=True
+        )[:10],
+        "ProfileDetailView, читатель": filter_annotate(
+            filter_annotate(user.posts.all().select_related("category")),
+            filter=True,
+        )[:10],
+        "PostDetailView": filter_annotate(
+            Post.objects.filter(pk=post.pk), filter=True, annotate=False
+        ),
+        "CommentCreateView": filter_annotate(
+            Post.objects.filter(pk=post.pk), filter=True
+        ),
+    }
+    for name, queryset in cases.items():
+        sql, params = queryset.query.sql_with_params()
+        check_plan(f"filter_annotate: {name}", sql, params)
+
+
+@pytest.mark.parametrize("as_author", (False, True))
+def test_view_query_plans(populated_db, as_author, another_user):
+    user = populated_db["user"]
+    client = Client()
+    client.force_login(user if as_author else another_user)
+    urls = (
+        "/",
+        "/?page=3",
+        f"/category/{populated_db['category'].slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{populated_db['post'].id}/",
+    )
+    for url in urls:
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(url)
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not any(f'"{table}"' in sql for table in WATCHED_TABLES):
+                continue
+            check_plan(url, sql)
@@ -0,0 +1,87 @@
+import sqlite3
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+def test_router_reads_from_replicas():
+    from blog.models import Post
+    from core.routers import PrimaryReplicaRouter, ReplicaState, _state
+
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Post) is None, (
+        "Убедитесь, что вне запроса чтение идёт из основной БД."
+    )
+    token = _state.set(ReplicaState())
+    try:
+        assert router.db_for_read(Post) in ("replica1", "replica2"), (
+            "Убедитесь, что чтение постов идёт из реплик."
+        )
+        assert router.db_for_read(get_user_model()) is None
+        assert router.db_for_write(Post) == "default"
+        assert router.db_for_read(Post) == "default", (
+            "Убедитесь, что после записи запрос читает из основной БД."
+        )
+    finally:
+        _state.reset(token)
+    assert router.allow_migrate("replica1", "blog") is False
+
+
+def test_pin_after_write(mixer):
+    from core.routers import PIN_SESSION_KEY
+
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    with override_settings(DATABASE_REPLICAS=["default"]):
+        client = Client()
+        client.force_login(post.author)
+        assert client.get(f"/posts/{post.id}/").status_code == 200
+        assert PIN_SESSION_KEY not in client.session
+        response = client.post(
+            f"/posts/{post.id}/comment/", {"text": "Свой комментарий"}
+        )
+        assert response.status_code == 302
+        assert PIN_SESSION_KEY in client.session, (
+            "Убедитесь, что после записи сессия закрепляется за основной"
+            " БД."
+        )
+
+
+@pytest.fixture
+def replica_alias(tmp_path):
+    alias = "replica_test"
+    connections.settings[alias] = {
+        "ENGINE": "core.db.backends.sqlite3",
+        "NAME": str(tmp_path / "replica.sqlite3"),
+    }
+    yield alias
+    del connections.settings[alias]
+    try:
+        del connections[alias]
+    except AttributeError:
+        pass
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_replicas(mixer, replica_alias):
+    mixer.cycle(2).blend("blog.Post")
+    call_command("sync_replicas", replica_alias, stdout=StringIO())
+    replica = sqlite3.connect(
+        connections.settings[replica_alias]["NAME"]
+    )
+    try:
+        count = replica.execute("SELECT COUNT(*) FROM blog_post").fetchone()
+    finally:
+        replica.close()
+    assert count == (2,), (
+        "Убедитесь, что `sync_replicas` копирует основную БД в реплику."
+    )
@@ -0,0 +1,40 @@
+import re
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_server_timing_header(client, post_with_published_location):
+    response = client.get("/")
+    assert "Server-Timing" not in response, (
+        "Убедитесь, что заголовок Server-Timing выключен по умолчанию."
+    )
+    with override_settings(SERVER_TIMING_ENABLED=True):
+        response = Client().get("/")
+    header = response.get("Server-Timing", "")
+    for metric in ("db", "tpl", "cache", "total"):
+        assert re.search(rf"\b{metric};dur=\d+\.\d+", header), (
+            f"Убедитесь, что в заголовке Server-Timing есть метрика `{metric}`."
+        )
+    queries = int(re.search(r"ORM, (\d+) queries", header).group(1))
+    assert queries > 0, (
+        "Убедитесь, что в заголовке Server-Timing указано число запросов."
+    )
+
+
+def test_instrumented_cache():
+    from core import instrumentation
+
+    instrumentation.install_cache()
+    # Общий кэш без второго уровня: каждое обращение замеряется один раз.
+    cache = caches.create_connection("shared")
+    with instrumentation.collect_stats() as stats:
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+    assert stats.counts["cache"] == 2, (
+        "Убедитесь, что обращения к кэшу учитываются в показателях запроса."
+    )
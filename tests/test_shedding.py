@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+from django.test import override_settings
+from django.test.client import Client
+
+
+def test_limiter_queue():
+    from core.shedding import Limiter
+
+    limiter = Limiter(1, max_queue=1, timeout=5)
+    assert limiter.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(
+        limiter.acquire()
+    ))
+    waiter.start()
+    while not limiter.waiting:
+        pass
+    assert not limiter.acquire(), (
+        "Убедитесь, что при полной очереди запрос сразу отклоняется."
+    )
+    limiter.release()
+    waiter.join()
+    assert acquired == [True], (
+        "Убедитесь, что запрос из очереди получает освободившееся место."
+    )
+
+
+@pytest.mark.django_db
+@override_settings(LOAD_SHEDDING_ENABLED=True,
+                   LOAD_SHEDDING_VIEW_LIMITS={"blog:index": 0})
+def test_view_limit_rejects_with_retry_after():
+    from core.metrics import registry
+
+    key = (
+        "blogicum_shed_requests_total",
+        (("reason", "view"), ("view", "blog:index")),
+    )
+    rejected = registry.counters.get(key, 0)
+    client = Client()
+    response = client.get("/")
+    assert response.status_code == 503, (
+        "Убедитесь, что запросы сверх предела представления получают"
+        " ответ 503."
+    )
+    assert response["Retry-After"] == "1"
+    assert registry.counters[key] == rejected + 1
+    assert client.get("/auth/login/").status_code == 200
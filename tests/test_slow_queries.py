@@ -0,0 +1,54 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_normalize_sql():
+    from core.slow_queries import fingerprint, normalize_sql
+
+    assert normalize_sql(
+        "SELECT * FROM blog_post WHERE id IN (%s, %s, %s) AND title = 'a''b'"
+        " LIMIT 21"
+    ) == "SELECT * FROM blog_post WHERE id IN (...) AND title = ? LIMIT ?", (
+        "Убедитесь, что при нормализации запроса литералы и списки"
+        " параметров заменяются заполнителями."
+    )
+    assert fingerprint(
+        'SELECT * FROM "blog_post" WHERE "blog_post"."id" = 1'
+    ) == fingerprint(
+        'SELECT * FROM "blog_post" WHERE "blog_post"."id" = 42'
+    ), "Убедитесь, что отпечаток не зависит от значений параметров."
+
+
+def test_slow_query_log(tmp_path, client, post_with_published_location):
+    log_path = tmp_path / "slow.log"
+    with override_settings(
+        SLOW_QUERY_LOG_ENABLED=True,
+        SLOW_QUERY_THRESHOLD_MS=0,
+        SLOW_QUERY_LOG=log_path,
+    ):
+        client.get("/")
+        from core.slow_queries import read_entries
+
+        entries = list(read_entries())
+        assert entries, (
+            "Убедитесь, что запросы дольше порога записываются в журнал."
+        )
+        assert {entry["view"] for entry in entries} == {"blog:index"}, (
+            "Убедитесь, что в журнале указано представление запроса."
+        )
+        assert any(
+            "blog_post" in line
+            for entry in entries for line in entry["plan"]
+        ), "Убедитесь, что в журнал записывается план запроса."
+
+        out = StringIO()
+        call_command("slow_queries", "--plans", stdout=out)
+        assert entries[0]["fingerprint"] in out.getvalue(), (
+            "Убедитесь, что команда `slow_queries` выводит сводку по"
+            " отпечаткам запросов."
+        )
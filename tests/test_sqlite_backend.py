@@ -0,0 +1,103 @@
+import json
+import sqlite3
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def file_connection(tmp_path):
+    handler = ConnectionHandler({"default": {
+        "ENGINE": "core.db.backends.sqlite3",
+        "NAME": str(tmp_path / "db.sqlite3"),
+        "OPTIONS": {"pragmas": {"cache_size": -1000}},
+    }})
+    connection = handler["default"]
+    yield connection
+    connection.close()
+
+
+def test_pragmas_applied(file_connection):
+    with file_connection.cursor() as cursor:
+        pragmas = {}
+        for name in ("journal_mode", "synchronous", "busy_timeout",
+                     "cache_size", "mmap_size"):
+            cursor.execute(f"PRAGMA {name}")
+            pragmas[name] = cursor.fetchone()[0]
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "busy_timeout": 5000,
+        "cache_size": -1000,
+        "mmap_size": 128 * 1024 * 1024,
+    }, (
+        "Убедитесь, что бэкенд `core.db.backends.sqlite3` выполняет PRAGMA"
+        " для каждого соединения с учётом `OPTIONS['pragmas']`."
+    )
+
+
+def test_transaction_takes_write_lock(file_connection):
+    file_connection.ensure_connection()
+    file_connection._start_transaction_under_autocommit()
+    other = sqlite3.connect(
+        file_connection.settings_dict["NAME"], timeout=0,
+        isolation_level=None,
+    )
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("BEGIN IMMEDIATE")
+    finally:
+        other.close()
+        file_connection.connection.rollback()
+    assert file_connection.transaction_mode == "IMMEDIATE"
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+def test_atomic_with_retry():
+    from core.db.retry import atomic_with_retry
+
+    calls = []
+
+    def write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError("database is locked")
+        return "ok"
+
+    assert atomic_with_retry(write) == "ok"
+    assert len(calls) == 3, (
+        "Убедитесь, что транзакция повторяется при блокировке БД."
+    )
+
+    def fail():
+        raise OperationalError("no such table: missing")
+
+    with pytest.raises(OperationalError, match="no such table"):
+        atomic_with_retry(fail)
+
+    with override_settings(SQLITE_LOCK_RETRIES=1):
+        calls.clear()
+        with pytest.raises(OperationalError, match="locked"):
+            atomic_with_retry(write)
+        assert len(calls) == 2
+
+
+def test_sqlite_contention_command(tmp_path):
+    report = tmp_path / "report.json"
+    call_command(
+        "sqlite_contention", "--duration", "0.3", "--writers", "2",
+        "--readers", "1", "--json", str(report), stdout=StringIO(),
+    )
+    rows = {row["mode"]: row for row in json.loads(report.read_text())}
+    assert set(rows) == {"default", "tuned", "queued"}
+    for mode in ("tuned", "queued"):
+        assert rows[mode]["writes"] > 0 and rows[mode]["reads"] > 0, (
+            "Убедитесь, что `sqlite_contention` замеряет запись и чтение."
+        )
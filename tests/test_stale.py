@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_stale_page_on_slow_db(mixer, tmp_path, monkeypatch):
+    from core import stale
+
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    shared = {
+        "BACKEND": "core.cache.backends.sqlite.SQLiteCache",
+        "LOCATION": tmp_path / "cache.sqlite3",
+    }
+    with override_settings(STALE_ON_ERROR_ENABLED=True,
+                           STALE_FAILURE_THRESHOLD=2,
+                           CACHES={"default": shared, "shared": shared}):
+        client = Client(raise_request_exception=False)
+        response = client.get("/")
+        assert response.status_code == 200
+        assert "Warning" not in response
+
+        # БД «не успевает»: каждый запрос прерывается по сроку.
+        monkeypatch.setattr(stale, "PROGRESS_STEPS", 1)
+        monkeypatch.setattr(stale.Deadline, "expired", lambda self: True)
+        response = client.get("/")
+        assert response.status_code == 200, (
+            "Убедитесь, что при недоступной БД отдаётся последняя удачная"
+            " версия страницы."
+        )
+        assert response["Warning"].startswith("110")
+        assert post.title in response.content.decode()
+        assert client.get(f"/posts/{post.id}/").status_code == 500
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/")
+        assert response.status_code == 200
+        assert not len(queries), (
+            "Убедитесь, что при разомкнутом предохранителе страница"
+            " отдаётся без обращения к БД."
+        )
+
+
+def test_stale_page_on_slow_session(mixer, tmp_path, monkeypatch):
+    from core import stale
+
+    mixer.blend("blog.Post", is_published=True, category__is_published=True)
+    shared = {
+        "BACKEND": "core.cache.backends.sqlite.SQLiteCache",
+        "LOCATION": tmp_path / "cache.sqlite3",
+    }
+    with override_settings(STALE_ON_ERROR_ENABLED=True,
+                           CACHES={"default": shared, "shared": shared}):
+        assert Client().get("/").status_code == 200
+        client = Client(raise_request_exception=False)
+        client.force_login(mixer.blend("auth.User"))
+        monkeypatch.setattr(stale, "PROGRESS_STEPS", 1)
+        monkeypatch.setattr(stale.Deadline, "expired", lambda self: True)
+        response = client.get("/")
+    assert response.status_code == 200, (
+        "Убедитесь, что при недоступной БД во время чтения сессии"
+        " отдаётся сохранённая страница, а не ошибка 500."
+    )
+    assert response["Warning"].startswith("110")
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+
+def test_startup_time_budget(tmp_path):
+    from django.conf import settings
+
+    from core.management.commands.startup_profile import profile_startup
+
+    env = {"BLOGICUM_DEBUG": "0", "BLOGICUM_DB": str(tmp_path / "db.sqlite3")}
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--noinput"],
+        cwd=settings.BASE_DIR, env={**os.environ, **env},
+        capture_output=True, check=True,
+    )
+    profile = profile_startup(env)
+    assert "debug_toolbar" not in profile["imports"], (
+        "Убедитесь, что без DEBUG панель отладки не импортируется."
+    )
+    assert "requests" in profile["phases"], (
+        "Убедитесь, что замер запуска учитывает запросы прогрева из"
+        " `blogicum/wsgi.py`."
+    )
+    assert profile["warmup"] and all(
+        status is not None and status < 500
+        for status in profile["warmup"].values()
+    ), (
+        "Убедитесь, что запросы прогрева выполняются без ошибок:"
+        f" {profile['warmup']}."
+    )
+    assert profile["phases"]["total"] < settings.STARTUP_TIME_BUDGET, (
+        "Убедитесь, что запуск процесса укладывается в"
+        f" `STARTUP_TIME_BUDGET`: {profile['phases']}."
+    )
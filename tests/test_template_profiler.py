@@ -0,0 +1,51 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from conftest import N_PER_FIXTURE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_template_profile(tmp_path, user_client, mixer, user):
+    mixer.cycle(N_PER_FIXTURE).blend(
+        "blog.Post", author=user, category__is_published=True
+    )
+    with override_settings(
+        TEMPLATE_PROFILING_ENABLED=True,
+        TEMPLATE_PROFILE_LOG=tmp_path / "templates.log",
+    ):
+        user_client.get(f"/profile/{user.username}/")
+        from core.template_profiler import read_entries
+
+        entries = list(read_entries())
+        assert len(entries) == 1, (
+            "Убедитесь, что профиль шаблонов пишется по записи на запрос."
+        )
+        templates = entries[0]["templates"]
+        assert entries[0]["view"] == "blog:profile"
+        assert templates["includes/post_card.html"]["calls"] == N_PER_FIXTURE, (
+            "Убедитесь, что профилировщик считает вызовы каждого шаблона,"
+            " подключённого через include."
+        )
+        assert "includes/header.html" in templates
+        assert any(
+            path.endswith("includes/post_card.html;"
+                          "includes/category_link.html")
+            for path in entries[0]["stacks"]
+        ), "Убедитесь, что стеки шаблонов учитывают вложенность include."
+
+        out = StringIO()
+        call_command("template_profile", "--folded", stdout=out)
+        assert out.getvalue().startswith("blog:profile;"), (
+            "Убедитесь, что команда `template_profile --folded` выводит"
+            " свёрнутые стеки с именем представления."
+        )
+        out = StringIO()
+        call_command("template_profile", stdout=out)
+        assert "includes/post_card.html" in out.getvalue(), (
+            "Убедитесь, что команда `template_profile` выводит сводку по"
+            " шаблонам представления."
+        )
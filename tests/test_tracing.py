@@ -0,0 +1,73 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_tracing(tmp_path, post_with_published_location):
+    trace_file = tmp_path / "traces.jsonl"
+    with override_settings(TRACING_ENABLED=True, TRACING_FILE=trace_file):
+        Client().get(f"/posts/{post_with_published_location.id}/")
+        lines = trace_file.read_text().splitlines()
+        assert len(lines) == 1, (
+            "Убедитесь, что трасса каждого запроса пишется отдельной строкой."
+        )
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0][
+            "spans"
+        ]
+        by_id = {span["spanId"]: span for span in spans}
+        roots = [span for span in spans if "parentSpanId" not in span]
+        assert len(roots) == 1 and roots[0]["name"] == "GET blog:post_detail"
+        view = next(span for span in spans if span["name"].startswith("view"))
+        assert view["parentSpanId"] == roots[0]["spanId"], (
+            "Убедитесь, что интервал представления вложен в интервал запроса."
+        )
+        sql = [span for span in spans if span["name"] == "SELECT"]
+        assert sql and all(
+            span["parentSpanId"] in by_id for span in sql
+        ), "Убедитесь, что SQL-запросы попадают в трассу."
+        include = next(
+            span for span in spans
+            if span["name"] == "template includes/comments.html"
+        )
+        assert by_id[include["parentSpanId"]]["name"] == (
+            "template blog/detail.html"
+        ), "Убедитесь, что интервалы шаблонов учитывают вложенность."
+
+        out = StringIO()
+        call_command("traces", stdout=out)
+        assert "blog:post_detail" in out.getvalue()
+        out = StringIO()
+        call_command("traces", "--trace", roots[0]["traceId"], stdout=out)
+        assert "template includes/comments.html" in out.getvalue(), (
+            "Убедитесь, что команда `traces --trace` выводит дерево трассы."
+        )
+        template = next(
+            span for span in spans
+            if span["name"] == "template blog/detail.html"
+        )
+        assert int(view["startTimeUnixNano"]) <= int(
+            template["startTimeUnixNano"]
+        ) and int(template["endTimeUnixNano"]) <= int(
+            view["endTimeUnixNano"]
+        ), "Убедитесь, что интервал представления включает отрисовку."
+
+
+def test_read_traces_order(tmp_path):
+    from core.management.commands.traces import read_traces
+
+    path = tmp_path / "traces.jsonl"
+    for suffix in ("", ".1", ".2", ".10"):
+        span = {"traceId": suffix or "current"}
+        line = {"resourceSpans": [{"scopeSpans": [{"spans": [span]}]}]}
+        (tmp_path / f"traces.jsonl{suffix}").write_text(json.dumps(line))
+    order = [spans[0]["traceId"] for spans in read_traces(path)]
+    assert order == [".10", ".2", ".1", "current"], (
+        "Убедитесь, что ротированные файлы трасс читаются от старых"
+        " к новым по номеру."
+    )
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+
+@pytest.mark.django_db
+def test_warm_up(mixer):
+    from django.template import engines
+
+    from core.metrics import registry
+    from core.warmup import warm_up
+
+    mixer.blend("blog.Post", is_published=True, category__is_published=True)
+    counters = dict(registry.counters)
+    timings = warm_up()
+    assert registry.counters == counters, (
+        "Убедитесь, что запросы прогрева не попадают в метрики."
+    )
+    assert set(timings) == {"urlconf", "templates", "requests"}, (
+        "Убедитесь, что прогрев загружает URLconf, шаблоны и выполняет"
+        " запросы."
+    )
+    loaders = engines["django"].engine.template_loaders
+    cached = [
+        loader for loader in loaders
+        if hasattr(loader, "get_template_cache")
+    ]
+    if cached:
+        assert "blog/index.html" in cached[0].get_template_cache
+
+
+def test_read_memory():
+    from core.management.commands.runworkers import read_memory
+
+    memory = read_memory(os.getpid())
+    if memory is None:
+        pytest.skip("Нет /proc/<pid>/smaps_rollup.")
+    assert memory["Rss"] >= memory["Pss"] > 0
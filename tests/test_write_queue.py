@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from django.test import override_settings
+from django.test.client import Client
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def get_batch_count():
+    from core.metrics import registry
+
+    histogram = registry.histograms.get(
+        ("blogicum_write_queue_batch_size", (("database", "default"),))
+    )
+    return histogram["count"] if histogram else 0
+
+
+def test_write_queue_group_commit():
+    from blog.models import Location
+    from core.write_queue import WriteQueue
+
+    write_queue = WriteQueue(batch_window=0.05)
+    batches = get_batch_count()
+    results = []
+    threads = [
+        threading.Thread(target=lambda number=number: results.append(
+            write_queue.submit(Location.objects.create, name=f"loc{number}")
+        ))
+        for number in range(8)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batches = get_batch_count() - batches
+
+        def fail():
+            Location.objects.create(name="rolled back")
+            raise ValueError("ошибка задания")
+
+        with pytest.raises(ValueError):
+            write_queue.submit(fail)
+        assert write_queue.submit(Location.objects.count) == 8
+    finally:
+        write_queue.stop()
+    assert all(location.pk for location in results), (
+        "Убедитесь, что `WriteQueue.submit` возвращает результат задания"
+        " после фиксации."
+    )
+    assert Location.objects.filter(name="rolled back").count() == 0, (
+        "Убедитесь, что изменения упавшего задания откатываются."
+    )
+    assert batches < 8, (
+        "Убедитесь, что очередь записи фиксирует задания пачками."
+    )
+
+
+@override_settings(WRITE_QUEUE_ENABLED=True)
+def test_views_write_through_queue(mixer):
+    from blog.models import Comment
+    from core.write_queue import get_write_queue
+
+    post = mixer.blend(
+        "blog.Post", is_published=True, category__is_published=True
+    )
+    client = Client()
+    client.force_login(post.author)
+    try:
+        response = client.post(
+            f"/posts/{post.id}/comment/", {"text": "Через очередь"}
+        )
+        assert response.status_code == 302
+        comment = Comment.objects.get()
+        assert comment.text == "Через очередь"
+
+        response = client.post(
+            f"/posts/{post.id}/delete_comment/{comment.id}/"
+        )
+        assert response.status_code == 302
+        assert not Comment.objects.exists(), (
+            "Убедитесь, что при включённой очереди записи представления"
+            " блога сохраняют и удаляют объекты через неё."
+        )
+    finally:
+        get_write_queue().stop()
+
+
+def test_write_queue_timeout_cancels_task():
+    import time
+
+    from blog.models import Location
+    from core.write_queue import WriteQueue, WriteQueueTimeout
+
+    write_queue = WriteQueue(timeout=0.2)
+
+    def slow():
+        time.sleep(0.6)
+        return Location.objects.create(name="медленная")
+
+    slow_thread = threading.Thread(target=lambda: write_queue.submit(slow))
+    try:
+        slow_thread.start()
+        time.sleep(0.1)
+        with pytest.raises(WriteQueueTimeout):
+            write_queue.submit(Location.objects.create, name="отменённая")
+        slow_thread.join()
+    finally:
+        write_queue.stop()
+    assert not Location.objects.filter(name="отменённая").exists(), (
+        "Убедитесь, что не начатое вовремя задание очереди записи"
+        " отменяется и не выполняется позже."
+    )
+    assert Location.objects.filter(name="медленная").exists(), (
+        "Убедитесь, что начатое задание дожидаются до фиксации."
+    )